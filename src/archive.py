@@ -0,0 +1,280 @@
+import os
+import tempfile
+
+import numpy as np
+
+# Archive of every code ever scanned, stored next to config.json
+ARCHIVE_FILE = 'code_archive.npz'
+
+# Characters of a TCG code in ASCII order, so packed codes sort like their
+# text. These are the characters of corpus.CODE_ALPHABET; lower case is
+# accepted and archived as upper case.
+PACK_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# Layout of a TCG code, e.g. ABC-DEFG-HIJ-KLM: 13 characters in four groups
+CODE_LENGTH = 16
+DASH_POSITIONS = [3, 8, 12]
+CHAR_POSITIONS = [i for i in range(CODE_LENGTH) if i not in DASH_POSITIONS]
+
+# 13 base-36 characters need 68 bits, 4 more than a uint64. The first
+# character picks one of 36 buckets and the other 12 make the uint64 key,
+# so a code costs 8 bytes and the buckets stay sorted like the codes.
+BUCKETS = len(PACK_ALPHABET)
+_BASE = np.uint64(len(PACK_ALPHABET))
+_POWERS = np.array([len(PACK_ALPHABET) ** i for i in range(len(CHAR_POSITIONS) - 2, -1, -1)], dtype=np.uint64)
+
+# Character value by code point; 255 marks characters that are not in the alphabet
+_VALUES = np.full(128, 255, dtype=np.uint8)
+for _value, _char in enumerate(PACK_ALPHABET):
+    _VALUES[ord(_char)] = _value
+    _VALUES[ord(_char.lower())] = _value
+
+# Codes converted per chunk when packing, which bounds the temporary memory
+_PACK_CHUNK = 1 << 16
+
+
+def pack_codes(codes):
+    """
+    Pack TCG codes into bucket numbers and 64-bit keys.
+
+    Args:
+        codes: Sequence of code strings
+
+    Returns:
+        Tuple of (bucket uint8 array, key uint64 array, valid bool array),
+        one entry per code. Entries of codes that are not in the TCG format
+        are marked invalid and hold zeros.
+    """
+    codes = list(codes)
+    buckets = np.zeros(len(codes), dtype=np.uint8)
+    keys = np.zeros(len(codes), dtype=np.uint64)
+    valid = np.zeros(len(codes), dtype=bool)
+    for start in range(0, len(codes), _PACK_CHUNK):
+        chunk = slice(start, start + _PACK_CHUNK)
+        # One column too many, so longer codes show up as a non-zero last column
+        points = np.array(codes[chunk], dtype=f'U{CODE_LENGTH + 1}').view(np.uint32)
+        points = points.reshape(-1, CODE_LENGTH + 1)
+        chars = points[:, CHAR_POSITIONS]
+        values = _VALUES[np.minimum(chars, 127)]
+        ok = (points[:, CODE_LENGTH] == 0) & (chars < 128).all(axis=1) & (values < BUCKETS).all(axis=1)
+        ok &= (points[:, DASH_POSITIONS] == ord('-')).all(axis=1)
+        values[~ok] = 0
+
+        buckets[chunk] = values[:, 0]
+        keys[chunk] = (values[:, 1:].astype(np.uint64) * _POWERS).sum(axis=1, dtype=np.uint64)
+        valid[chunk] = ok
+    return buckets, keys, valid
+
+
+def unpack_codes(buckets, keys):
+    """
+    Turn bucket numbers and keys back into code strings.
+
+    Returns:
+        List of codes in the order given
+    """
+    count = len(keys)
+    values = np.empty((count, len(CHAR_POSITIONS)), dtype=np.uint8)
+    values[:, 0] = buckets
+    remaining = np.asarray(keys, dtype=np.uint64).copy()
+    for column in range(len(CHAR_POSITIONS) - 1, 0, -1):
+        values[:, column] = remaining % _BASE
+        remaining //= _BASE
+
+    text = np.full((count, CODE_LENGTH), ord('-'), dtype=np.uint8)
+    text[:, CHAR_POSITIONS] = np.frombuffer(PACK_ALPHABET.encode(), dtype=np.uint8)[values]
+    return text.view(f'S{CODE_LENGTH}').ravel().astype(f'U{CODE_LENGTH}').tolist()
+
+
+def _member(sorted_keys, keys):
+    """Which of `keys` are in the sorted array `sorted_keys`."""
+    if not len(sorted_keys):
+        return np.zeros(len(keys), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return sorted_keys[positions] == keys
+
+
+class CodeArchive:
+    """
+    Set of TCG codes packed into 8 bytes each, for archives of millions of codes.
+
+    Codes are kept as sorted uint64 keys in one array, partitioned into a
+    bucket per first character (see pack_codes), so a million codes take
+    8 MB instead of the ~100 bytes of a Python string each. Membership
+    is a binary search and set operations work bucket by bucket on whole
+    arrays. Iterating yields the codes in sorted order.
+
+    Only codes in the TCG format can be archived; from_codes() counts the
+    others in `rejected`.
+
+    Args:
+        keys: uint64 keys, sorted within each bucket
+        bounds: BUCKETS + 1 offsets into `keys` where each bucket starts
+    """
+
+    def __init__(self, keys=None, bounds=None):
+        self.keys = np.zeros(0, dtype=np.uint64) if keys is None else keys
+        self.bounds = np.zeros(BUCKETS + 1, dtype=np.int64) if bounds is None else bounds
+        self.rejected = 0
+
+    @classmethod
+    def from_codes(cls, codes):
+        """Build an archive from code strings, dropping duplicates."""
+        buckets, keys, valid = pack_codes(codes)
+        archive = cls._from_packed(buckets[valid], keys[valid])
+        archive.rejected = int(np.count_nonzero(~valid))
+        return archive
+
+    @classmethod
+    def _from_packed(cls, buckets, keys):
+        order = np.lexsort((keys, buckets))
+        buckets, keys = buckets[order], keys[order]
+        if len(keys):
+            distinct = np.ones(len(keys), dtype=bool)
+            distinct[1:] = (keys[1:] != keys[:-1]) | (buckets[1:] != buckets[:-1])
+            buckets, keys = buckets[distinct], keys[distinct]
+        bounds = np.zeros(BUCKETS + 1, dtype=np.int64)
+        bounds[1:] = np.cumsum(np.bincount(buckets, minlength=BUCKETS))
+        return cls(keys, bounds)
+
+    def bucket(self, index):
+        """The sorted keys of one bucket."""
+        return self.keys[self.bounds[index]:self.bounds[index + 1]]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def nbytes(self):
+        """Memory held by the packed codes."""
+        return self.keys.nbytes + self.bounds.nbytes
+
+    def __iter__(self):
+        return iter(self.codes())
+
+    def codes(self, start=0, stop=None):
+        """Return the codes from sorted position `start` up to `stop` as strings."""
+        stop = len(self) if stop is None else stop
+        buckets = np.repeat(np.arange(BUCKETS, dtype=np.uint8), np.diff(self.bounds))
+        return unpack_codes(buckets[start:stop], self.keys[start:stop])
+
+    def contains(self, codes):
+        """
+        Check many codes at once.
+
+        Returns:
+            Bool array, True for each code in the archive
+        """
+        return self.lookup(codes)[0]
+
+    def lookup(self, codes):
+        """
+        Check many codes at once, telling malformed codes apart.
+
+        Returns:
+            Tuple of (found, valid) bool arrays, one entry per code; codes
+            that are not in the TCG format are neither found nor valid
+        """
+        buckets, keys, valid = pack_codes(codes)
+        found = np.zeros(len(keys), dtype=bool)
+        # Group the codes by bucket with one sort instead of a scan per bucket
+        order = np.flatnonzero(valid)
+        order = order[np.argsort(buckets[order], kind='stable')]
+        ends = np.cumsum(np.bincount(buckets[order], minlength=BUCKETS))
+        for index, selected in enumerate(np.split(order, ends[:-1])):
+            if len(selected):
+                found[selected] = _member(self.bucket(index), keys[selected])
+        return found, valid
+
+    def __contains__(self, code):
+        return bool(self.contains([code])[0])
+
+    def _combine(self, other, operation):
+        parts = []
+        bounds = np.zeros(BUCKETS + 1, dtype=np.int64)
+        for index in range(BUCKETS):
+            ours, theirs = self.bucket(index), other.bucket(index)
+            if operation == 'union':
+                extra = theirs[~_member(ours, theirs)]
+                part = np.insert(ours, np.searchsorted(ours, extra), extra) if len(extra) else ours
+            elif operation == 'intersection':
+                part = theirs[_member(ours, theirs)]
+            else:
+                part = ours[~_member(theirs, ours)]
+            parts.append(part)
+            bounds[index + 1] = bounds[index] + len(part)
+        return CodeArchive(np.concatenate(parts), bounds)
+
+    def union(self, other):
+        """Codes in either archive."""
+        return self._combine(other, 'union')
+
+    def intersection(self, other):
+        """Codes in both archives."""
+        return self._combine(other, 'intersection')
+
+    def difference(self, other):
+        """Codes in this archive but not in `other`."""
+        return self._combine(other, 'difference')
+
+    def _position(self, code, side):
+        buckets, keys, valid = pack_codes([code])
+        if not valid[0]:
+            raise ValueError(f"Not a TCG code: {code}")
+        return int(self.bounds[buckets[0]] + np.searchsorted(self.bucket(buckets[0]), keys[0], side))
+
+    def between(self, low, high):
+        """
+        Find the codes in a sorted range.
+
+        Args:
+            low: First code of the range
+            high: Last code of the range, included
+
+        Returns:
+            Tuple of (start, stop) sorted positions; pass them to codes()
+        """
+        start = self._position(low, 'left')
+        return start, max(start, self._position(high, 'right'))
+
+    def prefix(self, prefix):
+        """Return the archived codes starting with `prefix`, e.g. 'ABC-D', in sorted order."""
+        prefix = prefix.upper()
+        low = prefix + "".join('-' if i in DASH_POSITIONS else '0' for i in range(len(prefix), CODE_LENGTH))
+        high = prefix + "".join('-' if i in DASH_POSITIONS else 'Z' for i in range(len(prefix), CODE_LENGTH))
+        if not pack_codes([low])[2][0]:
+            return []
+        return self.codes(*self.between(low, high))
+
+    def save(self, path):
+        """
+        Write the archive to a NumPy .npz file.
+
+        The archive is written to a temporary file and renamed into place,
+        so a crash or a full disk never leaves a truncated archive behind.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, keys=self.keys, bounds=self.bounds)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp creates private files; keep the permissions of the archive being replaced
+            try:
+                mode = os.stat(path).st_mode & 0o777
+            except OSError:
+                mode = 0o644
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """Read an archive written by save()."""
+        with np.load(path) as data:
+            return cls(data['keys'], data['bounds'])
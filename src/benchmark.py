@@ -0,0 +1,245 @@
+import json
+import time
+import platform
+import hashlib
+import cv2
+
+from src.scanner import QRScanner
+from src.corpus import generate_corpus
+from src.metrics import percentile
+
+# Scanner configurations benchmarked through QRScanner.scan_qr_code,
+# as attribute overrides applied to a fresh scanner
+SCANNER_CONFIGURATIONS = {
+    'opencv': {},
+    'opencv-no-fallback': {'preprocess_fallback': False},
+    'opencv-single-stage': {'two_stage': False},
+}
+
+# Regression thresholds used by compare_results()
+DECODE_RATE_TOLERANCE = 0.02
+FPS_TOLERANCE = 0.10
+LATENCY_TOLERANCE = 0.15
+
+
+def _scanner_backend(overrides):
+    scanner = QRScanner()
+    for name, value in overrides.items():
+        setattr(scanner, name, value)
+    scanner.metrics.enabled = False
+
+    def decode(frame):
+        return [result['data'] for result in scanner.scan_qr_code(frame)]
+    # Two-stage counters, reported next to the backend's results
+    decode.scanner = scanner
+    return decode
+
+
+def _aruco_backend():
+    detector = cv2.QRCodeDetectorAruco()
+
+    def decode(frame):
+        data = detector.detectAndDecode(frame)[0]
+        return [data] if data else []
+    return decode
+
+
+def _pyzbar_backend():
+    from pyzbar import pyzbar
+
+    def decode(frame):
+        return [symbol.data.decode('utf-8', 'replace') for symbol in pyzbar.decode(frame)]
+    return decode
+
+
+def available_backends():
+    """
+    Return every backend that can run in this environment.
+
+    Returns:
+        Dict of backend name -> decode function taking a BGR frame and
+        returning a list of decoded payloads
+    """
+    backends = {name: _scanner_backend(overrides) for name, overrides in SCANNER_CONFIGURATIONS.items()}
+    if hasattr(cv2, 'QRCodeDetectorAruco'):
+        backends['opencv-aruco'] = _aruco_backend()
+    try:
+        backends['pyzbar'] = _pyzbar_backend()
+    except ImportError:
+        # pyzbar or the zbar shared library is not installed
+        pass
+    return backends
+
+
+def corpus_fingerprint(corpus):
+    """Hash of the corpus payloads and pixels, so results are only compared like for like."""
+    digest = hashlib.sha1()
+    for sample in corpus:
+        digest.update((sample['payload'] or '').encode())
+        digest.update(sample['frame'][::17, ::17].tobytes())
+    return digest.hexdigest()[:12]
+
+
+def run_backend(decode, corpus):
+    """
+    Decode every frame of the corpus with one backend.
+
+    Returns:
+        Dict with decode rate, false positives, latency percentiles (ms),
+        frames per second and decode rate per condition
+    """
+    latencies = []
+    per_condition = {}
+    hits = positives = false_positives = 0
+
+    start = time.perf_counter()
+    for sample in corpus:
+        t0 = time.perf_counter()
+        decoded = decode(sample['frame'])
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+        condition = per_condition.setdefault(sample['condition'], [0, 0])
+        if sample['payload'] is None:
+            false_positives += bool(decoded)
+            continue
+        positives += 1
+        condition[1] += 1
+        if sample['payload'] in decoded:
+            hits += 1
+            condition[0] += 1
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'frames': len(corpus),
+        'decode_rate': hits / positives if positives else 0.0,
+        'false_positives': false_positives,
+        'latency_ms': {
+            'mean': sum(latencies) / len(latencies) if latencies else 0.0,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+        },
+        'fps': len(corpus) / elapsed if elapsed else 0.0,
+        'conditions': {
+            name: hit / total for name, (hit, total) in per_condition.items() if total
+        },
+    }
+
+
+def run_benchmark(frames=180, seed=1234, width=1280, height=720, backends=None):
+    """
+    Generate the corpus and benchmark every requested backend on it.
+
+    Args:
+        frames: Number of corpus frames
+        seed: Corpus seed
+        width: Frame width
+        height: Frame height
+        backends: Names of backends to run (defaults to all available)
+
+    Returns:
+        Results dict suitable for save_results() and compare_results()
+    """
+    corpus = list(generate_corpus(frames, seed, width, height))
+    available = available_backends()
+    names = backends or list(available)
+
+    results = {}
+    for name in names:
+        if name not in available:
+            print(f"Skipping unavailable backend: {name}")
+            continue
+        results[name] = run_backend(available[name], corpus)
+        scanner = getattr(available[name], 'scanner', None)
+        if scanner is not None and scanner.two_stage:
+            results[name]['stages'] = dict(scanner.decode_stats)
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'opencv_threads': cv2.getNumThreads(),
+        },
+        'corpus': {
+            'frames': frames,
+            'seed': seed,
+            'size': [width, height],
+            'fingerprint': corpus_fingerprint(corpus),
+        },
+        'results': results,
+    }
+
+
+def save_results(results, path):
+    """Write benchmark results as JSON."""
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(path):
+    """Read benchmark results written by save_results()."""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def format_results(results):
+    """Render benchmark results as a text table."""
+    lines = [
+        f"Corpus: {results['corpus']['frames']} frames, seed {results['corpus']['seed']}, "
+        f"{results['corpus']['size'][0]}x{results['corpus']['size'][1]}",
+        f"{'backend':<20}{'decode':>8}{'fp':>5}{'p50':>8}{'p95':>8}{'p99':>8}{'fps':>8}",
+    ]
+    for name, result in results['results'].items():
+        latency = result['latency_ms']
+        lines.append(
+            f"{name:<20}{result['decode_rate']:>7.1%}{result['false_positives']:>5}"
+            f"{latency['p50']:>8.1f}{latency['p95']:>8.1f}{latency['p99']:>8.1f}{result['fps']:>8.1f}"
+        )
+    for name, result in results['results'].items():
+        stages = result.get('stages')
+        if stages and stages['frames']:
+            frames = stages['frames']
+            lines.append(
+                f"{name}: {stages['no_candidate'] / frames:.0%} of frames stopped at the finder check, "
+                f"{stages['no_quad'] / frames:.0%} at detect, {stages['decode_failed'] / frames:.0%} failed to decode, "
+                f"{stages['fallback'] / frames:.0%} needed the fallback"
+            )
+    return "\n".join(lines)
+
+
+def compare_results(current, baseline):
+    """
+    Compare two benchmark runs.
+
+    Returns:
+        Tuple of (report lines, list of regression descriptions)
+    """
+    lines = []
+    regressions = []
+    if current['corpus'] != baseline['corpus']:
+        lines.append("Warning: corpus differs from the baseline; comparison may not be meaningful")
+
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            lines.append(f"{name}: no baseline")
+            continue
+
+        rate_delta = result['decode_rate'] - base['decode_rate']
+        fps_delta = (result['fps'] - base['fps']) / base['fps'] if base['fps'] else 0.0
+        p95_base = base['latency_ms']['p95']
+        p95_delta = (result['latency_ms']['p95'] - p95_base) / p95_base if p95_base else 0.0
+        lines.append(f"{name}: decode {rate_delta:+.1%}, fps {fps_delta:+.1%}, p95 latency {p95_delta:+.1%}")
+
+        if rate_delta < -DECODE_RATE_TOLERANCE:
+            regressions.append(f"{name}: decode rate dropped {-rate_delta:.1%}")
+        if fps_delta < -FPS_TOLERANCE:
+            regressions.append(f"{name}: throughput dropped {-fps_delta:.1%}")
+        if p95_delta > LATENCY_TOLERANCE:
+            regressions.append(f"{name}: p95 latency rose {p95_delta:.1%}")
+
+    return lines, regressions
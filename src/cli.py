@@ -0,0 +1,381 @@
+import os
+import argparse
+
+from src.config import Config
+from src.export import ExportMarks, EXPORT_MARKS_FILE, export_new_codes, read_new_lines
+
+
+def build_parser():
+    """Build the command line parser for the non-GUI commands."""
+    parser = argparse.ArgumentParser(
+        prog="codedexpro",
+        description="CodeDex Pro - Pokémon TCG Code Scanner and Manager. "
+                    "Run without a command to start the application."
+    )
+    parser.add_argument('--record', metavar='PATH',
+                        help="Record camera frames to a lossless video (e.g. session.mkv)")
+    parser.add_argument('--replay', metavar='PATH',
+                        help="Replay a recording instead of using a live camera")
+    parser.add_argument('--replay-speed', choices=['recorded', 'max'], default='recorded',
+                        help="Replay at the recorded frame timing or as fast as frames are read")
+    parser.add_argument('--measure-startup', action='store_true',
+                        help="Print how long the window took to build and first paint, then exit")
+    commands = parser.add_subparsers(dest='command')
+
+    export_new = commands.add_parser(
+        'export-new',
+        help="Export only the codes added to a source file since the last export"
+    )
+    export_new.add_argument('source', help="Text file with one code per line")
+    export_new.add_argument('destination', help="TXT or Markdown file to export to")
+    export_new.add_argument('--delta', action='store_true',
+                            help="Write a fresh numbered delta file instead of appending")
+    export_new.add_argument('--format', choices=['txt', 'md'],
+                            help="Output format (defaults to the destination extension)")
+    export_new.set_defaults(handler=run_export_new)
+
+    bench = commands.add_parser(
+        'bench',
+        help="Benchmark QR decoding on a synthetic frame corpus"
+    )
+    bench.add_argument('--frames', type=int, default=180, help="Number of corpus frames")
+    bench.add_argument('--seed', type=int, default=1234, help="Corpus random seed")
+    bench.add_argument('--size', default='1280x720', help="Frame size as WIDTHxHEIGHT")
+    bench.add_argument('--backend', action='append',
+                       help="Backend to run (repeatable, defaults to all available)")
+    bench.add_argument('--output', help="Write results to this JSON file")
+    bench.add_argument('--compare', help="Baseline results file to compare against")
+    bench.add_argument('--fail-on-regression', action='store_true',
+                       help="Exit with status 1 if a regression is found")
+    bench.set_defaults(handler=run_bench)
+
+    soak = commands.add_parser(
+        'soak',
+        help="Run the scanner on a synthetic camera and fail if memory keeps growing"
+    )
+    soak.add_argument('--duration', default='1h', help="Length of the run, e.g. 90s, 30m or 8h")
+    soak.add_argument('--warmup', default='5m', help="Time to run before the memory baseline is taken")
+    soak.add_argument('--interval', default='30s', help="Time between memory samples")
+    soak.add_argument('--max-growth-mb', type=float, default=32.0,
+                      help="Allowed RSS growth over the baseline in MB")
+    soak.add_argument('--size', default='1280x720', help="Frame size as WIDTHxHEIGHT")
+    soak.add_argument('--cards', type=int, default=200,
+                      help="Distinct cards shown before payloads repeat")
+    soak.add_argument('--log', help="Append every memory sample to this JSON lines file")
+    soak.add_argument('--show', action='store_true', help="Show the window instead of rendering offscreen")
+    soak.set_defaults(handler=run_soak)
+
+    scan = commands.add_parser(
+        'scan',
+        help="Print codes as they are scanned, without the window (use --replay for a recording)"
+    )
+    scan.add_argument('--camera', type=int, help="Camera index (defaults to the configured camera)")
+    scan.add_argument('--timeout', type=float, help="Stop after this many seconds")
+    scan.add_argument('--count', type=int, help="Stop after this many codes")
+    scan.add_argument('--all', action='store_true', help="Print every detection, not only new codes")
+    scan.set_defaults(handler=run_scan)
+
+    mock_server = commands.add_parser(
+        'mock-server',
+        help="Run a local stand-in for the redemption service"
+    )
+    mock_server.add_argument('--port', type=int, default=8765, help="Port to listen on")
+    _add_service_arguments(mock_server)
+    mock_server.set_defaults(handler=run_mock_server)
+
+    collect = commands.add_parser(
+        'collect',
+        help="Run a collector that merges and dedupes the codes of several scanning stations"
+    )
+    collect.add_argument('--host', default='0.0.0.0',
+                         help="Address to listen on (127.0.0.1 for stations on this computer only)")
+    collect.add_argument('--port', type=int, default=8770, help="Port to listen on")
+    collect.add_argument('--index', help="SQLite index of received codes (defaults to collector_index.db "
+                                         "next to config.json)")
+    collect.add_argument('--token', help="Shared token stations must send (required unless --host is a "
+                                         "loopback address)")
+    collect.set_defaults(handler=run_collect)
+
+    archive = commands.add_parser(
+        'archive',
+        help="Keep every code ever scanned in a compact archive and check new codes against it"
+    )
+    archive.add_argument('action', choices=['add', 'check', 'stats'],
+                         help="add: archive the codes of FILES; check: count which codes of FILES are "
+                              "archived already; stats: show the archive size")
+    archive.add_argument('files', nargs='*', metavar='FILE', help="Text files with one code per line")
+    archive.add_argument('--archive', help="Archive file (defaults to code_archive.npz next to config.json)")
+    archive.add_argument('--output', help="With check, write the codes not archived yet to this file")
+    archive.set_defaults(handler=run_archive)
+
+    loadtest = commands.add_parser(
+        'loadtest',
+        help="Push synthetic codes through the redemption pipeline and report throughput"
+    )
+    loadtest.add_argument('--codes', type=int, default=20000, help="Number of synthetic codes")
+    loadtest.add_argument('--accounts', type=int, default=1, help="Accounts to shard the codes across")
+    loadtest.add_argument('--concurrency', type=int, default=4, help="Batches in flight per account")
+    loadtest.add_argument('--rate', type=float,
+                          help="Client rate limit in requests/s per account (0 for none, defaults to --rate-limit)")
+    loadtest.add_argument('--url', help="Test this service instead of a local mock")
+    loadtest.add_argument('--seed', type=int, default=1234, help="Random seed")
+    loadtest.add_argument('--output', help="Write results to this JSON file")
+    _add_service_arguments(loadtest)
+    loadtest.set_defaults(handler=run_loadtest)
+
+    return parser
+
+
+def _add_service_arguments(parser):
+    """Add the mock redemption service knobs to a command."""
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="Service time per request")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Random extra service time")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests failing with HTTP 500")
+    parser.add_argument('--lost-rate', type=float, default=0.0,
+                        help="Share of requests processed but answered with HTTP 503")
+    parser.add_argument('--rate-limit', type=float, default=0.0,
+                        help="Requests/s per account before HTTP 429 (0 for none)")
+    parser.add_argument('--invalid-ratio', type=float, default=0.0, help="Share of codes reported invalid")
+    parser.add_argument('--used-ratio', type=float, default=0.0,
+                        help="Share of codes already redeemed elsewhere")
+
+
+def _service_options(args):
+    return {
+        'latency': args.latency_ms / 1000.0,
+        'jitter': args.jitter_ms / 1000.0,
+        'error_rate': args.error_rate,
+        'lost_rate': args.lost_rate,
+        'rate_limit': args.rate_limit,
+        'invalid_ratio': args.invalid_ratio,
+        'used_ratio': args.used_ratio,
+    }
+
+
+def run_export_new(args):
+    """Append codes added to `args.source` since the last run to `args.destination`."""
+    file_format = args.format or ('md' if args.destination.endswith('.md') else 'txt')
+    marks = ExportMarks(Config().data_path(EXPORT_MARKS_FILE))
+    source = f"file:{os.path.abspath(args.source)}"
+
+    try:
+        offset = marks.position(args.destination, source)
+        codes, offset = read_new_lines(args.source, offset)
+        file_path, count = export_new_codes(
+            codes, args.destination, file_format, marks, source, offset, delta=args.delta
+        )
+    except (OSError, ValueError) as e:
+        # ValueError covers a source file that is not UTF-8 text
+        print(f"Error exporting codes: {e}")
+        return 1
+
+    if count:
+        print(f"Exported {count} new codes to {file_path}")
+    else:
+        print("No new codes since the last export")
+    return 0
+
+
+def run_bench(args):
+    """Run the decoder benchmark and optionally compare with a baseline."""
+    from src import benchmark
+
+    try:
+        width, height = (int(v) for v in args.size.lower().split('x'))
+    except ValueError:
+        print(f"Invalid frame size: {args.size}")
+        return 1
+
+    results = benchmark.run_benchmark(args.frames, args.seed, width, height, args.backend)
+    print(benchmark.format_results(results))
+
+    if args.output:
+        benchmark.save_results(results, args.output)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        lines, regressions = benchmark.compare_results(results, benchmark.load_results(args.compare))
+        print("\nCompared with " + args.compare)
+        print("\n".join(lines))
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+def run_soak(args):
+    """Run the memory soak test on a synthetic camera."""
+    from src import soak
+
+    try:
+        width, height = (int(v) for v in args.size.lower().split('x'))
+        duration = soak.parse_duration(args.duration)
+        warmup = soak.parse_duration(args.warmup)
+        interval = soak.parse_duration(args.interval)
+    except ValueError as e:
+        print(f"Invalid soak option: {e}")
+        return 1
+
+    return soak.run_soak(duration, int(args.max_growth_mb * 1024 * 1024), warmup, interval, width, height,
+                cards=args.cards, log_path=args.log, show=args.show)
+
+
+def run_scan(args):
+    """Print scanned codes from QRScanner.stream() until stopped."""
+    import asyncio
+    from src.scanner import QRScanner
+
+    config = Config()
+    scanner = QRScanner()
+    scanner.apply_settings(config)
+    if args.replay:
+        opened = scanner.start_replay(args.replay, args.replay_speed)
+    else:
+        opened = scanner.start_camera(config.camera_index if args.camera is None else args.camera)
+    if not opened:
+        return 1
+
+    async def consume():
+        count = 0
+        async for code in scanner.stream(timeout=args.timeout, unique=not args.all):
+            print(code, flush=True)
+            count += 1
+            if args.count and count >= args.count:
+                break
+
+    try:
+        asyncio.run(consume())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scanner.stop_camera()
+    return 0
+
+
+def run_mock_server(args):
+    """Serve the mock redemption service until interrupted."""
+    from src.mockservice import MockRedemptionService
+
+    try:
+        service = MockRedemptionService(port=args.port, **_service_options(args))
+    except OSError as e:
+        print(f"Error starting mock service: {e}")
+        return 1
+
+    print(f"Mock redemption service on {service.url} (Ctrl+C to stop)")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+    print(", ".join(f"{name} {count}" for name, count in service.stats.items()))
+    return 0
+
+
+def run_collect(args):
+    """Serve the multi-station collector until interrupted."""
+    from src.collector import CodeIndex, CollectorService, COLLECTOR_INDEX_FILE, is_loopback
+
+    # Without a token any computer on the network could write to the index
+    if not args.token and not is_loopback(args.host):
+        print(f"Error starting collector: --token is required when listening on {args.host} "
+              f"(use --host 127.0.0.1 for stations on this computer only)")
+        return 1
+
+    index = CodeIndex(args.index or Config().data_path(COLLECTOR_INDEX_FILE))
+    try:
+        service = CollectorService(index, args.host, args.port, args.token)
+    except OSError as e:
+        print(f"Error starting collector: {e}")
+        index.close()
+        return 1
+
+    print(f"Collector on {service.url} with {len(index)} codes indexed (Ctrl+C to stop)")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        index.close()
+    print(", ".join(f"{name} {count}" for name, count in service.stats.items()))
+    return 0
+
+
+def run_archive(args):
+    """Add codes to, check codes against or describe the code archive."""
+    import time
+    from src.archive import CodeArchive, ARCHIVE_FILE
+
+    path = args.archive or Config().data_path(ARCHIVE_FILE)
+    if args.action != 'stats' and not args.files:
+        print(f"archive {args.action} needs at least one file of codes")
+        return 1
+
+    try:
+        archive = CodeArchive.load(path) if os.path.exists(path) else CodeArchive()
+        codes = []
+        for file_path in args.files:
+            with open(file_path, encoding='utf-8') as f:
+                codes.extend(line.strip() for line in f if line.strip())
+    except (OSError, ValueError) as e:
+        print(f"Error reading codes: {e}")
+        return 1
+
+    started = time.perf_counter()
+    if args.action == 'add':
+        added = CodeArchive.from_codes(codes)
+        merged = archive.union(added)
+        try:
+            merged.save(path)
+        except OSError as e:
+            print(f"Error saving archive: {e}")
+            return 1
+        print(f"Archived {len(merged) - len(archive)} new codes of {len(codes)} "
+              f"in {(time.perf_counter() - started) * 1000:.0f} ms; {len(merged)} codes in {path}")
+        if added.rejected:
+            print(f"Skipped {added.rejected} lines that are not TCG codes")
+        return 0
+
+    if args.action == 'check':
+        archived, valid = archive.lookup(codes)
+        new_codes = list(dict.fromkeys(code for code, seen, ok in zip(codes, archived, valid) if ok and not seen))
+        print(f"{int(archived.sum())} of {len(codes)} codes are archived already, {len(new_codes)} are not "
+              f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+        if not valid.all():
+            print(f"Skipped {int((~valid).sum())} lines that are not TCG codes")
+        if args.output:
+            try:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    f.writelines(f"{code}\n" for code in new_codes)
+            except OSError as e:
+                print(f"Error writing codes: {e}")
+                return 1
+            print(f"Codes not archived yet written to {args.output}")
+        return 0
+
+    print(f"{len(archive)} codes in {path}, {archive.nbytes() / (1024 * 1024):.1f} MB in memory")
+    return 0
+
+
+def run_loadtest(args):
+    """Run the redemption load test."""
+    import json
+    from src import loadtest
+    from src.redemption import RedemptionError
+
+    try:
+        results = loadtest.run_load_test(args.codes, args.accounts, args.concurrency, args.rate, args.url,
+                                         args.seed, _service_options(args))
+    except RedemptionError as e:
+        print(f"Error running load test: {e}")
+        return 1
+
+    print(loadtest.format_load_test(results))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
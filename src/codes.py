@@ -0,0 +1,220 @@
+import sys
+import uuid
+
+BLOCK_SIZE = 10
+
+# Display formats offered by the format selector
+FORMAT_NUMBERED = "Numbered List"
+FORMAT_RAW = "Raw Codes (One per line)"
+FORMAT_SPACE = "Space-Separated"
+FORMAT_COMMA = "Comma-Separated"
+FORMATS = [FORMAT_NUMBERED, FORMAT_RAW, FORMAT_SPACE, FORMAT_COMMA]
+
+# Markdown-only variant used by file exports
+FORMAT_MD_NUMBERED = "Markdown Numbered List"
+
+# Separator placed between rendered blocks when joining them together
+_BLOCK_SEPARATORS = {
+    FORMAT_NUMBERED: "",
+    FORMAT_MD_NUMBERED: "",
+    FORMAT_RAW: "\n",
+    FORMAT_SPACE: " ",
+    FORMAT_COMMA: ",",
+}
+
+
+def format_codes(codes, format_type, start_idx=0):
+    """
+    Format a list of codes in the given format.
+
+    Args:
+        codes: Codes to format
+        format_type: One of the FORMAT_* constants
+        start_idx: Zero-based position of the first code, used for numbering
+
+    Returns:
+        The formatted text
+    """
+    if format_type == FORMAT_NUMBERED:
+        return "".join([f"{start_idx + i + 1}. {code}\n" for i, code in enumerate(codes)])
+    elif format_type == FORMAT_MD_NUMBERED:
+        return "".join([f"{start_idx + i + 1}. `{code}`\n" for i, code in enumerate(codes)])
+    elif format_type == FORMAT_SPACE:
+        return " ".join(codes)
+    elif format_type == FORMAT_COMMA:
+        return ",".join(codes)
+    else:  # Raw codes, one per line
+        return "\n".join(codes)
+
+
+def block_separator(format_type):
+    """Separator to place between two formatted runs of codes."""
+    return _BLOCK_SEPARATORS.get(format_type, "\n")
+
+
+class CodeFormatter:
+    """
+    Renders blocks of codes as text and caches the result.
+
+    Every (block, format) pair is rendered once with str.join. Adding a code
+    only invalidates the block it lands in, so the "All Codes" text is rebuilt
+    from cached blocks instead of re-formatting the whole session.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._blocks = {}
+        self._all = {}
+
+    def invalidate(self, code_index):
+        """Drop cached text for the block containing the code at code_index."""
+        block_index = code_index // self.store.block_size
+        for format_type in _BLOCK_SEPARATORS:
+            self._blocks.pop((block_index, format_type), None)
+        self._all.clear()
+
+    def clear(self):
+        """Drop every cached rendering."""
+        self._blocks.clear()
+        self._all.clear()
+
+    def render_block(self, block_index, format_type):
+        """
+        Render a single block of codes.
+
+        Args:
+            block_index: Zero-based block number
+            format_type: One of the FORMAT_* constants
+
+        Returns:
+            The formatted text, or an empty string for an empty block
+        """
+        key = (block_index, format_type)
+        text = self._blocks.get(key)
+        if text is None:
+            start_idx = block_index * self.store.block_size
+            text = format_codes(self.store.block(block_index), format_type, start_idx)
+            self._blocks[key] = text
+        return text
+
+    def render_all(self, format_type):
+        """Render every code in the store, reusing cached block text."""
+        text = self._all.get(format_type)
+        if text is None:
+            text = block_separator(format_type).join(
+                self.render_block(i, format_type) for i in range(self.store.block_count())
+            )
+            self._all[format_type] = text
+        return text
+
+    def nbytes(self):
+        """Approximate memory held by the cached renderings."""
+        cached = list(self._blocks.values()) + list(self._all.values())
+        return sum(sys.getsizeof(text) for text in cached)
+
+
+class CodeStore:
+    """Ordered, de-duplicated collection of the codes found in a session."""
+
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self._codes = []
+        self._index = {}
+        self._code_bytes = 0
+        self.session_id = uuid.uuid4().hex
+        self.formatter = CodeFormatter(self)
+
+    def add(self, code):
+        """
+        Add a code to the store.
+
+        Returns:
+            True if the code was new, False if it was empty or already present
+        """
+        if not code or code in self._index:
+            return False
+        self._index[code] = len(self._codes)
+        self._codes.append(code)
+        self._code_bytes += sys.getsizeof(code)
+        self.formatter.invalidate(len(self._codes) - 1)
+        return True
+
+    def clear(self):
+        """Remove every code."""
+        self._codes = []
+        self._index = {}
+        self._code_bytes = 0
+        self.session_id = uuid.uuid4().hex
+        self.formatter.clear()
+
+    def nbytes(self):
+        """Approximate memory held by the codes, their index and the formatter cache."""
+        return (self._code_bytes + sys.getsizeof(self._codes) + sys.getsizeof(self._index)
+                + self.formatter.nbytes())
+
+    def block_count(self):
+        """Number of blocks needed to hold every code."""
+        return (len(self._codes) + self.block_size - 1) // self.block_size
+
+    def block(self, block_index):
+        """Return the codes in the given block."""
+        start_idx = block_index * self.block_size
+        return self._codes[start_idx:start_idx + self.block_size]
+
+    def block_range(self, block_index):
+        """Return the 1-based (first, last) code numbers covered by a block."""
+        start_idx = block_index * self.block_size
+        return start_idx + 1, min(start_idx + self.block_size, len(self._codes))
+
+    def position(self, code):
+        """Return the zero-based position of a code, or None if it is not in the store."""
+        return self._index.get(code)
+
+    def page(self, offset, limit=None):
+        """
+        Return a consistent page of the store for readers on other threads.
+
+        Args:
+            offset: Index of the first code
+            limit: Maximum number of codes, or None for all from offset
+
+        Returns:
+            Tuple of (session id, total number of codes, list of codes)
+        """
+        codes = self._codes
+        end = len(codes) if limit is None else offset + limit
+        return self.session_id, len(codes), codes[offset:end]
+
+    def codes_since(self, position):
+        """Return the codes added after the first `position` codes."""
+        return self._codes[position:]
+
+    def iter_chunks(self, chunk_size, count=None):
+        """
+        Yield successive lists of codes without copying the whole store.
+
+        Args:
+            chunk_size: Maximum number of codes per chunk
+            count: Stop after this many codes (defaults to the current size)
+
+        Yields:
+            Tuples of (start index, list of codes)
+        """
+        # Hold on to the current list so a concurrent clear() cannot affect us
+        codes = self._codes
+        if count is None:
+            count = len(codes)
+        for start_idx in range(0, count, chunk_size):
+            yield start_idx, codes[start_idx:min(start_idx + chunk_size, count)]
+
+    def __len__(self):
+        return len(self._codes)
+
+    def __iter__(self):
+        return iter(self._codes)
+
+    def __contains__(self, code):
+        return code in self._index
+
+    def __getitem__(self, index):
+        return self._codes[index]
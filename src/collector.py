@@ -0,0 +1,487 @@
+import json
+import time
+import hmac
+import sqlite3
+import threading
+from collections import deque
+
+from src.redemption_queue import backoff_delay
+
+# Database next to config.json holding every code a collector has received
+COLLECTOR_INDEX_FILE = 'collector_index.db'
+
+# Database next to config.json holding the codes a station has not delivered yet
+UPLINK_QUEUE_FILE = 'uplink_queue.db'
+
+# Port a collector listens on by default
+COLLECTOR_PORT = 8770
+
+# Most codes a station sends in one request. Codes queue up while a
+# request is out, so a busy station sends larger batches on its own.
+UPLINK_BATCH_SIZE = 500
+
+# Per-code answers of a collector: first sighting anywhere, already seen by
+# another station or an earlier session, or sent again by the same session
+SEEN_NEW = 'new'
+SEEN_DUPLICATE = 'seen'
+SEEN_REPEAT = 'repeat'
+
+SEEN_LABELS = {
+    SEEN_DUPLICATE: "Already seen",
+}
+
+# SQLite limits the number of parameters in one statement
+_LOOKUP_CHUNK = 500
+
+
+class CollectorError(Exception):
+    """Raised when a collector cannot be reached or rejects a request."""
+
+
+def is_loopback(host):
+    """Whether `host` only accepts connections from this computer."""
+    import ipaddress
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class CodeIndex:
+    """
+    Persistent index of every code received from every station, keyed by code.
+
+    Each code keeps the station and session that sent it first and when,
+    so a later sighting can be answered with where the card was scanned.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS codes (
+                code TEXT PRIMARY KEY,
+                station TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                first_seen REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._db.commit()
+
+    def claim(self, codes, station, session_id, now=None):
+        """
+        Record a batch of codes from a station, keeping the first sighting of each.
+
+        The whole batch is looked up and inserted in one transaction.
+
+        Returns:
+            List of result dicts with 'code', 'status' (SEEN_NEW, SEEN_DUPLICATE
+            or SEEN_REPEAT), 'station' and 'first_seen' of the first sighting
+        """
+        now = time.time() if now is None else now
+        codes = list(dict.fromkeys(code for code in codes if code))
+        known = {}
+        with self._lock, self._db:
+            for start in range(0, len(codes), _LOOKUP_CHUNK):
+                chunk = codes[start:start + _LOOKUP_CHUNK]
+                rows = self._db.execute(
+                    f"SELECT code, station, session_id, first_seen FROM codes "
+                    f"WHERE code IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                )
+                for code, first_station, first_session, first_seen in rows:
+                    known[code] = (first_station, first_session, first_seen)
+            self._db.executemany(
+                "INSERT INTO codes VALUES (?, ?, ?, ?)",
+                [(code, station, session_id, now) for code in codes if code not in known]
+            )
+
+        results = []
+        for code in codes:
+            if code not in known:
+                results.append({'code': code, 'status': SEEN_NEW, 'station': station, 'first_seen': now})
+                continue
+            first_station, first_session, first_seen = known[code]
+            repeat = first_station == station and first_session == session_id
+            results.append({
+                'code': code,
+                'status': SEEN_REPEAT if repeat else SEEN_DUPLICATE,
+                'station': first_station,
+                'first_seen': first_seen,
+            })
+        return results
+
+    def station_counts(self):
+        """Return the number of codes each station saw first."""
+        with self._lock:
+            return dict(self._db.execute("SELECT station, COUNT(*) FROM codes GROUP BY station"))
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM codes").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class UplinkQueue:
+    """
+    Persistent queue of the codes a station still has to send, backed by SQLite.
+
+    A code is stored when it is accepted and removed once the collector has
+    answered for it, so codes scanned while the collector is unreachable are
+    sent after a restart instead of being lost with the process.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS pending (
+                code TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                added REAL NOT NULL,
+                UNIQUE (code, session_id)
+            )
+        """)
+        self._db.commit()
+
+    def add(self, codes, session_id):
+        """Store codes of a session that are not queued yet."""
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO pending (code, session_id, added) VALUES (?, ?, ?)",
+                [(code, session_id, now) for code in codes]
+            )
+
+    def remove(self, codes, session_id):
+        """Forget codes the collector has answered for."""
+        with self._lock, self._db:
+            self._db.executemany(
+                "DELETE FROM pending WHERE code = ? AND session_id = ?",
+                [(code, session_id) for code in codes]
+            )
+
+    def load(self):
+        """Return every queued (code, session_id) pair in the order they were added."""
+        with self._lock:
+            return self._db.execute("SELECT code, session_id FROM pending ORDER BY rowid").fetchall()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class CollectorService:
+    """
+    Central collector merging the codes of several scanning stations.
+
+    Stations send the codes they accept as they go:
+
+        POST /codes  {"station", "session_id", "codes": [...]}
+                     ->  {"results": [{"code", "status", "station", "first_seen"}]}
+        GET  /stats  ->  {"codes", "stations": {station: codes}, ...}
+
+    Every code is checked against the persistent CodeIndex, so a card
+    scanned at two stations, or again after a restart, is answered with
+    SEEN_DUPLICATE and where it was first seen. When `token` is set,
+    requests must carry it as a Bearer authorization header.
+
+    Args:
+        index: CodeIndex to record codes in
+        host: Address to listen on; '0.0.0.0' accepts stations on the LAN
+        port: Port to listen on, 0 for any free port
+        token: Shared secret stations must send, or None to accept any request
+    """
+
+    def __init__(self, index, host='0.0.0.0', port=COLLECTOR_PORT, token=None):
+        self.index = index
+        self.token = token
+        self.stats = {'requests': 0, 'codes': 0, 'new': 0, 'duplicates': 0, 'rejected': 0}
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # Imported here so stations, which only use the client, never load the server
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Answer each POST at once instead of waiting on Nagle and delayed ACKs
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if not service.authorized(self.headers.get('Authorization', "")):
+                    self._send_json(401, {'error': "Unauthorized"})
+                elif self.path == '/stats':
+                    self._send_json(200, service.report())
+                else:
+                    self._send_json(404, {'error': "Not found"})
+
+            def do_POST(self):
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                except ValueError:
+                    body = None
+                if not service.authorized(self.headers.get('Authorization', "")):
+                    self._send_json(401, {'error': "Unauthorized"})
+                elif not isinstance(body, dict):
+                    self._send_json(400, {'error': "Invalid JSON"})
+                elif self.path == '/codes':
+                    self._send_json(*service.receive(body))
+                else:
+                    self._send_json(404, {'error': "Not found"})
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests from a background thread."""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="collector", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve requests on the calling thread until interrupted."""
+        self.server.serve_forever()
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+
+    def authorized(self, header):
+        if not self.token:
+            return True
+        if hmac.compare_digest(header.encode(), f"Bearer {self.token}".encode()):
+            return True
+        with self._lock:
+            self.stats['rejected'] += 1
+        return False
+
+    def receive(self, body):
+        """
+        Record a batch from a station.
+
+        Returns:
+            Tuple of (HTTP status, JSON payload)
+        """
+        station = body.get('station')
+        codes = body.get('codes')
+        if not isinstance(station, str) or not station or not isinstance(codes, list) or \
+                not all(isinstance(code, str) for code in codes):
+            return 400, {'error': "Expected a station name and a list of codes"}
+
+        results = self.index.claim(codes, station, str(body.get('session_id', "")))
+        new = sum(result['status'] == SEEN_NEW for result in results)
+        duplicates = sum(result['status'] == SEEN_DUPLICATE for result in results)
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['codes'] += len(results)
+            self.stats['new'] += new
+            self.stats['duplicates'] += duplicates
+        return 200, {'results': results}
+
+    def report(self):
+        """Totals for /stats."""
+        with self._lock:
+            stats = dict(self.stats)
+        stats.update(codes_indexed=len(self.index), stations=self.index.station_counts())
+        return stats
+
+
+class CollectorClient:
+    """
+    HTTP client a station uses to send its codes to a collector.
+
+    Requests share one keep-alive session, so a busy station does not pay
+    for a new connection per batch.
+    """
+
+    def __init__(self, base_url, station, token=None, timeout=10.0):
+        self.base_url = base_url.rstrip('/')
+        self.station = station
+        self.timeout = timeout
+        # requests is imported here, so the app only loads it once a collector is configured
+        import requests
+        self.session = requests.Session()
+        if token:
+            self.session.headers['Authorization'] = f"Bearer {token}"
+
+    def submit(self, codes, session_id):
+        """
+        Send one batch of codes.
+
+        Returns:
+            List of result dicts with 'code', 'status', 'station' and 'first_seen'
+        """
+        import requests
+        try:
+            response = self.session.post(
+                f"{self.base_url}/codes",
+                json={'station': self.station, 'session_id': session_id, 'codes': list(codes)},
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise CollectorError(f"Could not reach the collector: {e}")
+
+        if response.status_code == 401:
+            raise CollectorError("The collector rejected this station's token")
+        if not response.ok:
+            raise CollectorError(f"Collector request failed with HTTP {response.status_code}")
+        try:
+            return response.json()['results']
+        except (ValueError, KeyError):
+            raise CollectorError("Malformed response from the collector")
+
+    def close(self):
+        """Close the pooled connection."""
+        self.session.close()
+
+
+class StationUplink:
+    """
+    Sends a station's accepted codes to a collector in the background.
+
+    push() only queues codes, so scanning never waits on the network.
+    run() sends whatever has queued up in one request, at most
+    UPLINK_BATCH_SIZE codes: one code at a time while scanning is slow,
+    large batches when codes arrive faster than a round trip. A failed
+    batch stays queued and is retried with backoff, so codes scanned
+    while the collector is unreachable are sent once it is back. With a
+    `queue`, codes not yet delivered also survive a restart and are sent
+    first on the next start.
+
+    Args:
+        client: CollectorClient to send with
+        queue: Optional UplinkQueue keeping undelivered codes on disk
+        batch_size: Most codes per request
+    """
+
+    def __init__(self, client, queue=None, batch_size=UPLINK_BATCH_SIZE):
+        self.client = client
+        self.queue = queue
+        self.batch_size = batch_size
+        self._pending = deque(queue.load() if queue is not None else ())
+        # Every code not delivered yet, including a batch being sent
+        self._undelivered = set(self._pending)
+        self._ready = threading.Condition()
+        self.stats = {'sent': 0, 'new': 0, 'duplicates': 0, 'failures': 0}
+
+    def push(self, codes, session_id):
+        """Queue accepted codes of a session to be sent, skipping those already queued."""
+        with self._ready:
+            items = [(code, session_id) for code in codes if (code, session_id) not in self._undelivered]
+            if not items:
+                return
+            if self.queue is not None:
+                self.queue.add([code for code, _ in items], session_id)
+            self._undelivered.update(items)
+            self._pending.extend(items)
+            self._ready.notify()
+
+    def pending(self):
+        return len(self._pending)
+
+    def wake(self):
+        """Interrupt a wait in run(), e.g. after its stop event was set."""
+        with self._ready:
+            self._ready.notify()
+
+    def _take(self, stop):
+        """Wait for queued codes and take a batch belonging to one session."""
+        with self._ready:
+            while not self._pending and not stop.is_set():
+                self._ready.wait()
+            if stop.is_set():
+                return None, []
+            session_id = self._pending[0][1]
+            batch = []
+            while self._pending and len(batch) < self.batch_size and self._pending[0][1] == session_id:
+                batch.append(self._pending.popleft()[0])
+            return session_id, batch
+
+    def _requeue(self, batch, session_id):
+        with self._ready:
+            self._pending.extendleft((code, session_id) for code in reversed(batch))
+
+    def run(self, stop, on_result=None):
+        """
+        Send queued codes until `stop` is set.
+
+        Args:
+            stop: threading.Event ending the loop
+            on_result: Called with each result dict the collector returns
+        """
+        failures = 0
+        while True:
+            session_id, batch = self._take(stop)
+            if not batch:
+                return
+            try:
+                results = self.client.submit(batch, session_id)
+            except CollectorError as e:
+                # Report an outage once, not on every retry
+                if not failures:
+                    print(f"Error sending codes to the collector: {e}")
+                self._requeue(batch, session_id)
+                failures += 1
+                self.stats['failures'] += 1
+                if stop.wait(backoff_delay(failures)):
+                    return
+                continue
+
+            failures = 0
+            with self._ready:
+                self._undelivered.difference_update((code, session_id) for code in batch)
+                if self.queue is not None:
+                    self.queue.remove(batch, session_id)
+            self.stats['sent'] += len(batch)
+            for result in results:
+                if result.get('status') == SEEN_NEW:
+                    self.stats['new'] += 1
+                elif result.get('status') == SEEN_DUPLICATE:
+                    self.stats['duplicates'] += 1
+                if on_result is not None:
+                    on_result(result)
+
+    def close(self):
+        self.client.close()
+        if self.queue is not None:
+            self.queue.close()
+
+
+def describe_sighting(result):
+    """Tooltip text saying where and when a duplicate code was first scanned."""
+    first_seen = time.strftime('%Y-%m-%d %H:%M', time.localtime(result.get('first_seen') or 0))
+    return f"First scanned at {result.get('station') or 'another station'} on {first_seen}"
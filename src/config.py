@@ -1,5 +1,51 @@
 import os
 import json
+import tempfile
+import threading
+
+# Setting key -> (attribute name, JSON key, type converter)
+SETTINGS = {
+    'debug_mode': ('debug_mode', 'debug', bool),
+    'camera_index': ('camera_index', 'camera_index', int),
+    'camera_tuning': ('camera_tuning', 'camera_tuning', bool),
+    'auto_detect': ('auto_detect', 'auto_detect', bool),
+    'scan_interval': ('scan_interval', 'scan_interval', int),
+    'scan_cooldown': ('scan_cooldown', 'scan_cooldown', float),
+    'cooldown_capacity': ('cooldown_capacity', 'cooldown_capacity', int),
+    'preprocess_fallback': ('preprocess_fallback', 'preprocess_fallback', bool),
+    'two_stage_decode': ('two_stage_decode', 'two_stage_decode', bool),
+    'show_hud': ('show_hud', 'show_hud', bool),
+    'metrics_log': ('metrics_log', 'metrics_log', bool),
+    'profile_duration': ('profile_duration', 'profile_duration', int),
+    'profile_on_start': ('profile_on_start', 'profile_on_start', bool),
+    'username': ('username', 'username', str),
+    'password': ('password', 'password', str),
+    'redemption_url': ('redemption_url', 'redemption_url', str),
+    'redemption_concurrency': ('redemption_concurrency', 'redemption_concurrency', int),
+    'redemption_rate': ('redemption_rate', 'redemption_rate', float),
+    'redemption_accounts': ('redemption_accounts', 'redemption_accounts', list),
+    'thread_budget': ('thread_budget', 'thread_budget', int),
+    'opencv_threads': ('opencv_threads', 'opencv_threads', int),
+    'decode_workers': ('decode_workers', 'decode_workers', int),
+    'pin_threads': ('pin_threads', 'pin_threads', bool),
+    'event_server': ('event_server', 'event_server', bool),
+    'event_port': ('event_port', 'event_port', int),
+    'collector_url': ('collector_url', 'collector_url', str),
+    'station_name': ('station_name', 'station_name', str),
+    'collector_token': ('collector_token', 'collector_token', str),
+}
+
+# Settings that need the camera device to be reopened to take effect
+DEVICE_SETTINGS = {'camera_index'}
+
+# Settings that make up the thread budget, applied together
+THREAD_SETTINGS = {'thread_budget', 'opencv_threads', 'decode_workers', 'pin_threads'}
+
+# Settings of the local scan event service, which restarts when they change
+EVENT_SETTINGS = {'event_server', 'event_port'}
+
+# Settings of the connection to a multi-station collector, which reconnects when they change
+COLLECTOR_SETTINGS = {'collector_url', 'station_name', 'collector_token'}
 
 class Config:
     def __init__(self):
@@ -7,85 +53,153 @@ class Config:
         self.defaults = {
             "debug": False,
             "camera_index": 0,
+            "camera_tuning": False,
             "auto_detect": True,
             "scan_interval": 350,
-            "scan_cooldown": 1.5
+            "scan_cooldown": 1.5,
+            "cooldown_capacity": 256,
+            "preprocess_fallback": True,
+            "two_stage_decode": True,
+            "show_hud": False,
+            "metrics_log": False,
+            "profile_duration": 60,
+            "profile_on_start": False,
+            "username": "",
+            "password": "",
+            "redemption_url": "",
+            "redemption_concurrency": 4,
+            "redemption_rate": 1.0,
+            "redemption_accounts": [],
+            "thread_budget": 0,
+            "opencv_threads": -1,
+            "decode_workers": 1,
+            "pin_threads": False,
+            "event_server": False,
+            "event_port": 8766,
+            "collector_url": "",
+            "station_name": "",
+            "collector_token": ""
         }
-        
+
+        # Delay used to coalesce several setting changes into one save
+        self.save_delay = 0.5
+        self._save_timer = None
+        self._save_lock = threading.Lock()
+
         # Load settings from config file if it exists
         self.config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
         self.load_config()
-        
+
+    def data_path(self, filename):
+        """Path of an application data file stored next to config.json."""
+        return os.path.join(os.path.dirname(self.config_path), filename)
+
     def load_config(self):
         """Load configuration from JSON file or use defaults"""
         try:
             if os.path.exists(self.config_path):
                 with open(self.config_path, 'r') as f:
                     config_data = json.load(f)
-                    
+
                 # Set configuration from file, with fallback to defaults
-                self.debug_mode = config_data.get('debug', self.defaults['debug'])
-                self.camera_index = config_data.get('camera_index', self.defaults['camera_index'])
-                self.auto_detect = config_data.get('auto_detect', self.defaults['auto_detect'])
-                self.scan_interval = config_data.get('scan_interval', self.defaults['scan_interval'])
-                self.scan_cooldown = config_data.get('scan_cooldown', self.defaults['scan_cooldown'])
+                self._apply_data(config_data)
             else:
                 # Use defaults and create config file
-                self.debug_mode = self.defaults['debug']
-                self.camera_index = self.defaults['camera_index']
-                self.auto_detect = self.defaults['auto_detect']
-                self.scan_interval = self.defaults['scan_interval']
-                self.scan_cooldown = self.defaults['scan_cooldown']
+                self._apply_data({})
                 self.save_config()
         except Exception as e:
             print(f"Error loading configuration: {e}")
             # Use defaults as fallback
-            self.debug_mode = self.defaults['debug']
-            self.camera_index = self.defaults['camera_index']
-            self.auto_detect = self.defaults['auto_detect']
-            self.scan_interval = self.defaults['scan_interval']
-            self.scan_cooldown = self.defaults['scan_cooldown']
-                
-    def update_setting(self, key, value):
+            self._apply_data({})
+
+    def _apply_data(self, config_data):
+        """Set every attribute from loaded JSON data, falling back to defaults."""
+        for attribute, json_key, _ in SETTINGS.values():
+            setattr(self, attribute, config_data.get(json_key, self.defaults[json_key]))
+
+    def update_setting(self, key, value, save=True):
         """
         Update a configuration setting.
-        
+
         Args:
             key: Setting key
             value: Setting value
+            save: Schedule a save of the configuration file
+
+        Returns:
+            True if the key is a known setting, False otherwise
         """
-        # Camera settings
-        if key == 'camera_index':
-            self.camera_index = int(value)
-        # App settings
-        elif key == 'debug_mode':
-            self.debug_mode = bool(value)
-        # Auto detection settings 
-        elif key == 'auto_detect':
-            self.auto_detect = bool(value)
-        elif key == 'scan_interval':
-            self.scan_interval = int(value)
-        elif key == 'scan_cooldown':
-            self.scan_cooldown = float(value)
-        else:
+        if key not in SETTINGS:
             return False
-            
+
+        attribute, _, convert = SETTINGS[key]
+        setattr(self, attribute, convert(value))
+
         # Save the updated configuration
-        self.save_config()
+        if save:
+            self.schedule_save()
         return True
-    
+
+    def update_settings(self, settings):
+        """
+        Update several settings at once and save them in a single write.
+
+        Args:
+            settings: Dict of setting key -> value
+
+        Returns:
+            Set of keys whose value actually changed
+        """
+        changed = set()
+        for key, value in settings.items():
+            attribute = SETTINGS[key][0] if key in SETTINGS else None
+            old_value = getattr(self, attribute, None) if attribute else None
+            if self.update_setting(key, value, save=False) and getattr(self, attribute) != old_value:
+                changed.add(key)
+
+        if changed:
+            self.schedule_save()
+        return changed
+
+    def schedule_save(self):
+        """Save the configuration after a short delay, coalescing repeated changes."""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Write any pending configuration changes immediately."""
+        with self._save_lock:
+            if self._save_timer is None:
+                return
+            self._save_timer.cancel()
+            self._save_timer = None
+        self.save_config()
+
     def save_config(self):
         """Save current configuration to JSON file"""
         config_data = {
-            'debug': self.debug_mode,
-            'camera_index': self.camera_index,
-            'auto_detect': self.auto_detect,
-            'scan_interval': self.scan_interval,
-            'scan_cooldown': self.scan_cooldown
+            json_key: getattr(self, attribute)
+            for attribute, json_key, _ in SETTINGS.values()
         }
-        
+
         try:
-            with open(self.config_path, 'w') as f:
-                json.dump(config_data, f, indent=2)
+            # Write to a temporary file and rename it so the config is never half-written
+            fd, temp_path = tempfile.mkstemp(prefix='.config.', suffix='.tmp',
+                                             dir=os.path.dirname(self.config_path))
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(config_data, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                # Owner-only, as the file can hold the Trainer Club password
+                os.chmod(temp_path, 0o600)
+                os.replace(temp_path, self.config_path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
         except Exception as e:
-            print(f"Error saving configuration: {e}") 
\ No newline at end of file
+            print(f"Error saving configuration: {e}")
@@ -0,0 +1,66 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class CodeCooldown:
+    """
+    Per-code cooldown: an LRU cache of recently accepted codes with a time-to-live.
+
+    A code seen again within `ttl` seconds of its last sighting is a hit
+    and should be suppressed; any other code is a miss and is accepted at
+    once. Every sighting restarts the code's cooldown. At most `capacity`
+    codes are remembered, the least recently seen being evicted first.
+    """
+
+    def __init__(self, ttl=1.5, capacity=256):
+        self.ttl = ttl
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0}
+
+    def configure(self, ttl, capacity):
+        """Change the time-to-live and capacity, evicting codes over the new capacity."""
+        with self._lock:
+            self.ttl = ttl
+            self.capacity = capacity
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.stats['evicted'] += 1
+
+    def check(self, code, now=None):
+        """
+        Record a sighting of a code.
+
+        Returns:
+            True if the code is cooling down and should be suppressed
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            last_seen = self._entries.pop(code, None)
+            self._entries[code] = now
+            if last_seen is not None and now - last_seen < self.ttl:
+                self.stats['hits'] += 1
+                return True
+            if last_seen is not None:
+                self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            self._evict()
+            return False
+
+    def hit_rate(self):
+        """Share of sightings that were suppressed."""
+        total = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / total if total else 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Forget every code; the statistics are kept."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,209 @@
+import cv2
+import numpy as np
+
+# Characters used in Pokémon TCG redemption codes
+CODE_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+# Group lengths of a TCG code, e.g. ABC-DEFG-HIJ-KLM
+CODE_GROUPS = (3, 4, 3, 3)
+
+# Distortions applied by the corpus, one condition per frame
+CONDITIONS = ['clean', 'blur', 'noise', 'rotation', 'perspective', 'glare', 'small', 'mixed', 'empty']
+
+
+def random_tcg_code(rng):
+    """Generate a random code in the TCG redemption format."""
+    groups = []
+    for length in CODE_GROUPS:
+        groups.append("".join(rng.choice(list(CODE_ALPHABET), size=length)))
+    return "-".join(groups)
+
+
+def render_qr(payload, module_size):
+    """Render a QR code with a four-module quiet zone at the given module size."""
+    encoder = cv2.QRCodeEncoder.create()
+    qr = encoder.encode(payload)
+    qr = cv2.copyMakeBorder(qr, 2, 2, 2, 2, cv2.BORDER_CONSTANT, value=255)
+    return cv2.resize(qr, None, fx=module_size, fy=module_size, interpolation=cv2.INTER_NEAREST)
+
+
+def _background(rng, width, height):
+    """A textured, unevenly lit background resembling a table top."""
+    base = rng.integers(40, 180, size=3)
+    small = rng.integers(0, 60, size=(height // 16 + 1, width // 16 + 1, 3)).astype(np.uint8)
+    texture = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+    gradient = np.linspace(0.7, 1.2, width, dtype=np.float32)[None, :, None]
+    frame = (base[None, None, :] + texture) * gradient
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def _card(qr, rng):
+    """Place a QR code on a slightly off-white code card."""
+    margin = qr.shape[0] // 3
+    card = np.full((qr.shape[0] + 2 * margin, qr.shape[1] + 2 * margin * 2), 235, np.uint8)
+    card[:] = rng.integers(215, 250)
+    x = margin * 2
+    card[margin:margin + qr.shape[0], x:x + qr.shape[1]] = np.minimum(qr, card[margin:margin + qr.shape[0], x:x + qr.shape[1]])
+    return cv2.cvtColor(card, cv2.COLOR_GRAY2BGR)
+
+
+def _composite(frame, card, rng, angle=0.0, perspective=0.0, scale=1.0):
+    """Warp a card onto the frame with rotation, perspective and scale."""
+    height, width = frame.shape[:2]
+    ch, cw = card.shape[:2]
+    src = np.float32([[0, 0], [cw, 0], [cw, ch], [0, ch]])
+
+    # Card corners centred on a random point, then rotated and jittered
+    w, h = cw * scale, ch * scale
+    cx = rng.uniform(w / 2 + 10, max(w / 2 + 11, width - w / 2 - 10))
+    cy = rng.uniform(h / 2 + 10, max(h / 2 + 11, height - h / 2 - 10))
+    corners = np.float32([[-w / 2, -h / 2], [w / 2, -h / 2], [w / 2, h / 2], [-w / 2, h / 2]])
+    theta = np.deg2rad(angle)
+    rotation = np.float32([[np.cos(theta), -np.sin(theta)], [np.sin(theta), np.cos(theta)]])
+    corners = corners @ rotation.T
+    corners += rng.uniform(-perspective, perspective, size=corners.shape) * min(w, h)
+    dst = (corners + np.float32([cx, cy])).astype(np.float32)
+
+    matrix = cv2.getPerspectiveTransform(src, dst)
+    warped = cv2.warpPerspective(card, matrix, (width, height))
+    mask = cv2.warpPerspective(np.full((ch, cw), 255, np.uint8), matrix, (width, height))
+    frame[mask > 0] = warped[mask > 0]
+    return frame
+
+
+def _glare(frame, rng, strength):
+    """Add a soft elliptical specular highlight."""
+    height, width = frame.shape[:2]
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    cx, cy = rng.uniform(0.3, 0.7) * width, rng.uniform(0.3, 0.7) * height
+    sx, sy = rng.uniform(0.08, 0.2) * width, rng.uniform(0.05, 0.15) * height
+    highlight = np.exp(-(((xx - cx) / sx) ** 2 + ((yy - cy) / sy) ** 2)) * 255 * strength
+    return np.clip(frame.astype(np.float32) + highlight[:, :, None], 0, 255).astype(np.uint8)
+
+
+def generate_frame(rng, condition, width=1280, height=720):
+    """
+    Generate one synthetic camera frame.
+
+    Args:
+        rng: numpy Generator
+        condition: One of CONDITIONS
+        width: Frame width
+        height: Frame height
+
+    Returns:
+        Tuple of (BGR frame, payload or None for frames without a code)
+    """
+    frame = _background(rng, width, height)
+    if condition == 'empty':
+        return cv2.GaussianBlur(frame, (3, 3), 0), None
+
+    payload = random_tcg_code(rng)
+    module_size = int(rng.integers(2, 4)) if condition == 'small' else int(rng.integers(5, 9))
+    card = _card(render_qr(payload, module_size), rng)
+
+    angle = perspective = 0.0
+    scale = 1.0
+    blur = noise = glare = 0.0
+    if condition in ('rotation', 'mixed'):
+        angle = rng.uniform(-40, 40)
+    if condition in ('perspective', 'mixed'):
+        perspective = rng.uniform(0.05, 0.15)
+    if condition in ('blur', 'mixed'):
+        blur = rng.uniform(1.0, 2.5)
+    if condition in ('noise', 'mixed'):
+        noise = rng.uniform(8, 20)
+    if condition in ('glare', 'mixed'):
+        glare = rng.uniform(0.4, 0.8)
+    if condition == 'mixed':
+        scale = rng.uniform(0.7, 1.3)
+
+    frame = _composite(frame, card, rng, angle, perspective, scale)
+    if glare:
+        frame = _glare(frame, rng, glare)
+    if blur:
+        frame = cv2.GaussianBlur(frame, (0, 0), blur)
+    if noise:
+        frame = np.clip(frame + rng.normal(0, noise, frame.shape), 0, 255).astype(np.uint8)
+    return frame, payload
+
+
+def generate_corpus(count=180, seed=1234, width=1280, height=720, conditions=None):
+    """
+    Generate a deterministic corpus of synthetic frames.
+
+    The same seed always produces the same frames, so results from
+    different runs and machines can be compared.
+
+    Args:
+        count: Number of frames
+        seed: Random seed
+        width: Frame width
+        height: Frame height
+        conditions: Conditions to cycle through (defaults to CONDITIONS)
+
+    Yields:
+        Dicts with 'frame', 'payload' and 'condition'
+    """
+    rng = np.random.default_rng(seed)
+    conditions = conditions or CONDITIONS
+    for i in range(count):
+        condition = conditions[i % len(conditions)]
+        frame, payload = generate_frame(rng, condition, width, height)
+        yield {'frame': frame, 'payload': payload, 'condition': condition}
+
+
+class SyntheticSource:
+    """
+    Endless synthetic camera with the cv2.VideoCapture interface.
+
+    A new card from the corpus generator is shown every `frames_per_card`
+    reads. Payloads repeat after `cards` distinct cards, so a long run
+    reaches a steady number of session codes instead of growing forever.
+    """
+
+    def __init__(self, width=1280, height=720, cards=200, frames_per_card=30, seed=1234):
+        self.width = width
+        self.height = height
+        self.cards = cards
+        self.frames_per_card = frames_per_card
+        self.seed = seed
+        self.frames = 0
+        self._frame = None
+        self._opened = True
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self, image=None):
+        """Return (ok, frame) like cv2.VideoCapture.read(), reusing `image` when given."""
+        if not self._opened:
+            return False, None
+
+        if self.frames % self.frames_per_card == 0:
+            card = (self.frames // self.frames_per_card) % self.cards
+            rng = np.random.default_rng([self.seed, card])
+            condition = CONDITIONS[card % len(CONDITIONS)]
+            self._frame, _ = generate_frame(rng, condition, self.width, self.height)
+        self.frames += 1
+
+        if image is None or image.shape != self._frame.shape:
+            return True, self._frame.copy()
+        np.copyto(image, self._frame)
+        return True, image
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        if prop == cv2.CAP_PROP_FPS:
+            return 30.0
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        self._opened = False
+        self._frame = None
@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import tempfile
+import threading
+import cv2
+from concurrent.futures import ThreadPoolExecutor
+
+# File next to config.json holding the results of previous probes
+PROBE_CACHE_FILE = 'camera_probe.json'
+
+# Highest camera index checked when enumerating devices
+MAX_CAMERA_INDEX = 10
+
+# Resolutions tried on each device, smallest first
+CANDIDATE_RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+
+# Resolution used for scanning when the device supports it
+PREFERRED_RESOLUTION = (1280, 720)
+
+
+def probe_camera(index):
+    """
+    Open a camera and record what it supports.
+
+    Args:
+        index: Camera index
+
+    Returns:
+        Dict describing the device, or None if it could not be opened
+    """
+    cap = cv2.VideoCapture(index)
+    try:
+        if not cap.isOpened():
+            return None
+        return probe_capture(cap, index)
+    finally:
+        cap.release()
+
+
+def probe_capture(cap, index):
+    """
+    Record what an already opened camera supports.
+
+    The capture is left at the last resolution tried, so set the one to
+    scan at afterwards.
+
+    Args:
+        cap: Open cv2.VideoCapture
+        index: Camera index of the capture
+
+    Returns:
+        Dict describing the device, or None if probing failed
+    """
+    try:
+        default = [int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))]
+        resolutions = []
+        for width, height in CANDIDATE_RESOLUTIONS:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            actual = [int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))]
+            if actual not in resolutions:
+                resolutions.append(actual)
+
+        return {
+            'index': index,
+            'backend': cap.getBackendName(),
+            'default_resolution': default,
+            'resolutions': resolutions,
+            'fps': round(cap.get(cv2.CAP_PROP_FPS), 1),
+            'probed': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+    except Exception as e:
+        print(f"Error probing camera {index}: {e}")
+        return None
+
+
+def probe_cameras(indices=None, max_workers=4):
+    """
+    Probe several camera indices in parallel.
+
+    Args:
+        indices: Camera indices to check (defaults to 0..MAX_CAMERA_INDEX)
+        max_workers: Number of devices probed at the same time
+
+    Returns:
+        List of device dicts for the cameras that could be opened
+    """
+    if indices is None:
+        indices = range(MAX_CAMERA_INDEX + 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return [info for info in pool.map(probe_camera, indices) if info]
+
+
+def preferred_resolution(info):
+    """Pick the scanning resolution for a probed device."""
+    if not info or not info.get('resolutions'):
+        return PREFERRED_RESOLUTION
+    resolutions = [tuple(r) for r in info['resolutions']]
+    if PREFERRED_RESOLUTION in resolutions:
+        return PREFERRED_RESOLUTION
+
+    # Otherwise the largest resolution that is not above the preferred one
+    smaller = [r for r in resolutions if r[0] * r[1] <= PREFERRED_RESOLUTION[0] * PREFERRED_RESOLUTION[1]]
+    return max(smaller or resolutions, key=lambda r: r[0] * r[1])
+
+
+def describe_device(info):
+    """Short human-readable description of a probed device."""
+    width, height = preferred_resolution(info)
+    fps = f" @ {info['fps']:g} fps" if info.get('fps') else ""
+    return f"Camera {info['index']} - {width}x{height}{fps} ({info.get('backend', 'unknown')})"
+
+
+class CameraProbeCache:
+    """
+    On-disk cache of probed camera capabilities, keyed by camera index.
+
+    It also keeps the exposure, gain and focus values CameraTuner settled
+    on for each camera, which survive a new enumeration. Probe workers and
+    the GUI thread both write it, so changes and saves are serialised.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.devices = {}
+        self.controls = {}
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        """Load cached probe results, starting empty if unavailable."""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                self.devices = {int(k): v for k, v in data.get('devices', {}).items()}
+                self.controls = {int(k): v for k, v in data.get('controls', {}).items()}
+        except Exception as e:
+            print(f"Error loading camera probe cache: {e}")
+            self.devices = {}
+            self.controls = {}
+
+    def save(self):
+        """Write the cache to disk."""
+        with self._lock:
+            data = {
+                'devices': {str(k): v for k, v in self.devices.items()},
+                'controls': {str(k): v for k, v in self.controls.items()},
+            }
+            try:
+                # Write to a temporary file and rename it so the cache is never half-written
+                fd, temp_path = tempfile.mkstemp(prefix='.camera_probe.', suffix='.tmp',
+                                                 dir=os.path.dirname(os.path.abspath(self.path)))
+                try:
+                    with os.fdopen(fd, 'w') as f:
+                        json.dump(data, f, indent=2)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.chmod(temp_path, 0o644)
+                    os.replace(temp_path, self.path)
+                except BaseException:
+                    os.remove(temp_path)
+                    raise
+            except Exception as e:
+                print(f"Error saving camera probe cache: {e}")
+
+    def get(self, index):
+        """Return the cached info for a camera index, or None."""
+        return self.devices.get(index)
+
+    def update(self, info):
+        """Store the probe result for a single device."""
+        with self._lock:
+            self.devices[info['index']] = info
+            self.save()
+
+    def merge(self, devices):
+        """
+        Add the result of a full enumeration to the cache.
+
+        Devices that were not found keep their entry: a camera that is in
+        use cannot be opened by the probe, but it has not gone away.
+        """
+        with self._lock:
+            self.devices.update((info['index'], info) for info in devices)
+            self.save()
+
+    def get_controls(self, index):
+        """Return the tuned camera controls saved for a camera index, or None."""
+        return self.controls.get(index)
+
+    def set_controls(self, index, controls):
+        """Save tuned camera controls for a camera index."""
+        with self._lock:
+            self.controls[index] = controls
+            self.save()
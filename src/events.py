@@ -0,0 +1,384 @@
+import json
+import time
+import queue
+import base64
+import hashlib
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Port the scan event service listens on by default
+EVENT_PORT = 8766
+
+# Events buffered per client. A client that falls this far behind is
+# disconnected and catches up from the session when it reconnects.
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# Seconds between keep-alive messages on an idle stream
+KEEPALIVE_INTERVAL = 15.0
+
+# Page size of /session when no limit is given, and the largest allowed
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Host names a request may address. Anything else could be a DNS
+# rebinding attack from a web page reaching for the codes.
+LOCAL_HOSTS = {'127.0.0.1', 'localhost', '[::1]'}
+
+_WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+def _host_name(value):
+    """Host name of a Host header or Origin URL, without the port."""
+    if '://' in value:
+        value = urlsplit(value).netloc
+    if value.startswith('['):
+        return value[:value.find(']') + 1]
+    return value.rsplit(':', 1)[0] if ':' in value else value
+
+
+def websocket_frame(payload, opcode=0x1):
+    """Encode an unmasked, unfragmented server-to-client WebSocket frame."""
+    length = len(payload)
+    if length < 126:
+        header = bytes([0x80 | opcode, length])
+    elif length < 65536:
+        header = bytes([0x80 | opcode, 126]) + length.to_bytes(2, 'big')
+    else:
+        header = bytes([0x80 | opcode, 127]) + length.to_bytes(8, 'big')
+    return header + payload
+
+
+def _recv_exactly(sock, count):
+    data = b''
+    while len(data) < count:
+        chunk = sock.recv(count - len(data))
+        if not chunk:
+            raise ConnectionError("WebSocket closed")
+        data += chunk
+    return data
+
+
+def read_websocket_frame(sock):
+    """
+    Read one client-to-server WebSocket frame.
+
+    Returns:
+        Tuple of (opcode, payload bytes)
+    """
+    first, second = _recv_exactly(sock, 2)
+    length = second & 0x7F
+    if length == 126:
+        length = int.from_bytes(_recv_exactly(sock, 2), 'big')
+    elif length == 127:
+        length = int.from_bytes(_recv_exactly(sock, 8), 'big')
+    mask = _recv_exactly(sock, 4) if second & 0x80 else None
+    payload = _recv_exactly(sock, length)
+    if mask:
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return first & 0x0F, payload
+
+
+class ScanEventServer:
+    """
+    Localhost service streaming accepted codes to other programs.
+
+    Endpoints:
+        GET /events   Server-Sent Events, one 'code' event per accepted code
+        GET /ws       The same events as WebSocket text messages
+        GET /session  The current session as JSON, paged with ?offset= and ?limit=
+
+    Every event is a JSON object with 'type' ('code' or 'session'),
+    'session_id', 'index', 'code' and 'timestamp'. A 'session' event
+    means the code list was cleared. Streams take ?since=N to first
+    replay the session's codes from index N. SSE clients reconnecting
+    with a Last-Event-ID header pick up where they left off.
+
+    publish_code() only queues the event for each connected client, so
+    the scan pipeline never waits for a slow reader. The service only
+    listens on the loopback interface and sends no CORS headers.
+
+    Args:
+        store: CodeStore holding the session's codes
+        host: Address to listen on
+        port: Port to listen on, 0 for any free port
+    """
+
+    def __init__(self, store, host='127.0.0.1', port=EVENT_PORT):
+        self.store = store
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stats = {'clients': 0, 'published': 0, 'dropped_clients': 0}
+
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Events are small writes that must reach the client as they happen
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if _host_name(self.headers.get('Host', '')) not in LOCAL_HOSTS:
+                    self._send_json(403, {'error': "Forbidden host"})
+                    return
+                url = urlsplit(self.path)
+                params = parse_qs(url.query)
+                if url.path == '/session':
+                    self._send_json(*service.session_page(params))
+                elif url.path == '/events':
+                    service.stream_sse(self, params)
+                elif url.path == '/ws':
+                    service.stream_websocket(self, params)
+                else:
+                    self._send_json(404, {'error': "Not found"})
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests from a background thread."""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="scan-events", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Disconnect every client, stop serving and close the socket."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            self._disconnect(subscriber)
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+
+    def client_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def _event(self, event_type, code=None, index=None, session_id=None):
+        return {
+            'type': event_type,
+            'session_id': session_id or self.store.session_id,
+            'index': index,
+            'code': code,
+            'timestamp': time.time(),
+        }
+
+    def _offer(self, subscriber, event):
+        try:
+            subscriber.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+    def _disconnect(self, subscriber):
+        """End a client's stream, discarding whatever it has not read yet."""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+        with subscriber.mutex:
+            subscriber.queue.clear()
+        subscriber.put_nowait(None)
+
+    def _publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.stats['published'] += 1
+        for subscriber in subscribers:
+            if not self._offer(subscriber, event):
+                # Too far behind: end its stream so it reconnects and replays from the session
+                self.stats['dropped_clients'] += 1
+                self._disconnect(subscriber)
+
+    def publish_code(self, code, index):
+        """Queue an accepted code for every connected client without waiting for them."""
+        self._publish(self._event('code', code, index))
+
+    def publish_session(self):
+        """Tell clients the code list was cleared and a new session started."""
+        self._publish(self._event('session', index=0))
+
+    def session_page(self, params):
+        """
+        Build a page of the current session.
+
+        Returns:
+            Tuple of (HTTP status, JSON payload)
+        """
+        try:
+            offset = max(int(params.get('offset', ['0'])[0]), 0)
+            limit = min(max(int(params.get('limit', [str(DEFAULT_PAGE_SIZE)])[0]), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            return 400, {'error': "offset and limit must be integers"}
+        session_id, total, codes = self.store.page(offset, limit)
+        return 200, {
+            'session_id': session_id,
+            'total': total,
+            'offset': offset,
+            'limit': limit,
+            'next_offset': offset + len(codes) if offset + len(codes) < total else None,
+            'codes': [{'index': offset + i, 'code': code} for i, code in enumerate(codes)],
+        }
+
+    def _subscribe(self, since):
+        """
+        Register a client and collect the codes it missed.
+
+        The client is registered before the session is read, so no code
+        falls between the replay and the live events.
+
+        Returns:
+            Tuple of (subscriber queue, replay events, index where live events start)
+        """
+        subscriber = queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            self.stats['clients'] += 1
+        if since is None:
+            session_id, total, codes = self.store.session_id, len(self.store), []
+        else:
+            session_id, total, codes = self.store.page(since)
+        replay = [self._event('code', code, since + i, session_id) for i, code in enumerate(codes)]
+        return subscriber, replay, total
+
+    def _unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _events(self, subscriber, replay, live_from):
+        """Yield replayed then live events, or None after each idle keep-alive interval."""
+        yield from replay
+        while True:
+            try:
+                event = subscriber.get(timeout=KEEPALIVE_INTERVAL)
+            except queue.Empty:
+                yield None
+                continue
+            if event is None:
+                return
+            # Codes added while the replay was read arrive live as well
+            if event['type'] == 'code' and event['index'] < live_from:
+                continue
+            live_from = 0
+            yield event
+
+    @staticmethod
+    def _since(params, last_event_id=None):
+        if last_event_id:
+            # SSE ids are "<session id>:<index>" of the last event received
+            session_id, _, index = last_event_id.partition(':')
+            return session_id, int(index) + 1 if index.isdigit() else 0
+        if 'since' in params:
+            try:
+                return None, max(int(params['since'][0]), 0)
+            except ValueError:
+                return None, None
+        return None, None
+
+    def stream_sse(self, handler, params):
+        """Serve /events as a Server-Sent Events stream."""
+        session_id, since = self._since(params, handler.headers.get('Last-Event-ID'))
+        if session_id is not None and session_id != self.store.session_id:
+            # The session the client followed was cleared; send it everything
+            since = 0
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/event-stream')
+        handler.send_header('Cache-Control', 'no-cache')
+        handler.end_headers()
+        handler.close_connection = True
+
+        subscriber, replay, live_from = self._subscribe(since)
+        try:
+            handler.wfile.write(b"retry: 1000\n\n")
+            handler.wfile.flush()
+            for event in self._events(subscriber, replay, live_from):
+                if event is None:
+                    message = ": keep-alive\n\n"
+                else:
+                    # A session event resumes from the start of the new session
+                    index = event['index'] if event['type'] == 'code' else -1
+                    message = (f"id: {event['session_id']}:{index}\n"
+                               f"event: {event['type']}\ndata: {json.dumps(event)}\n\n")
+                handler.wfile.write(message.encode())
+                handler.wfile.flush()
+        except (ConnectionError, OSError):
+            # The client went away
+            pass
+        finally:
+            self._unsubscribe(subscriber)
+
+    def stream_websocket(self, handler, params):
+        """Serve /ws as a WebSocket sending one text message per event."""
+        key = handler.headers.get('Sec-WebSocket-Key')
+        if handler.headers.get('Upgrade', '').lower() != 'websocket' or not key:
+            handler._send_json(400, {'error': "Expected a WebSocket upgrade"})
+            return
+        # Browsers send the page's origin; refuse pages from anywhere but this machine
+        origin = handler.headers.get('Origin')
+        if origin and origin != 'null' and _host_name(origin) not in LOCAL_HOSTS:
+            handler._send_json(403, {'error': "Forbidden origin"})
+            return
+
+        accept = base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode()).digest()).decode()
+        handler.send_response(101)
+        handler.send_header('Upgrade', 'websocket')
+        handler.send_header('Connection', 'Upgrade')
+        handler.send_header('Sec-WebSocket-Accept', accept)
+        handler.end_headers()
+        handler.wfile.flush()
+        handler.close_connection = True
+
+        sock = handler.connection
+        send_lock = threading.Lock()
+        _, since = self._since(params)
+        subscriber, replay, live_from = self._subscribe(since)
+
+        def send(frame):
+            with send_lock:
+                sock.sendall(frame)
+
+        def read_control_frames():
+            # Answer pings and closes as they arrive, not only between events
+            try:
+                while True:
+                    opcode, payload = read_websocket_frame(sock)
+                    if opcode == 0x8:
+                        send(websocket_frame(payload[:2], 0x8))
+                        break
+                    if opcode == 0x9:
+                        send(websocket_frame(payload, 0xA))
+            except (ConnectionError, OSError):
+                pass
+            # The client is gone; end its stream without waiting for the next event
+            self._disconnect(subscriber)
+
+        reader = threading.Thread(target=read_control_frames, name="scan-events-ws", daemon=True)
+        reader.start()
+        try:
+            for event in self._events(subscriber, replay, live_from):
+                if event is None:
+                    send(websocket_frame(b'', 0x9))
+                else:
+                    send(websocket_frame(json.dumps(event).encode()))
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self._unsubscribe(subscriber)
@@ -0,0 +1,291 @@
+import os
+import gzip
+import json
+import time
+import tempfile
+
+from src.codes import (FORMAT_NUMBERED, FORMAT_RAW, FORMAT_MD_NUMBERED,
+                       format_codes, block_separator)
+
+# Number of codes rendered and written per chunk
+EXPORT_CHUNK_SIZE = 1000
+
+# File next to config.json that remembers what was exported where
+EXPORT_MARKS_FILE = 'export_marks.json'
+
+
+class ExportCancelled(Exception):
+    """Raised when an export is cancelled before it completes."""
+
+
+def markdown_heading(format_type):
+    """Section heading used for a display format in Markdown exports."""
+    if format_type == FORMAT_NUMBERED:
+        return "Numbered List"
+    if format_type == FORMAT_RAW:
+        return "Raw Codes"
+    return format_type
+
+
+def iter_export_chunks(store, file_format, format_type, count=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Generate the text of an export in chunks.
+
+    Args:
+        store: CodeStore to export
+        file_format: 'txt' or 'md'
+        format_type: Display format used for Markdown exports
+        count: Number of codes to export (defaults to the current store size)
+        chunk_size: Maximum number of codes rendered per chunk
+
+    Yields:
+        Tuples of (text, number of codes written so far)
+    """
+    if count is None:
+        count = len(store)
+
+    if file_format != 'md':
+        # Plain text is always one code per line
+        for start_idx, codes in store.iter_chunks(chunk_size, count):
+            yield format_codes(codes, FORMAT_RAW) + "\n", start_idx + len(codes)
+        return
+
+    yield f"# Pokémon TCG Codes\n\n*Exported from CodeDex Pro - {count} codes*\n\n", 0
+    yield f"## {markdown_heading(format_type)}\n\n", 0
+
+    if format_type == FORMAT_NUMBERED:
+        for start_idx, codes in store.iter_chunks(chunk_size, count):
+            yield format_codes(codes, FORMAT_MD_NUMBERED, start_idx), start_idx + len(codes)
+        return
+
+    yield "```\n", 0
+    separator = block_separator(format_type)
+    for start_idx, codes in store.iter_chunks(chunk_size, count):
+        text = format_codes(codes, format_type)
+        if start_idx:
+            text = separator + text
+        yield text, start_idx + len(codes)
+    yield "\n```\n", count
+
+
+def write_atomic(file_path, chunks, compress=False, progress=None, cancelled=None):
+    """
+    Write chunks of text to a temporary file and rename it into place.
+
+    The destination is only replaced once every chunk has been written, so a
+    failed or cancelled export never leaves a truncated file behind.
+
+    Args:
+        file_path: Destination path
+        chunks: Iterable of (text, codes written so far) tuples
+        compress: Write gzip-compressed output
+        progress: Optional callable receiving the number of codes written
+        cancelled: Optional callable returning True to abort the export
+
+    Returns:
+        The number of codes written
+
+    Raises:
+        ExportCancelled: If cancelled() returned True before completion
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(file_path)}.", suffix=".tmp", dir=directory
+    )
+    written = 0
+
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            out = gzip.GzipFile(fileobj=raw, mode='wb') if compress else raw
+            try:
+                for text, written in chunks:
+                    if cancelled and cancelled():
+                        raise ExportCancelled()
+                    out.write(text.encode('utf-8'))
+                    if progress:
+                        progress(written)
+            finally:
+                if compress:
+                    out.close()
+            raw.flush()
+            os.fsync(raw.fileno())
+
+        # mkstemp creates private files; keep the permissions of a normal export
+        try:
+            mode = os.stat(file_path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    return written
+
+
+def export_codes(store, file_path, file_format, format_type, compress=None,
+                 progress=None, cancelled=None):
+    """
+    Export the codes in a store to a file.
+
+    Args:
+        store: CodeStore to export
+        file_path: Destination path
+        file_format: 'txt' or 'md'
+        format_type: Display format used for Markdown exports
+        compress: Write gzip output (defaults to True for paths ending in .gz)
+        progress: Optional callable receiving the number of codes written
+        cancelled: Optional callable returning True to abort the export
+
+    Returns:
+        The number of codes exported
+    """
+    if compress is None:
+        compress = file_path.endswith('.gz')
+    count = len(store)
+    chunks = iter_export_chunks(store, file_format, format_type, count)
+    write_atomic(file_path, chunks, compress, progress, cancelled)
+    return count
+
+
+class ExportMarks:
+    """
+    High-water marks recording how far each export destination is up to date.
+
+    Each destination remembers the source it was last fed from, the position
+    reached in that source, how many codes it has received in total and how
+    many delta files were written for it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.marks = {}
+        self.load()
+
+    def load(self):
+        """Load marks from disk, starting empty if the file is missing or invalid."""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    self.marks = json.load(f)
+        except Exception as e:
+            print(f"Error loading export marks: {e}")
+            self.marks = {}
+
+    def save(self):
+        """Write the marks atomically."""
+        data = json.dumps(self.marks, indent=2)
+        write_atomic(self.path, [(data, 0)])
+
+    def get(self, destination):
+        """Return the mark for a destination, or an empty dict."""
+        return self.marks.get(os.path.abspath(destination), {})
+
+    def position(self, destination, source):
+        """Position already exported from `source` to `destination`."""
+        mark = self.get(destination)
+        if mark.get('source') != source:
+            return 0
+        return mark.get('position', 0)
+
+    def update(self, destination, **values):
+        """Merge values into a destination's mark and save."""
+        key = os.path.abspath(destination)
+        mark = dict(self.marks.get(key, {}))
+        mark.update(values)
+        mark['updated'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.marks[key] = mark
+        self.save()
+
+
+def delta_path(destination, sequence):
+    """Path of the numbered delta file for a destination, e.g. codes.delta-003.txt."""
+    root, ext = os.path.splitext(destination)
+    return f"{root}.delta-{sequence:03d}{ext}"
+
+
+def _render_new_codes(codes, file_format, first_number, with_header):
+    """Render newly exported codes for appending or for a delta file."""
+    if file_format != 'md':
+        return format_codes(codes, FORMAT_RAW) + "\n"
+
+    text = ""
+    if with_header:
+        text += "# Pokémon TCG Codes\n\n*Exported from CodeDex Pro - new codes since last export*\n\n"
+    text += f"## New Codes - {time.strftime('%Y-%m-%d %H:%M:%S')} ({len(codes)} codes)\n\n"
+    text += format_codes(codes, FORMAT_MD_NUMBERED, first_number)
+    return text
+
+
+def export_new_codes(new_codes, destination, file_format, marks, source, position, delta=False):
+    """
+    Export only the codes that have not been exported to a destination yet.
+
+    Args:
+        new_codes: Codes added to the source since the destination's mark
+        destination: Base export path
+        file_format: 'txt' or 'md'
+        marks: ExportMarks instance
+        source: Identifier of the source the codes come from
+        position: Source position after the new codes, saved as the new mark
+        delta: Write a fresh numbered delta file instead of appending
+
+    Returns:
+        Tuple of (path written or None, number of codes written)
+    """
+    mark = marks.get(destination)
+    exported = mark.get('exported', 0)
+    sequence = mark.get('sequence', 0)
+
+    if not new_codes:
+        marks.update(destination, source=source, position=position)
+        return None, 0
+
+    if delta:
+        sequence += 1
+        file_path = delta_path(destination, sequence)
+        text = _render_new_codes(new_codes, file_format, exported, with_header=True)
+        write_atomic(file_path, [(text, len(new_codes))])
+    else:
+        file_path = destination
+        exists = os.path.exists(file_path) and os.path.getsize(file_path) > 0
+        text = _render_new_codes(new_codes, file_format, exported, with_header=not exists)
+        if exists and file_format == 'md':
+            text = "\n" + text
+        with open(file_path, 'a', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+
+    marks.update(destination, source=source, position=position,
+                 exported=exported + len(new_codes), sequence=sequence)
+    return file_path, len(new_codes)
+
+
+def read_new_lines(source_path, offset):
+    """
+    Read complete, non-empty lines appended to a text file since `offset`.
+
+    Args:
+        source_path: Text file with one code per line
+        offset: Byte offset already consumed
+
+    Returns:
+        Tuple of (list of codes, new byte offset)
+    """
+    if offset > os.path.getsize(source_path):
+        # The source was truncated or replaced; start over
+        offset = 0
+
+    with open(source_path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+
+    # Leave a trailing partial line for the next run
+    end = data.rfind(b"\n") + 1
+    lines = data[:end].decode('utf-8').splitlines()
+    return [line.strip() for line in lines if line.strip()], offset + end
@@ -0,0 +1,351 @@
+import time
+import cv2
+import numpy as np
+
+# Camera properties tuned by CameraTuner
+CONTROL_PROPERTIES = {
+    'exposure': cv2.CAP_PROP_EXPOSURE,
+    'gain': cv2.CAP_PROP_GAIN,
+    'focus': cv2.CAP_PROP_FOCUS,
+}
+
+# Smallest step tried for each property before it counts as converged
+MIN_STEPS = {'exposure': 0.25, 'gain': 1.0, 'focus': 5.0}
+
+# Properties that brighten the image. While the picture is far too bright
+# or too dark, they are stepped towards the target brightness first, and a
+# step that way is kept unless quality drops, at most BRIGHTNESS_STEPS times
+# in a row: a clipped or black image gives the quality score nothing to follow.
+BRIGHTNESS_PROPERTIES = {'exposure', 'gain'}
+BRIGHTNESS_TOLERANCE = 0.3
+CLIPPED_TOLERANCE = 0.2
+BRIGHTNESS_STEPS = 4
+
+# Properties stepped in octaves rather than units. Image brightness scales
+# with exposure time, so a badly overexposed start needs halving, not a
+# few units off. Backends reporting log2 exposure (DirectShow, values <= 0)
+# already count in octaves.
+OCTAVE_PROPERTIES = {'exposure'}
+
+# CAP_PROP_AUTO_EXPOSURE values for manual and automatic exposure. V4L2
+# uses its own menu values; DirectShow and Media Foundation use 0.25/0.75.
+AUTO_EXPOSURE_VALUES = {'V4L2': (1, 3)}
+DEFAULT_AUTO_EXPOSURE_VALUES = (0.25, 0.75)
+
+# Image quality targets: mean brightness of the code region (0-1), penalty
+# per share of clipped highlights (glare on glossy cards), and the Laplacian
+# variance treated as perfectly sharp
+TARGET_BRIGHTNESS = 0.5
+CLIP_PENALTY = 4.0
+SHARPNESS_SCALE = 2000.0
+
+# Frames measured per setting, frames skipped after a change while the
+# camera settles, and frames with a located code needed to compare decode rates
+WINDOW_FRAMES = 12
+SETTLE_FRAMES = 4
+MIN_LOCATED = 4
+
+# Margins a trial has to beat the current setting by
+DECODE_MARGIN = 0.1
+QUALITY_MARGIN = 0.02
+
+# Passes over every property before tuning stops, and the decode rate
+# below which converged settings are tuned again
+MAX_PASSES = 3
+RETUNE_DECODE_RATE = 0.5
+
+# Seconds a located code region is used to measure later frames
+REGION_MEMORY = 1.0
+
+
+def _auto_exposure_values(cap):
+    try:
+        backend = cap.getBackendName()
+    except Exception:
+        backend = None
+    return AUTO_EXPOSURE_VALUES.get(backend, DEFAULT_AUTO_EXPOSURE_VALUES)
+
+
+def set_manual_controls(cap):
+    """Switch off auto-exposure and autofocus so the controls can be set directly."""
+    cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, _auto_exposure_values(cap)[0])
+    cap.set(cv2.CAP_PROP_AUTOFOCUS, 0)
+
+
+def set_auto_controls(cap):
+    """Hand exposure and focus back to the camera driver."""
+    cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, _auto_exposure_values(cap)[1])
+    cap.set(cv2.CAP_PROP_AUTOFOCUS, 1)
+
+
+def read_controls(cap):
+    """
+    Read the properties the device lets us set.
+
+    Returns:
+        Dict of property name -> current value for the supported properties
+    """
+    controls = {}
+    for name, prop in CONTROL_PROPERTIES.items():
+        value = cap.get(prop)
+        # Writing the current value back is the only portable support check
+        if cap.set(prop, value):
+            controls[name] = value
+    return controls
+
+
+def apply_controls(cap, controls):
+    """Switch to manual controls and set saved property values."""
+    set_manual_controls(cap)
+    for name, value in controls.items():
+        if name in CONTROL_PROPERTIES:
+            cap.set(CONTROL_PROPERTIES[name], value)
+
+
+def measure_frame(frame, quad=None):
+    """
+    Measure brightness, clipping and sharpness of a frame.
+
+    Args:
+        frame: BGR frame
+        quad: Corner points of a located code to measure, or None for the frame centre
+
+    Returns:
+        Dict with 'brightness' (0-1), 'clipped' (share of blown-out pixels) and 'sharpness'
+    """
+    height, width = frame.shape[:2]
+    if quad is not None:
+        x, y, w, h = cv2.boundingRect(np.asarray(quad, np.float32).reshape(-1, 2))
+        x, y = max(x, 0), max(y, 0)
+        w, h = min(w, width - x), min(h, height - y)
+    else:
+        x, y, w, h = width // 4, height // 4, width // 2, height // 2
+    if w < 8 or h < 8:
+        x, y, w, h = 0, 0, width, height
+
+    gray = cv2.cvtColor(frame[y:y + h, x:x + w], cv2.COLOR_BGR2GRAY)
+    # Half resolution is plenty for the statistics and averages out sensor noise
+    if gray.shape[1] > 320:
+        gray = cv2.resize(gray, (gray.shape[1] // 2, gray.shape[0] // 2), interpolation=cv2.INTER_AREA)
+    return {
+        'brightness': float(gray.mean()) / 255.0,
+        'clipped': np.count_nonzero(gray >= 250) / gray.size,
+        'sharpness': float(cv2.Laplacian(gray, cv2.CV_64F).var()),
+    }
+
+
+def exposure_score(measurement):
+    """Score brightness from 0 to 1, favouring mid brightness without glare."""
+    score = 1.0 - abs(measurement['brightness'] - TARGET_BRIGHTNESS) / TARGET_BRIGHTNESS
+    return max(score - CLIP_PENALTY * measurement['clipped'], 0.0)
+
+
+def sharpness_score(measurement):
+    """Score sharpness from 0 to 1."""
+    return min(1.0, np.log1p(measurement['sharpness']) / np.log1p(SHARPNESS_SCALE))
+
+
+class CameraTuner:
+    """
+    Closed-loop tuning of exposure, gain and focus for decoding.
+
+    Driver auto-exposure overexposes glossy cards and autofocus hunts at
+    close range, so the tuner takes manual control and searches one
+    property at a time. Each setting is measured over a window of scanned
+    frames. When enough frames held a located code, the setting with more
+    of them decoded wins. Otherwise the code region (or the frame centre)
+    decides: brightness and glare for exposure and gain, sharpness for
+    focus. A step that does not help
+    is undone, tried the other way, then halved until it falls below the
+    property's minimum step.
+
+    Once a pass over every property brings no improvement, the values are
+    reported to `on_converged` to be saved, and the tuner only watches the
+    decode rate, tuning again if it drops.
+
+    Args:
+        cap: Open cv2.VideoCapture, used from the thread reading frames
+        controls: Converged values saved for this camera, or None to tune from the current ones
+        on_converged: Called with a dict of property values once tuning settles
+    """
+
+    def __init__(self, cap, controls=None, on_converged=None):
+        self.cap = cap
+        self.on_converged = on_converged
+        set_manual_controls(cap)
+        self.values = read_controls(cap)
+        if controls:
+            for name, value in controls.items():
+                if name in self.values:
+                    self._set(name, value)
+
+        self.properties = list(self.values)
+        self.converged = bool(controls) or not self.properties
+        self.steps = {}
+        self._samples = []
+        self._skip = 0
+        self._baseline = None
+        self._trial = None
+        self._region = None
+        self._region_time = 0.0
+        if not self.converged:
+            self._start_search()
+
+    def _set(self, name, value):
+        self.cap.set(CONTROL_PROPERTIES[name], value)
+        self.values[name] = value
+        self._skip = SETTLE_FRAMES
+
+    def _initial_step(self, name):
+        if name in OCTAVE_PROPERTIES:
+            return 1.0
+        return max(abs(self.values[name]) * 0.25, MIN_STEPS[name] * 4)
+
+    def _stepped(self, name, value, step):
+        if name in OCTAVE_PROPERTIES and value > 0:
+            return value * 2 ** step
+        return value + step
+
+    def _start_search(self):
+        self.converged = False
+        self.steps = {name: self._initial_step(name) for name in self.properties}
+        self._pass = 0
+        self._improved = False
+        self._index = 0
+        self._direction = 1
+        self._baseline = None
+        self._trial = None
+        self._samples = []
+
+    def observe(self, frame, quad=None, decoded=False):
+        """
+        Feed one scanned frame to the loop.
+
+        Args:
+            frame: The frame that was scanned
+            quad: Corner points of the code located in it, or None
+            decoded: Whether a code was decoded from it
+        """
+        if self._skip:
+            self._skip -= 1
+            return
+
+        now = time.monotonic()
+        if quad is not None:
+            self._region, self._region_time = quad, now
+        elif now - self._region_time > REGION_MEMORY:
+            self._region = None
+        measurement = measure_frame(frame, self._region)
+        measurement.update(exposure=exposure_score(measurement), focus=sharpness_score(measurement),
+                           located=quad is not None, decoded=quad is not None and decoded)
+        self._samples.append(measurement)
+        if len(self._samples) < WINDOW_FRAMES:
+            return
+
+        window = self._summarise(self._samples)
+        self._samples = []
+        if self.converged:
+            if window['located'] >= MIN_LOCATED and window['decode_rate'] < RETUNE_DECODE_RATE:
+                self._start_search()
+            return
+        if self._baseline is None:
+            self._baseline = window
+            self._begin_property()
+            return
+        self._finish_trial(window)
+
+    def _summarise(self, samples):
+        located = sum(sample['located'] for sample in samples)
+        decoded = sum(sample['decoded'] for sample in samples)
+        summary = {
+            name: sum(sample[name] for sample in samples) / len(samples)
+            for name in ('exposure', 'focus', 'brightness', 'clipped')
+        }
+        summary.update(located=located, decode_rate=decoded / located if located else 0.0)
+        return summary
+
+    def _brightness_hint(self, window):
+        """Direction that brings the picture towards the target brightness, or 0 if it is close enough."""
+        if window['clipped'] > CLIPPED_TOLERANCE or window['brightness'] > TARGET_BRIGHTNESS + BRIGHTNESS_TOLERANCE:
+            return -1
+        if window['brightness'] < TARGET_BRIGHTNESS - BRIGHTNESS_TOLERANCE:
+            return 1
+        return 0
+
+    def _better(self, trial, baseline):
+        if trial['located'] >= MIN_LOCATED and baseline['located'] >= MIN_LOCATED:
+            difference = trial['decode_rate'] - baseline['decode_rate']
+            if abs(difference) >= DECODE_MARGIN:
+                return difference > 0
+        score = 'focus' if self._trial[0] == 'focus' else 'exposure'
+        if self._hinted and self._hint_steps < BRIGHTNESS_STEPS:
+            return trial[score] >= baseline[score] - QUALITY_MARGIN
+        return trial[score] > baseline[score] + QUALITY_MARGIN
+
+    def _begin_property(self):
+        """Start searching the current property from the measured baseline."""
+        name = self.properties[self._index]
+        hint = self._brightness_hint(self._baseline) if name in BRIGHTNESS_PROPERTIES else 0
+        self._direction = hint or 1
+        self._hinted = bool(hint)
+        self._hint_steps = 0
+        self._reversed = False
+        self._next_trial()
+
+    def _next_trial(self):
+        name = self.properties[self._index]
+        self._trial = (name, self.values[name])
+        self._set(name, self._stepped(name, self.values[name], self._direction * self.steps[name]))
+
+    def _finish_trial(self, window):
+        name, previous = self._trial
+        if self._better(window, self._baseline):
+            # Keep going the same way
+            self._baseline = window
+            self._improved = True
+            if self._hinted:
+                self._hint_steps += 1
+            self._next_trial()
+            return
+
+        self._set(name, previous)
+        self._hinted = False
+        if not self._reversed:
+            self._direction = -self._direction
+            self._reversed = True
+        else:
+            self._reversed = False
+            self.steps[name] /= 2
+            if self.steps[name] < MIN_STEPS[name]:
+                self.steps[name] = self._initial_step(name) / 2
+                self._index += 1
+                if self._index == len(self.properties):
+                    self._pass += 1
+                    if not self._improved or self._pass >= MAX_PASSES:
+                        self._converge()
+                        return
+                    self._index = 0
+                    self._improved = False
+                # Measure the next property from settled settings
+                self._baseline = None
+                self._trial = None
+                return
+        self._next_trial()
+
+    def _converge(self):
+        self.converged = True
+        self._baseline = None
+        self._trial = None
+        if self.on_converged is not None:
+            self.on_converged(dict(self.values))
+
+    def describe(self):
+        """Short text for the HUD."""
+        values = "  ".join(f"{name} {value:g}" for name, value in self.values.items())
+        if self.converged:
+            return f"tuned   {values}" if values else "no manual controls"
+        return f"tuning {self.properties[self._index]}   {values}"
+
+    def stop(self):
+        """Give exposure and focus back to the driver."""
+        set_auto_controls(self.cap)
@@ -1,6 +1,7 @@
 import sys
 import cv2
 import time
+import socket
 import threading
 import os
 import random
@@ -9,53 +10,36 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QPushButton, QLabel, QLineEdit, 
                              QCheckBox, QComboBox, QGroupBox, QMessageBox,
                              QTextEdit, QSplitter, QDialog, QFormLayout, 
-                             QSpinBox, QTabWidget, QListWidget, QInputDialog,
+                             QSpinBox, QTabWidget, QListView, QInputDialog,
                              QDoubleSpinBox, QStatusBar, QFrame, QToolButton,
-                             QDialogButtonBox, QGridLayout, QListWidgetItem,
-                             QFileDialog)
-from PyQt5.QtGui import QPixmap, QImage, QIcon, QColor, QPalette, QFont
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, pyqtSlot, QSize
+                             QDialogButtonBox, QGridLayout, QListWidget,
+                             QFileDialog, QProgressDialog, QShortcut, QAction)
+from PyQt5.QtGui import QPixmap, QImage, QIcon, QColor, QPalette, QFont, QKeySequence
+from PyQt5.QtCore import (Qt, QTimer, QThread, QObject, pyqtSignal, pyqtSlot, QSize,
+                          QAbstractListModel, QModelIndex, QEvent)
 
 from src.scanner import QRScanner
-from src.config import Config
-
-# Pokemon Color Theme
-POKEMON_COLORS = {
-    # Primary colors
-    'primary': '#FF3B30',         # Modern Pokémon red
-    'secondary': '#007AFF',       # Vibrant blue
-    'accent': '#FFCC00',          # Pokémon yellow
-    
-    # UI colors
-    'background': '#121214',      # Dark background
-    'card_bg': '#18181B',         # Slightly lighter card background
-    'surface': '#232329',         # Surface elements
-    'input_bg': '#27272C',        # Input field background
-    
-    # Border colors
-    'border': '#323238',          # Border color
-    'border_light': '#3C3C44',    # Lighter border for highlights
-    'border_focus': '#4A4A55',    # Focus border color
-    
-    # Text colors
-    'text': '#FFFFFF',            # Primary text
-    'text_secondary': '#B0B0B8',  # Secondary text
-    'text_disabled': '#6E6E76',   # Disabled text
-    
-    # Functional colors
-    'success': '#34C759',         # Success green
-    'warning': '#FF9500',         # Warning orange
-    'error': '#FF453A',           # Error red
-    
-    # Button states
-    'hover': '#2C2C35',           # Hover state color
-    'active': '#343441',          # Active state color
-    
-    # Neutral colors
-    'gray': '#8E8E93',
-    'light_gray': '#F2F2F7',
-    'black': '#000000',
-}
+from src.config import Config, DEVICE_SETTINGS, THREAD_SETTINGS, EVENT_SETTINGS, COLLECTOR_SETTINGS
+from src.threads import ThreadBudget, ContentionMonitor, available_cores
+from src.exposure import CameraTuner
+from src.tracking import CardTracker
+from src.cooldown import CodeCooldown
+from src.theme import POKEMON_COLORS, apply_theme, set_state, style_button
+from src.collector import SEEN_DUPLICATE, SEEN_LABELS, describe_sighting
+from src.metrics import METRICS_LOG_FILE
+from src.memory import MemoryAccountant, format_bytes
+from src.replay import ReplayReport
+from src.profiling import SessionProfiler
+from src.devices import (CameraProbeCache, PROBE_CACHE_FILE, probe_capture, probe_cameras,
+                         preferred_resolution, describe_device)
+from src.codes import CodeStore, FORMATS, FORMAT_NUMBERED, FORMAT_RAW
+from src.export import (export_codes, ExportCancelled, ExportMarks, EXPORT_MARKS_FILE,
+                        export_new_codes)
+from src.redemption import (RedemptionError, STATUS_LABELS, STATUS_REDEEMED, STATUS_ALREADY_REDEEMED,
+                            STATUS_INVALID, STATUS_UNUSED)
+from src.status_cache import StatusCache, STATUS_CACHE_FILE
+from src.redemption_queue import (RedemptionQueue, REDEMPTION_QUEUE_FILE, STATE_LABELS, STATE_RETRY,
+                                  STATES, display_status)
 
 class StatusIndicator(QWidget):
     """Custom widget for showing connection/login status."""
@@ -73,78 +57,49 @@ class StatusIndicator(QWidget):
         
         # Create indicator container for better styling and alignment
         indicator_container = QFrame()
+        indicator_container.setObjectName("status_light_frame")
         indicator_container.setFixedSize(12, 12)
-        indicator_container.setStyleSheet(f"""
-            background-color: transparent;
-            border-radius: 6px;
-            margin: 0;
-            padding: 0;
-        """)
         indicator_layout = QVBoxLayout(indicator_container)
         indicator_layout.setContentsMargins(0, 0, 0, 0)
         indicator_layout.setAlignment(Qt.AlignCenter)
         
-        # Create indicator light
+        # Create indicator light; the 'state' property picks its color from the theme
         self.indicator = QFrame()
+        self.indicator.setObjectName("status_light")
+        self.indicator.setProperty('state', 'off')
         self.indicator.setFixedSize(6, 6)
-        self.indicator.setStyleSheet(f"""
-            background-color: {POKEMON_COLORS['error']};
-            border-radius: 3px;
-            margin: 0;
-        """)
         indicator_layout.addWidget(self.indicator, 0, Qt.AlignCenter)
         
         # Create label
         self.label = QLabel(self.label_text)
+        self.label.setObjectName("status_text")
+        self.label.setProperty('state', 'off')
         self.label.setAlignment(Qt.AlignVCenter | Qt.AlignLeft)
-        self.label.setStyleSheet(f"""
-            font-weight: 500;
-            color: {POKEMON_COLORS['text_secondary']};
-            font-size: 12px;
-            padding: 0;
-            margin: 0;
-        """)
         
         layout.addWidget(indicator_container)
         layout.addWidget(self.label)
         
         self.setLayout(layout)
         
+    def _set_state(self, state):
+        set_state(self.indicator, 'state', state)
+        set_state(self.label, 'state', state)
+        
     def set_status(self, status, text=None):
         """Update the status indicator."""
         self.status = status
-        
-        if status:
-            self.indicator.setStyleSheet(f"""
-                background-color: {POKEMON_COLORS['success']};
-                border-radius: 3px;
-                margin: 0;
-            """)
-            self.label.setStyleSheet(f"""
-                font-weight: 500;
-                color: {POKEMON_COLORS['success']};
-                font-size: 12px;
-                padding: 0;
-                margin: 0;
-            """)
-        else:
-            self.indicator.setStyleSheet(f"""
-                background-color: {POKEMON_COLORS['error']};
-                border-radius: 3px;
-                margin: 0;
-            """)
-            self.label.setStyleSheet(f"""
-                font-weight: 500;
-                color: {POKEMON_COLORS['text_secondary']};
-                font-size: 12px;
-                padding: 0;
-                margin: 0;
-            """)
+        self._set_state('on' if status else 'off')
             
         if text:
             self.label.setText(text)
         else:
             self.label.setText("Connected" if status else "Not Connected")
+            
+    def set_pending(self, text):
+        """Show an in-progress state, e.g. while a device is opening."""
+        self.status = False
+        self._set_state('pending')
+        self.label.setText(text)
 
 class LoginDialog(QDialog):
     """Dialog for entering Pokemon Trainer Club credentials."""
@@ -249,12 +204,19 @@ class LoginDialog(QDialog):
         checkbox_layout.addSpacing(10)
         
         self.save_checkbox = QCheckBox("Save credentials")
-        self.save_checkbox.setChecked(True)
+        self.save_checkbox.setChecked(False)
         checkbox_layout.addWidget(self.save_checkbox)
         checkbox_layout.addStretch()
         
         form_layout.addRow("", checkbox_container)
         
+        # config.json is only protected by its file permissions
+        self.save_warning = QLabel("Saved passwords are stored unencrypted in config.json, "
+                                   "readable by anyone with access to your user account.")
+        self.save_warning.setWordWrap(True)
+        self.save_warning.setStyleSheet(f"color: {POKEMON_COLORS['warning']}; font-size: 11px;")
+        form_layout.addRow("", self.save_warning)
+        
         layout.addWidget(form_widget)
         
         # Buttons with better spacing
@@ -295,9 +257,11 @@ class LoginDialog(QDialog):
 class SettingsDialog(QDialog):
     """Dialog for configuring application settings."""
     
-    def __init__(self, parent=None, config=None):
+    def __init__(self, parent=None, config=None, probe_cache=None):
         super().__init__(parent)
         self.config = config or Config()
+        self.probe_cache = probe_cache or CameraProbeCache(self.config.data_path(PROBE_CACHE_FILE))
+        self.probe_worker = None
         self.init_ui()
         
     def init_ui(self):
@@ -421,6 +385,22 @@ class SettingsDialog(QDialog):
         self.camera_spinbox.setValue(self.config.camera_index)
         camera_layout.addRow("Camera index:", self.camera_spinbox)
         
+        # Devices found by the last probe, cached on disk
+        self.device_combo = QComboBox()
+        self.device_combo.activated.connect(self.device_selected)
+        camera_layout.addRow("Detected cameras:", self.device_combo)
+        
+        self.detect_button = QPushButton("Detect Cameras")
+        self.detect_button.clicked.connect(self.detect_cameras)
+        camera_layout.addRow("", self.detect_button)
+        self.populate_devices()
+        
+        # Closed-loop exposure, gain and focus control, saved per camera
+        self.camera_tuning_checkbox = QCheckBox()
+        self.camera_tuning_checkbox.setChecked(self.config.camera_tuning)
+        self.camera_tuning_checkbox.setToolTip("Replace the driver's auto-exposure and autofocus with values tuned for decoding")
+        camera_layout.addRow("Tune exposure and focus:", self.camera_tuning_checkbox)
+        
         camera_tab.setLayout(camera_layout)
         tab_widget.addTab(camera_tab, "Camera")
         
@@ -449,7 +429,26 @@ class SettingsDialog(QDialog):
         self.scan_cooldown_spinbox.setSingleStep(0.5)
         self.scan_cooldown_spinbox.setValue(self.config.scan_cooldown)
         self.scan_cooldown_spinbox.setSuffix(" sec")
-        detection_layout.addRow("Scan cooldown:", self.scan_cooldown_spinbox)
+        self.scan_cooldown_spinbox.setToolTip("How long the same code is ignored after it was seen; other codes are accepted at once")
+        detection_layout.addRow("Repeat cooldown:", self.scan_cooldown_spinbox)
+        
+        self.cooldown_capacity_spinbox = QSpinBox()
+        self.cooldown_capacity_spinbox.setMinimum(16)
+        self.cooldown_capacity_spinbox.setMaximum(4096)
+        self.cooldown_capacity_spinbox.setValue(self.config.cooldown_capacity)
+        self.cooldown_capacity_spinbox.setSuffix(" codes")
+        detection_layout.addRow("Cooldown memory:", self.cooldown_capacity_spinbox)
+        
+        # Second decode pass on an enhanced image when the first one fails
+        self.preprocess_checkbox = QCheckBox()
+        self.preprocess_checkbox.setChecked(self.config.preprocess_fallback)
+        detection_layout.addRow("Enhanced detection fallback:", self.preprocess_checkbox)
+        
+        # Only decode frames in which a code was located first
+        self.two_stage_checkbox = QCheckBox()
+        self.two_stage_checkbox.setChecked(self.config.two_stage_decode)
+        self.two_stage_checkbox.setToolTip("Skip decoding frames without finder patterns or a located code")
+        detection_layout.addRow("Detect before decoding:", self.two_stage_checkbox)
         
         detection_tab.setLayout(detection_layout)
         tab_widget.addTab(detection_tab, "Detection")
@@ -463,9 +462,145 @@ class SettingsDialog(QDialog):
         self.debug_checkbox.setChecked(self.config.debug_mode)
         advanced_layout.addRow("Debug mode:", self.debug_checkbox)
         
+        # Performance overlay on the camera view (also toggled with F3)
+        self.hud_checkbox = QCheckBox()
+        self.hud_checkbox.setChecked(self.config.show_hud)
+        advanced_layout.addRow("Show performance HUD:", self.hud_checkbox)
+        
+        # Periodic metric snapshots for offline analysis
+        self.metrics_log_checkbox = QCheckBox()
+        self.metrics_log_checkbox.setChecked(self.config.metrics_log)
+        self.metrics_log_checkbox.setToolTip(f"Append pipeline metrics to {METRICS_LOG_FILE} every few seconds")
+        advanced_layout.addRow("Log metrics (JSON lines):", self.metrics_log_checkbox)
+        
+        # Built-in profiler, available from the Tools menu in debug mode
+        self.profile_duration_spinbox = QSpinBox()
+        self.profile_duration_spinbox.setMinimum(5)
+        self.profile_duration_spinbox.setMaximum(3600)
+        self.profile_duration_spinbox.setSingleStep(5)
+        self.profile_duration_spinbox.setValue(self.config.profile_duration)
+        self.profile_duration_spinbox.setSuffix(" sec")
+        advanced_layout.addRow("Profiling window:", self.profile_duration_spinbox)
+        
+        self.profile_on_start_checkbox = QCheckBox()
+        self.profile_on_start_checkbox.setChecked(self.config.profile_on_start)
+        advanced_layout.addRow("Profile on start (debug mode):", self.profile_on_start_checkbox)
+        
+        # Thread budget shared by the UI, decoding and OpenCV
+        self.thread_budget_spinbox = QSpinBox()
+        self.thread_budget_spinbox.setMinimum(0)
+        self.thread_budget_spinbox.setMaximum(len(available_cores()))
+        self.thread_budget_spinbox.setSpecialValueText("All")
+        self.thread_budget_spinbox.setValue(self.config.thread_budget)
+        self.thread_budget_spinbox.setSuffix(" cores")
+        advanced_layout.addRow("Thread budget:", self.thread_budget_spinbox)
+        
+        self.opencv_threads_spinbox = QSpinBox()
+        self.opencv_threads_spinbox.setMinimum(-1)
+        self.opencv_threads_spinbox.setMaximum(64)
+        self.opencv_threads_spinbox.setSpecialValueText("From budget")
+        self.opencv_threads_spinbox.setValue(self.config.opencv_threads)
+        self.opencv_threads_spinbox.setToolTip("0 runs OpenCV single-threaded")
+        advanced_layout.addRow("OpenCV threads:", self.opencv_threads_spinbox)
+        
+        self.decode_workers_spinbox = QSpinBox()
+        self.decode_workers_spinbox.setMinimum(1)
+        self.decode_workers_spinbox.setMaximum(16)
+        self.decode_workers_spinbox.setValue(self.config.decode_workers)
+        self.decode_workers_spinbox.setToolTip("Frames decoded in parallel by the streaming scanner")
+        advanced_layout.addRow("Decode workers:", self.decode_workers_spinbox)
+        
+        self.pin_threads_checkbox = QCheckBox()
+        self.pin_threads_checkbox.setChecked(self.config.pin_threads)
+        self.pin_threads_checkbox.setEnabled(hasattr(os, 'sched_setaffinity'))
+        self.pin_threads_checkbox.setToolTip("Keep the UI on the first core and workers on the others (Linux)")
+        advanced_layout.addRow("Pin threads to cores:", self.pin_threads_checkbox)
+        
+        # Localhost service streaming accepted codes to other programs
+        self.event_server_checkbox = QCheckBox()
+        self.event_server_checkbox.setChecked(self.config.event_server)
+        self.event_server_checkbox.setToolTip("Stream codes as they are scanned over SSE (/events) and WebSocket (/ws), "
+                                              "and serve the session as JSON (/session), on this computer only")
+        advanced_layout.addRow("Scan event service:", self.event_server_checkbox)
+        
+        self.event_port_spinbox = QSpinBox()
+        self.event_port_spinbox.setMinimum(1024)
+        self.event_port_spinbox.setMaximum(65535)
+        self.event_port_spinbox.setValue(self.config.event_port)
+        advanced_layout.addRow("Event service port:", self.event_port_spinbox)
+        
         advanced_tab.setLayout(advanced_layout)
         tab_widget.addTab(advanced_tab, "Advanced")
         
+        # Redemption settings tab
+        redemption_tab = QWidget()
+        redemption_layout = QFormLayout()
+        
+        # Redemption service; submitting codes is disabled while this is empty
+        self.redemption_url_edit = QLineEdit()
+        self.redemption_url_edit.setText(self.config.redemption_url)
+        self.redemption_url_edit.setPlaceholderText("https://... (leave empty to disable)")
+        redemption_layout.addRow("Service URL:", self.redemption_url_edit)
+        
+        # Batches submitted at the same time by each account
+        self.redemption_concurrency_spinbox = QSpinBox()
+        self.redemption_concurrency_spinbox.setMinimum(1)
+        self.redemption_concurrency_spinbox.setMaximum(16)
+        self.redemption_concurrency_spinbox.setValue(self.config.redemption_concurrency)
+        redemption_layout.addRow("Concurrent batches per account:", self.redemption_concurrency_spinbox)
+        
+        # Requests per second per account, kept under the service's throttle
+        self.redemption_rate_spinbox = QDoubleSpinBox()
+        self.redemption_rate_spinbox.setMinimum(0.0)
+        self.redemption_rate_spinbox.setMaximum(50.0)
+        self.redemption_rate_spinbox.setSingleStep(0.5)
+        self.redemption_rate_spinbox.setValue(self.config.redemption_rate)
+        self.redemption_rate_spinbox.setSuffix(" req/s")
+        self.redemption_rate_spinbox.setSpecialValueText("Unlimited")
+        redemption_layout.addRow("Rate limit per account:", self.redemption_rate_spinbox)
+        
+        # Further accounts that share the redemption work with the main login
+        self.redemption_accounts = [dict(account) for account in self.config.redemption_accounts]
+        self.accounts_list = QListWidget()
+        self.accounts_list.setMaximumHeight(100)
+        self.accounts_list.addItems([account['username'] for account in self.redemption_accounts])
+        redemption_layout.addRow("Extra accounts:", self.accounts_list)
+        
+        accounts_buttons = QHBoxLayout()
+        self.add_account_button = QPushButton("Add Account...")
+        self.add_account_button.clicked.connect(self.add_account)
+        self.remove_account_button = QPushButton("Remove")
+        self.remove_account_button.clicked.connect(self.remove_account)
+        accounts_buttons.addWidget(self.add_account_button)
+        accounts_buttons.addWidget(self.remove_account_button)
+        redemption_layout.addRow("", accounts_buttons)
+        
+        redemption_tab.setLayout(redemption_layout)
+        tab_widget.addTab(redemption_tab, "Redemption")
+        
+        # Collector merging the codes of several stations; this station only scans when it is empty
+        collector_tab = QWidget()
+        collector_layout = QFormLayout()
+        
+        self.collector_url_edit = QLineEdit()
+        self.collector_url_edit.setText(self.config.collector_url)
+        self.collector_url_edit.setPlaceholderText("http://host:8770 (leave empty to disable)")
+        collector_layout.addRow("Collector URL:", self.collector_url_edit)
+        
+        self.station_name_edit = QLineEdit()
+        self.station_name_edit.setText(self.config.station_name)
+        self.station_name_edit.setPlaceholderText(socket.gethostname())
+        collector_layout.addRow("Station name:", self.station_name_edit)
+        
+        self.collector_token_edit = QLineEdit()
+        self.collector_token_edit.setEchoMode(QLineEdit.Password)
+        self.collector_token_edit.setText(self.config.collector_token)
+        self.collector_token_edit.setPlaceholderText("Shared token, if the collector requires one")
+        collector_layout.addRow("Collector token:", self.collector_token_edit)
+        
+        collector_tab.setLayout(collector_layout)
+        tab_widget.addTab(collector_tab, "Collector")
+        
         layout.addRow(tab_widget)
         
         # Buttons
@@ -481,28 +616,423 @@ class SettingsDialog(QDialog):
         
         self.setLayout(layout)
         
+    def populate_devices(self):
+        """Fill the device list from the probe cache."""
+        self.device_combo.clear()
+        devices = sorted(self.probe_cache.devices.values(), key=lambda info: info['index'])
+        if not devices:
+            self.device_combo.addItem("No cameras detected yet", None)
+            return
+        for info in devices:
+            self.device_combo.addItem(describe_device(info), info['index'])
+            if info['index'] == self.camera_spinbox.value():
+                self.device_combo.setCurrentIndex(self.device_combo.count() - 1)
+                
+    def device_selected(self, index):
+        """Use the chosen device's camera index."""
+        camera_index = self.device_combo.itemData(index)
+        if camera_index is not None:
+            self.camera_spinbox.setValue(camera_index)
+            
+    def detect_cameras(self):
+        """Enumerate camera devices in the background."""
+        self.detect_button.setEnabled(False)
+        self.detect_button.setText("Detecting...")
+        self.probe_worker = CameraProbeWorker(self)
+        self.probe_worker.devices_found.connect(self.on_devices_found)
+        self.probe_worker.start()
+        
+    def on_devices_found(self, devices):
+        """Cache and list the result of a device probe."""
+        self.probe_cache.merge(devices)
+        self.populate_devices()
+        self.detect_button.setEnabled(True)
+        self.detect_button.setText("Detect Cameras")
+        
+    def done(self, result):
+        # A probe still running finishes on its own; its result is no longer needed
+        if self.probe_worker is not None:
+            self.probe_worker.devices_found.disconnect()
+            self.probe_worker.finished.connect(self.probe_worker.deleteLater)
+            self.probe_worker = None
+        super().done(result)
+        
+    def add_account(self):
+        """Ask for the login of another redemption account."""
+        dialog = LoginDialog(self, self.config)
+        dialog.username_edit.clear()
+        dialog.password_edit.clear()
+        dialog.save_checkbox.hide()
+        dialog.save_warning.setText("Extra accounts are stored unencrypted in config.json, "
+                                    "readable by anyone with access to your user account.")
+        if not dialog.exec_():
+            return
+        credentials = dialog.get_credentials()
+        username = credentials['username'].strip()
+        if not username or not credentials['password']:
+            return
+        if username == self.config.username or any(a['username'] == username for a in self.redemption_accounts):
+            QMessageBox.information(self, "Account Exists", f"{username} is already in use.")
+            return
+        self.redemption_accounts.append({'username': username, 'password': credentials['password']})
+        self.accounts_list.addItem(username)
+        
+    def remove_account(self):
+        """Remove the selected redemption account."""
+        row = self.accounts_list.currentRow()
+        if row >= 0:
+            del self.redemption_accounts[row]
+            self.accounts_list.takeItem(row)
+            
     def get_settings(self):
         """Get the configured settings."""
         return {
             'camera_index': self.camera_spinbox.value(),
+            'camera_tuning': self.camera_tuning_checkbox.isChecked(),
             'debug_mode': self.debug_checkbox.isChecked(),
             'auto_detect': self.auto_detect_checkbox.isChecked(),
             'scan_interval': self.scan_interval_spinbox.value(),
-            'scan_cooldown': self.scan_cooldown_spinbox.value()
+            'scan_cooldown': self.scan_cooldown_spinbox.value(),
+            'cooldown_capacity': self.cooldown_capacity_spinbox.value(),
+            'preprocess_fallback': self.preprocess_checkbox.isChecked(),
+            'two_stage_decode': self.two_stage_checkbox.isChecked(),
+            'show_hud': self.hud_checkbox.isChecked(),
+            'metrics_log': self.metrics_log_checkbox.isChecked(),
+            'profile_duration': self.profile_duration_spinbox.value(),
+            'profile_on_start': self.profile_on_start_checkbox.isChecked(),
+            'thread_budget': self.thread_budget_spinbox.value(),
+            'opencv_threads': self.opencv_threads_spinbox.value(),
+            'decode_workers': self.decode_workers_spinbox.value(),
+            'pin_threads': self.pin_threads_checkbox.isChecked(),
+            'event_server': self.event_server_checkbox.isChecked(),
+            'event_port': self.event_port_spinbox.value(),
+            'redemption_url': self.redemption_url_edit.text().strip(),
+            'redemption_concurrency': self.redemption_concurrency_spinbox.value(),
+            'redemption_rate': self.redemption_rate_spinbox.value(),
+            'redemption_accounts': self.redemption_accounts,
+            'collector_url': self.collector_url_edit.text().strip(),
+            'station_name': self.station_name_edit.text().strip(),
+            'collector_token': self.collector_token_edit.text()
         }
 
+class CameraOpenWorker(QThread):
+    """Background thread that opens the camera so the window stays responsive."""
+    
+    opened = pyqtSignal(bool)
+    
+    def __init__(self, scanner, camera_index, probe_cache, parent=None,
+                 replay_path=None, replay_speed='recorded', tuning=False):
+        super().__init__(parent)
+        self.scanner = scanner
+        self.camera_index = camera_index
+        self.probe_cache = probe_cache
+        self.tuning = tuning
+        self.replay_path = replay_path
+        self.replay_speed = replay_speed
+        
+    def run(self):
+        if self.replay_path:
+            self.opened.emit(self.scanner.start_replay(self.replay_path, self.replay_speed))
+            return
+        
+        # Tuned controls from an earlier session are applied before the first frame
+        info = self.probe_cache.get(self.camera_index)
+        controls = self.probe_cache.get_controls(self.camera_index) if self.tuning else None
+        if not self.scanner.start_camera(self.camera_index, preferred_resolution(info), controls):
+            self.opened.emit(False)
+            return
+        
+        # Probe a device the first time it is used, on the capture just opened rather
+        # than opening it twice; later starts reuse the cache
+        if info is None:
+            info = probe_capture(self.scanner.cap, self.camera_index)
+            if info:
+                self.probe_cache.update(info)
+            self.scanner.set_resolution(preferred_resolution(info))
+        self.opened.emit(True)
+
+class CameraProbeWorker(QThread):
+    """Background thread that enumerates the available cameras."""
+    
+    devices_found = pyqtSignal(list)
+    
+    def run(self):
+        self.devices_found.emit(probe_cameras())
+
+class ExportWorker(QThread):
+    """Background thread that streams codes to an export file."""
+    
+    progress = pyqtSignal(int)
+    completed = pyqtSignal(str, int)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+    
+    def __init__(self, store, file_path, file_format, format_type, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.file_path = file_path
+        self.file_format = file_format
+        self.format_type = format_type
+        self.session_id = store.session_id
+        self._cancel_requested = False
+        
+    def cancel(self):
+        """Ask the export to stop at the next chunk."""
+        self._cancel_requested = True
+        
+    def run(self):
+        try:
+            count = export_codes(
+                self.store, self.file_path, self.file_format, self.format_type,
+                progress=self.progress.emit,
+                cancelled=lambda: self._cancel_requested
+            )
+            self.completed.emit(self.file_path, count)
+        except ExportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+
+class StatusCheckWorker(QThread):
+    """Background thread that checks the status of codes without redeeming them."""
+    
+    code_result = pyqtSignal(str, str, str)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, engine, codes, cache, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.codes = codes
+        self.cache = cache
+        self._stop = threading.Event()
+        
+    def stop(self):
+        """Skip the batches not sent yet; batches already out still complete."""
+        self._stop.set()
+        
+    def run(self):
+        try:
+            self.engine.client.login()
+            self.engine.check(
+                self.codes, self.cache,
+                lambda result: self.code_result.emit(result['code'], result['status'], result['message']),
+                self._stop
+            )
+        except RedemptionError as e:
+            self.failed.emit(str(e))
+        finally:
+            self.engine.close()
+
+class RedemptionWorker(QThread):
+    """Background thread that works through the redemption queue and reports every update."""
+    
+    code_result = pyqtSignal(str, str, str)
+    stats_changed = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, scheduler, queue, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.queue = queue
+        self._stop = threading.Event()
+        
+    def stop(self):
+        """Stop claiming codes; batches already submitted still complete."""
+        self._stop.set()
+        
+    def run(self):
+        try:
+            # Check the credentials once before any batch is submitted
+            self.scheduler.login()
+            self.scheduler.run(
+                self.queue,
+                lambda code, entry: self.code_result.emit(code, display_status(entry), entry['message']),
+                self._stop,
+                self.stats_changed.emit
+            )
+        except RedemptionError as e:
+            self.failed.emit(str(e))
+        finally:
+            self.stats_changed.emit(self.scheduler.stats())
+            self.scheduler.close()
+
+class CollectorUplinkWorker(QObject):
+    """
+    Sends accepted codes to the collector and reports its answers.
+    
+    The uplink runs on a daemon thread rather than a QThread: a request can
+    take the client's whole timeout, and neither reconfiguring nor closing
+    the window should wait for it. Codes not yet delivered stay in the
+    uplink's queue on disk and are sent on the next start.
+    """
+    
+    code_result = pyqtSignal(object)
+    
+    def __init__(self, uplink, parent=None):
+        super().__init__(parent)
+        self.uplink = uplink
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, name="collector-uplink", daemon=True)
+        
+    def start(self):
+        self._thread.start()
+        
+    def stop(self):
+        """Stop sending without waiting; codes not yet delivered stay queued for the next start."""
+        self._stop.set()
+        self.uplink.wake()
+        
+    def run(self):
+        try:
+            self.uplink.run(self._stop, self.code_result.emit)
+        finally:
+            self.uplink.close()
+
+class CodeListModel(QAbstractListModel):
+    """
+    List model reading straight from a CodeStore.
+    
+    The view asks for the rows it paints, so the list needs no widget item
+    per code and adding a code only inserts one row. An empty store shows
+    a single non-selectable placeholder row. Redemption results are shown
+    next to their code.
+    """
+    
+    STATUS_COLORS = {
+        STATUS_UNUSED: POKEMON_COLORS['secondary'],
+        STATUS_REDEEMED: POKEMON_COLORS['success'],
+        STATUS_ALREADY_REDEEMED: POKEMON_COLORS['warning'],
+        STATUS_INVALID: POKEMON_COLORS['error'],
+        STATE_RETRY: POKEMON_COLORS['warning'],
+        SEEN_DUPLICATE: POKEMON_COLORS['error'],
+    }
+    
+    def __init__(self, store, placeholder, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.placeholder = placeholder
+        self.statuses = {}
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.store) or 1
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if not self.store:
+            if role == Qt.DisplayRole:
+                return self.placeholder
+            if role == Qt.TextAlignmentRole:
+                return Qt.AlignCenter
+            return None
+        code = self.store[index.row()]
+        status, message = self.statuses.get(code, (None, ""))
+        if role == Qt.DisplayRole:
+            if status is None:
+                return code
+            label = STATUS_LABELS.get(status) or STATE_LABELS.get(status) or SEEN_LABELS.get(status, status)
+            return f"{code}    {label}"
+        if role == Qt.ForegroundRole and status is not None:
+            return QColor(self.STATUS_COLORS.get(status, POKEMON_COLORS['text_secondary']))
+        if role == Qt.ToolTipRole and message:
+            return message
+        return None
+    
+    def flags(self, index):
+        if not self.store:
+            return Qt.NoItemFlags
+        return super().flags(index)
+    
+    def add_code(self, code):
+        """
+        Add a code to the store and show it as a new row.
+        
+        Returns:
+            True if the code was new
+        """
+        if not code or code in self.store:
+            return False
+        if not self.store:
+            # The placeholder row turns into the first code
+            self.beginResetModel()
+            self.store.add(code)
+            self.endResetModel()
+            return True
+        row = len(self.store)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.store.add(code)
+        self.endInsertRows()
+        return True
+    
+    def set_status(self, code, status, message=""):
+        """Show the redemption result of a code."""
+        row = self.store.position(code)
+        if row is None:
+            return
+        self.statuses[code] = (status, message)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+    
+    def status(self, code):
+        """Return the status shown for a code, or None if it has none."""
+        return self.statuses.get(code, (None, ""))[0]
+    
+    def clear(self):
+        """Remove every code from the store."""
+        self.beginResetModel()
+        self.store.clear()
+        self.statuses.clear()
+        self.endResetModel()
+
 class MainWindow(QMainWindow):
     """Main application window."""
     
-    def __init__(self):
+    # Emitted once with the milliseconds from `started` to the first paint of the window
+    first_painted = pyqtSignal(float)
+    
+    def __init__(self, record_path=None, replay_path=None, replay_speed='recorded', started=None,
+                 imported=None):
         super().__init__()
         
+        # Startup is timed from `started` (launch, when given) to the first paint;
+        # `imported` marks when the modules were loaded, so imports are reported apart
+        constructing = time.perf_counter()
+        self.started = constructing if started is None else started
+        self.startup_times = {}
+        if imported is not None:
+            self.startup_times['imports'] = (imported - self.started) * 1000
+        
+        # The whole theme is parsed once, before any widget is styled
+        apply_theme(QApplication.instance())
+        
         self.setWindowTitle("CodeDex Pro - Pokémon TCG Code Scanner")
         self.setMinimumSize(1000, 650)
         
         # Initialize configuration and scanner
         self.config = Config()
         self.scanner = QRScanner()
+        self.scanner.apply_settings(self.config)
+        
+        # Cores are shared out between the UI, decoding and OpenCV before any work starts;
+        # pinned threads are re-checked periodically to catch threads started later
+        self.thread_budget = ThreadBudget.from_config(self.config)
+        self.thread_plan = self.thread_budget.apply(self.scanner)
+        self.contention = ContentionMonitor()
+        self.affinity_timer = QTimer()
+        self.affinity_timer.timeout.connect(self.thread_budget.enforce)
+        if self.thread_budget.pin:
+            self.affinity_timer.start(2000)
+        self.probe_cache = CameraProbeCache(self.config.data_path(PROBE_CACHE_FILE))
+        self.camera_worker = None
+        self.camera_tuner = None
+        
+        # Session recording and replay for reproducible performance runs
+        self.record_path = record_path
+        self.replay_path = replay_path
+        self.replay_speed = replay_speed
+        self.replay_report = None
         
         # Initialize variables
         self.capture_timer = QTimer()
@@ -511,15 +1041,66 @@ class MainWindow(QMainWindow):
         self.scan_timer = QTimer()
         self.scan_timer.timeout.connect(self.auto_scan_qr_code)
         
-        # Add cooldown to prevent duplicate scans of the same code
-        self.last_scan_time = 0
-        self.scan_cooldown = self.config.scan_cooldown  # Use value from config
+        # Shared pipeline metrics, refreshed on the HUD and optionally logged
+        self.metrics = self.scanner.metrics
+        self.hud_timer = QTimer()
+        self.hud_timer.timeout.connect(self.update_hud)
+        self.metrics_log_timer = QTimer()
+        self.metrics_log_timer.timeout.connect(self.write_metrics_log)
+        
+        # Profiler enabled by debug mode, writing next to config.json
+        self.profiler = SessionProfiler(os.path.dirname(self.config.config_path))
+        self.profile_timer = QTimer()
+        self.profile_timer.setSingleShot(True)
+        self.profile_timer.timeout.connect(self.stop_profiling)
         
-        # List to track recently seen codes to prevent duplicates
-        self.recently_scanned_codes = []
-        self.max_recent_codes = 5
+        # Each code cools down on its own, so a different card is accepted at once
+        self.code_cooldown = CodeCooldown(self.config.scan_cooldown, self.config.cooldown_capacity)
         
-        self.codes_found = []
+        # Cards in view are followed across frames so each one is decoded once
+        self.card_tracker = CardTracker()
+        
+        self.codes_found = CodeStore()
+        self.code_model = CodeListModel(
+            self.codes_found, "No codes scanned yet. Start camera and scan QR codes to see them here."
+        )
+        self.export_worker = None
+        
+        # Codes are submitted in the background from a queue that survives restarts;
+        # credentials that were not saved live for the session
+        self.redemption_queue = RedemptionQueue(self.config.data_path(REDEMPTION_QUEUE_FILE))
+        self.redemption_worker = None
+        self.session_credentials = None
+        self.redemption_stats = []
+        
+        # Status checks are cached across sessions so codes are not looked up twice
+        self.status_cache = StatusCache(self.config.data_path(STATUS_CACHE_FILE))
+        self.check_worker = None
+        
+        # Local service streaming accepted codes to other programs, when enabled
+        self.event_server = None
+        self.apply_event_server()
+        
+        # Accepted codes go to the collector when this is one of several stations
+        self.collector_uplink = None
+        self.collector_worker = None
+        self.apply_collector()
+        
+        # Preview buffers reused from frame to frame, sized to the camera view
+        self.preview_bgr = None
+        self.preview_rgb = None
+        self.preview_pixmap = QPixmap()
+        
+        # Memory used by each subsystem, shown on the HUD and in the metrics log
+        self.memory = MemoryAccountant()
+        self.memory.register('frames', self.scanner.frame_pool.nbytes)
+        self.memory.register('preview', self.preview_nbytes)
+        self.memory.register('codes', self.codes_found.nbytes)
+        self.memory.register('metrics', self.metrics.nbytes)
+        
+        # Remember how far each export destination is up to date
+        self.export_marks = ExportMarks(self.config.data_path(EXPORT_MARKS_FILE))
+        self.last_export_path = None
         
         # Define constants
         self.all_codes_option = "All Codes (Complete Export)"
@@ -531,22 +1112,55 @@ class MainWindow(QMainWindow):
         
         # Configure main window
         self.setup_window()
+        self.setup_menu()
         
         # Setup status bar with better styling
-        self.statusBar().setStyleSheet(f"""
-            QStatusBar {{
-                background-color: {POKEMON_COLORS['card_bg']};
-                color: {POKEMON_COLORS['text_secondary']};
-                padding: 8px 20px;
-                font-size: 13px;
-                border-top: 1px solid {POKEMON_COLORS['border']};
-            }}
-        """)
+        self.statusBar().setObjectName("main_status")
         self.statusBar().showMessage("Ready to scan Pokémon TCG codes")
         
+        # Redemption queue counts, kept at the right of the status bar
+        self.queue_label = QLabel()
+        self.queue_label.setObjectName("queue_label")
+        self.statusBar().addPermanentWidget(self.queue_label)
+        self.update_queue_counts()
+        
         # Update the UI state initially
         self.update_ui()
         
+        # F3 toggles the performance HUD
+        self.hud_shortcut = QShortcut(QKeySequence("F3"), self)
+        self.hud_shortcut.activated.connect(self.toggle_hud)
+        self.apply_metrics_settings()
+        
+        if self.config.debug_mode and self.config.profile_on_start:
+            self.start_profiling()
+        
+        # A replay starts on its own so runs are repeatable
+        if self.replay_path:
+            QTimer.singleShot(0, self.toggle_camera)
+            
+        # Pick up a redemption run that was interrupted, if the login was saved
+        if self.redemption_queue.unfinished() and self.config.redemption_url and \
+                self.config.username and self.config.password:
+            QTimer.singleShot(0, self.resume_redemption)
+            
+        # The window is built; its first paint is timed when Qt draws the contents
+        built = time.perf_counter()
+        self.startup_times['construct'] = (built - constructing) * 1000
+        self.startup_times['window'] = (built - self.started) * 1000
+        self.metrics.set_gauge('startup_window_ms', self.startup_times['window'])
+        self.centralWidget().installEventFilter(self)
+        
+    def eventFilter(self, watched, event):
+        """Time the first paint of the window contents."""
+        if event.type() == QEvent.Paint and watched is self.centralWidget():
+            watched.removeEventFilter(self)
+            elapsed = (time.perf_counter() - self.started) * 1000
+            self.startup_times['first_paint'] = elapsed
+            self.metrics.set_gauge('startup_first_paint_ms', elapsed)
+            self.first_painted.emit(elapsed)
+        return super().eventFilter(watched, event)
+        
     def setup_window(self):
         """Setup the main window layout and components."""
         # Create central widget and main layout
@@ -562,45 +1176,20 @@ class MainWindow(QMainWindow):
         
         # App title
         app_title = QLabel("CodeDex Pro")
-        app_title.setStyleSheet(f"""
-            font-size: 20px;
-            font-weight: 700;
-            color: {POKEMON_COLORS['primary']};
-            letter-spacing: 0.5px;
-        """)
+        app_title.setObjectName("app_title")
         header_layout.addWidget(app_title)
         
         header_layout.addStretch()
         
         app_description = QLabel("Professional TCG Code Scanner")
-        app_description.setStyleSheet(f"""
-            font-size: 14px;
-            color: {POKEMON_COLORS['text_secondary']};
-            font-weight: 500;
-        """)
+        app_description.setObjectName("app_description")
         header_layout.addWidget(app_description)
         
         header_layout.addStretch()
         
         # Settings button
         self.settings_button = QPushButton("Settings")
-        self.settings_button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {POKEMON_COLORS['primary']};
-                color: white;
-                border-radius: 4px;
-                padding: 6px 12px;
-                font-weight: 600;
-                font-size: 12px;
-                min-height: 14px;
-            }}
-            QPushButton:hover {{
-                background-color: #FF4F45;
-            }}
-            QPushButton:pressed {{
-                background-color: #E6352B;
-            }}
-        """)
+        self.settings_button.setObjectName("settings_button")
         self.settings_button.clicked.connect(self.show_settings_dialog)
         header_layout.addWidget(self.settings_button)
         
@@ -614,13 +1203,6 @@ class MainWindow(QMainWindow):
         # Left side - Camera and scanner controls
         scanner_card = QFrame()
         scanner_card.setObjectName("scanner_card")
-        scanner_card.setStyleSheet(f"""
-            #scanner_card {{
-                background-color: {POKEMON_COLORS['card_bg']};
-                border-radius: 12px;
-                border: 1px solid {POKEMON_COLORS['border']};
-            }}
-        """)
         scanner_layout = QVBoxLayout(scanner_card)
         scanner_layout.setContentsMargins(16, 16, 16, 16)
         scanner_layout.setSpacing(12)
@@ -631,12 +1213,7 @@ class MainWindow(QMainWindow):
         scanner_header.setSpacing(10)
         
         scanner_title = QLabel("Scanner")
-        scanner_title.setStyleSheet(f"""
-            font-size: 16px;
-            font-weight: 700;
-            color: {POKEMON_COLORS['accent']};
-            letter-spacing: 0.5px;
-        """)
+        scanner_title.setObjectName("section_title")
         scanner_header.addWidget(scanner_title)
         scanner_header.addStretch(1)
         
@@ -656,24 +1233,14 @@ class MainWindow(QMainWindow):
         
         # Camera view container
         camera_container = QFrame()
-        camera_container.setStyleSheet(f"""
-            background-color: {POKEMON_COLORS['background']};
-            border-radius: 10px;
-            border: 1px solid {POKEMON_COLORS['border']};
-            padding: 0;
-        """)
+        camera_container.setObjectName("camera_container")
         camera_layout = QVBoxLayout(camera_container)
         camera_layout.setContentsMargins(0, 0, 0, 0)
         
         self.camera_label = QLabel()
         self.camera_label.setAlignment(Qt.AlignCenter)
         self.camera_label.setMinimumSize(480, 360)
-        self.camera_label.setStyleSheet(f"""
-            background-color: {POKEMON_COLORS['background']};
-            border-radius: 9px;
-            padding: 0;
-            margin: 0;
-        """)
+        self.camera_label.setObjectName("camera_view")
         camera_layout.addWidget(self.camera_label)
         
         # If no placeholder image, create a blank dark background
@@ -683,20 +1250,18 @@ class MainWindow(QMainWindow):
         self.camera_off_indicator = QLabel("Camera Off")
         self.camera_off_indicator.setAlignment(Qt.AlignCenter)
         self.camera_off_indicator.setFixedSize(150, 40)
-        self.camera_off_indicator.setStyleSheet(f"""
-            color: {POKEMON_COLORS['text_secondary']};
-            font-size: 14px;
-            font-weight: 600;
-            background-color: rgba(18, 18, 20, 0.8);
-            border-radius: 6px;
-            padding: 8px 16px;
-            border: 1px solid {POKEMON_COLORS['border']};
-        """)
+        self.camera_off_indicator.setObjectName("camera_off")
         self.camera_off_indicator.setParent(self.camera_label)
         
         # Position in center initially
         self.center_camera_off_indicator()
         self.camera_off_indicator.show()
+        
+        # Performance HUD overlay in the top-left corner of the camera view
+        self.hud_label = QLabel(self.camera_label)
+        self.hud_label.setObjectName("hud")
+        self.hud_label.move(10, 10)
+        self.hud_label.hide()
             
         # Update indicator position when camera view is resized
         self.camera_label.resizeEvent = lambda event: self.on_camera_resize(event)
@@ -710,59 +1275,13 @@ class MainWindow(QMainWindow):
         
         # Start Camera button (primary action)
         self.start_button = QPushButton("Start Camera")
-        self.start_button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {POKEMON_COLORS['secondary']};
-                color: white;
-                border-radius: 4px;
-                padding: 8px 12px;
-                font-weight: 600;
-                min-width: 100px;
-                min-height: 14px;
-                font-size: 12px;
-            }}
-            QPushButton:hover {{
-                background-color: #0A84FF;
-            }}
-            QPushButton:pressed {{
-                background-color: #0070EB;
-            }}
-            QPushButton:disabled {{
-                background-color: {POKEMON_COLORS['surface']};
-                color: {POKEMON_COLORS['text_disabled']};
-            }}
-        """)
+        self.start_button.setObjectName("start_button")
         self.start_button.clicked.connect(self.toggle_camera)
         scanner_controls.addWidget(self.start_button)
         
         # Scan QR Code button (secondary action with more subtle styling)
         self.scan_button = QPushButton("Scan QR Code")
-        self.scan_button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {POKEMON_COLORS['card_bg']};
-                color: {POKEMON_COLORS['text']};
-                border: 1px solid {POKEMON_COLORS['border']};
-                border-radius: 4px;
-                padding: 8px 12px;
-                font-weight: 600;
-                min-width: 100px;
-                min-height: 14px;
-                font-size: 12px;
-            }}
-            QPushButton:hover {{
-                background-color: {POKEMON_COLORS['surface']};
-                border-color: {POKEMON_COLORS['border_light']};
-            }}
-            QPushButton:pressed {{
-                background-color: {POKEMON_COLORS['surface']};
-                border-color: {POKEMON_COLORS['border_focus']};
-            }}
-            QPushButton:disabled {{
-                background-color: {POKEMON_COLORS['card_bg']};
-                color: {POKEMON_COLORS['text_disabled']};
-                border-color: {POKEMON_COLORS['border']};
-            }}
-        """)
+        self.scan_button.setObjectName("scan_button")
         self.scan_button.clicked.connect(self.scan_qr_code)
         self.scan_button.setEnabled(False)
         scanner_controls.addWidget(self.scan_button)
@@ -773,13 +1292,6 @@ class MainWindow(QMainWindow):
         # Right side - Codes list and controls
         codes_card = QFrame()
         codes_card.setObjectName("codes_card")
-        codes_card.setStyleSheet(f"""
-            #codes_card {{
-                background-color: {POKEMON_COLORS['card_bg']};
-                border-radius: 12px;
-                border: 1px solid {POKEMON_COLORS['border']};
-            }}
-        """)
         codes_layout = QVBoxLayout(codes_card)
         codes_layout.setContentsMargins(16, 16, 16, 16)
         codes_layout.setSpacing(12)
@@ -790,12 +1302,7 @@ class MainWindow(QMainWindow):
         codes_header.setSpacing(10)
         
         codes_title = QLabel("Pokémon Codes")
-        codes_title.setStyleSheet(f"""
-            font-size: 16px;
-            font-weight: 700;
-            color: {POKEMON_COLORS['accent']};
-            letter-spacing: 0.5px;
-        """)
+        codes_title.setObjectName("section_title")
         codes_header.addWidget(codes_title)
         codes_header.addStretch()
         
@@ -803,36 +1310,7 @@ class MainWindow(QMainWindow):
         
         # Create tab widget for different code views
         self.code_tabs = QTabWidget()
-        self.code_tabs.setStyleSheet(f"""
-            QTabWidget::pane {{
-                border: none;
-                background-color: transparent;
-                top: 0px;
-            }}
-            QTabBar {{
-                background-color: transparent;
-                alignment: center;
-            }}
-            QTabBar::tab {{
-                background-color: transparent;
-                color: {POKEMON_COLORS['text_secondary']};
-                padding: 10px 16px;
-                margin-right: 4px;
-                font-weight: 600;
-                font-size: 14px;
-                min-height: 20px;
-                min-width: 110px;
-                border-bottom: 2px solid transparent;
-            }}
-            QTabBar::tab:selected {{
-                color: {POKEMON_COLORS['accent']};
-                border-bottom: 2px solid {POKEMON_COLORS['accent']};
-            }}
-            QTabBar::tab:!selected:hover {{
-                color: {POKEMON_COLORS['text']};
-                border-bottom: 2px solid {POKEMON_COLORS['border_light']};
-            }}
-        """)
+        self.code_tabs.setObjectName("code_tabs")
         
         # Tab 1: All codes list
         self.all_codes_widget = QWidget()
@@ -841,31 +1319,11 @@ class MainWindow(QMainWindow):
         all_codes_layout.setSpacing(16)
         
         # Codes list with improved styling
-        self.codes_list = QListWidget()
-        self.codes_list.setSelectionMode(QListWidget.ExtendedSelection)
-        self.codes_list.setStyleSheet(f"""
-            QListWidget {{
-                background-color: {POKEMON_COLORS['input_bg']};
-                color: {POKEMON_COLORS['text']};
-                border: 1px solid rgba(50, 50, 56, 0.4);
-                border-radius: 8px;
-                padding: 4px;
-                font-family: 'SF Mono', 'Menlo', 'Consolas', 'Courier New', monospace;
-                font-size: 13px;
-                line-height: 1.4;
-            }}
-            QListWidget::item {{
-                padding: 10px 12px;
-                border-bottom: 1px solid rgba(50, 50, 56, 0.4);
-                margin: 0;
-                border-radius: 0;
-            }}
-            QListWidget::item:selected {{
-                background-color: rgba(0, 122, 255, 0.15);
-                color: {POKEMON_COLORS['text']};
-                border-left: 2px solid {POKEMON_COLORS['secondary']};
-            }}
-        """)
+        self.codes_list = QListView()
+        self.codes_list.setModel(self.code_model)
+        self.codes_list.setUniformItemSizes(True)
+        self.codes_list.setSelectionMode(QListView.ExtendedSelection)
+        self.codes_list.setObjectName("codes_list")
         all_codes_layout.addWidget(self.codes_list)
         
         # Buttons row
@@ -873,36 +1331,27 @@ class MainWindow(QMainWindow):
         all_codes_buttons.setSpacing(6)
         all_codes_buttons.setContentsMargins(0, 8, 0, 0)
         
-        # Button styling helper function
-        def style_button(button, bg_color, hover_color, pressed_color, text_color="#FFFFFF", is_primary=False):
-            button.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: {bg_color};
-                    color: {text_color};
-                    border-radius: 4px;
-                    padding: {6 if not is_primary else 8}px {8 if not is_primary else 12}px;
-                    font-weight: 600;
-                    min-width: {60 if not is_primary else 80}px;
-                    min-height: 14px;
-                    font-size: 12px;
-                }}
-                QPushButton:hover {{
-                    background-color: {hover_color};
-                }}
-                QPushButton:pressed {{
-                    background-color: {pressed_color};
-                }}
-            """)
-        
         # Create left side buttons
         left_buttons = QHBoxLayout()
         left_buttons.setSpacing(6)
         
         self.add_manual_button = QPushButton("Add Code")
-        style_button(self.add_manual_button, POKEMON_COLORS['primary'], "#FF4F45", "#E6352B", is_primary=True)
+        style_button(self.add_manual_button, 'primary', large=True)
         self.add_manual_button.clicked.connect(self.add_code_manually)
         left_buttons.addWidget(self.add_manual_button)
         
+        self.check_button = QPushButton("Check Status")
+        style_button(self.check_button, 'secondary', large=True)
+        self.check_button.setToolTip("Look up which unchecked codes are unused, already redeemed or invalid")
+        self.check_button.clicked.connect(self.check_codes)
+        left_buttons.addWidget(self.check_button)
+        
+        self.redeem_button = QPushButton("Redeem")
+        style_button(self.redeem_button, 'success', large=True)
+        self.redeem_button.setToolTip("Submit codes that have not been redeemed yet to the redemption service")
+        self.redeem_button.clicked.connect(self.redeem_codes)
+        left_buttons.addWidget(self.redeem_button)
+        
         # Add left buttons to main button row
         all_codes_buttons.addLayout(left_buttons)
         
@@ -914,34 +1363,58 @@ class MainWindow(QMainWindow):
         right_buttons.setSpacing(6)
         
         self.clear_button = QPushButton("Clear All")
-        style_button(self.clear_button, POKEMON_COLORS['surface'], POKEMON_COLORS['hover'], POKEMON_COLORS['active'], POKEMON_COLORS['text'])
+        style_button(self.clear_button, 'neutral')
         self.clear_button.clicked.connect(self.clear_codes)
         right_buttons.addWidget(self.clear_button)
         
         self.copy_all_button = QPushButton("Copy All")
-        style_button(self.copy_all_button, POKEMON_COLORS['surface'], POKEMON_COLORS['hover'], POKEMON_COLORS['active'], POKEMON_COLORS['text'])
+        style_button(self.copy_all_button, 'neutral')
         self.copy_all_button.clicked.connect(self.copy_all_codes)
         right_buttons.addWidget(self.copy_all_button)
         
         # Create export buttons with minimal spacing
         self.export_txt_button = QPushButton("Export TXT")
-        style_button(self.export_txt_button, POKEMON_COLORS['secondary'], "#0A84FF", "#0070EB", POKEMON_COLORS['text'])
+        style_button(self.export_txt_button, 'secondary')
         self.export_txt_button.clicked.connect(self.export_to_txt)
         right_buttons.addWidget(self.export_txt_button)
         
         self.export_md_button = QPushButton("Export MD")
-        style_button(self.export_md_button, POKEMON_COLORS['secondary'], "#0A84FF", "#0070EB", POKEMON_COLORS['text'])
+        style_button(self.export_md_button, 'secondary')
         self.export_md_button.clicked.connect(self.export_to_md)
         right_buttons.addWidget(self.export_md_button)
         
+        self.export_new_button = QPushButton("Export New")
+        style_button(self.export_new_button, 'secondary')
+        self.export_new_button.setToolTip("Export only the codes added since the last export to a file")
+        self.export_new_button.clicked.connect(self.export_new_since_last)
+        right_buttons.addWidget(self.export_new_button)
+        
         # Add right buttons to main button row
         all_codes_buttons.addLayout(right_buttons)
         
         all_codes_layout.addLayout(all_codes_buttons)
         self.code_tabs.addTab(self.all_codes_widget, "All Codes")
         
-        # Tab 2: Code blocks
+        # Tab 2: Code blocks, built the first time it is shown
         self.blocks_widget = QWidget()
+        self.blocks_built = False
+        self.blocks_dirty = True
+        self.code_tabs.addTab(self.blocks_widget, "Code Blocks (0)")
+        self.code_tabs.currentChanged.connect(self.on_code_tab_changed)
+        
+        # Add the code_tabs to the codes_layout
+        codes_layout.addWidget(self.code_tabs)
+        
+        # Add to main layout
+        content_layout.addWidget(codes_card, 1)
+        
+        main_layout.addLayout(content_layout)
+        
+        # Set the central widget
+        self.setCentralWidget(central_widget)
+        
+    def build_blocks_tab(self):
+        """Build the contents of the code blocks tab."""
         blocks_layout = QVBoxLayout(self.blocks_widget)
         blocks_layout.setContentsMargins(0, 16, 0, 0)
         blocks_layout.setSpacing(16)
@@ -958,64 +1431,12 @@ class MainWindow(QMainWindow):
         block_combo_container.setContentsMargins(0, 0, 0, 0)
         
         block_label = QLabel("Select Block:")
-        block_label.setStyleSheet(f"""
-            font-size: 13px;
-            font-weight: 600;
-            color: {POKEMON_COLORS['text_secondary']};
-        """)
+        block_label.setObjectName("field_label")
         block_combo_container.addWidget(block_label)
         
         # Initialize block selector with proper sizing
         self.block_selector = QComboBox()
-        self.block_selector.setStyleSheet(f"""
-            QComboBox {{
-                background-color: {POKEMON_COLORS['input_bg']};
-                color: {POKEMON_COLORS['text']};
-                border: 1px solid {POKEMON_COLORS['border']};
-                border-radius: 6px;
-                padding: 8px 12px;
-                font-size: 13px;
-                font-weight: 500;
-                selection-background-color: {POKEMON_COLORS['surface']};
-                selection-color: {POKEMON_COLORS['text']};
-            }}
-            QComboBox:hover {{
-                border-color: {POKEMON_COLORS['accent']};
-                background-color: {POKEMON_COLORS['surface']};
-            }}
-            QComboBox:on {{
-                border-color: {POKEMON_COLORS['accent']};
-                background-color: {POKEMON_COLORS['surface']};
-            }}
-            QComboBox::drop-down {{
-                subcontrol-origin: padding;
-                subcontrol-position: right center;
-                width: 24px;
-                background-color: transparent;
-            }}
-            QComboBox QAbstractItemView {{
-                background-color: {POKEMON_COLORS['card_bg']};
-                color: {POKEMON_COLORS['text']};
-                border: 2px solid {POKEMON_COLORS['accent']};
-                border-radius: 6px;
-                selection-background-color: {POKEMON_COLORS['secondary']};
-                selection-color: white;
-                padding: 6px;
-                outline: 0px;
-            }}
-            QComboBox QAbstractItemView::item {{
-                padding: 8px 10px;
-                min-height: 22px;
-                border-radius: 4px;
-                margin: 2px 4px;
-            }}
-            QComboBox QAbstractItemView::item:selected {{
-                background-color: {POKEMON_COLORS['secondary']};
-            }}
-            QComboBox QAbstractItemView::item:hover:!selected {{
-                background-color: {POKEMON_COLORS['hover']};
-            }}
-        """)
+        self.block_selector.setObjectName("block_combo")
         self.block_selector.currentIndexChanged.connect(self.format_selector_changed)
         self.block_selector.setFixedHeight(34)  # Fixed height for consistent sizing
         block_combo_container.addWidget(self.block_selector)
@@ -1026,70 +1447,13 @@ class MainWindow(QMainWindow):
         format_combo_container.setContentsMargins(0, 0, 0, 0)
         
         format_label = QLabel("Format:")
-        format_label.setStyleSheet(f"""
-            font-size: 13px;
-            font-weight: 600;
-            color: {POKEMON_COLORS['text_secondary']};
-        """)
+        format_label.setObjectName("field_label")
         format_combo_container.addWidget(format_label)
         
         # Initialize format selector with matching sizing
         self.format_selector = QComboBox()
-        self.format_selector.setStyleSheet(f"""
-            QComboBox {{
-                background-color: {POKEMON_COLORS['input_bg']};
-                color: {POKEMON_COLORS['text']};
-                border: 1px solid {POKEMON_COLORS['border']};
-                border-radius: 6px;
-                padding: 8px 12px;
-                font-size: 13px;
-                font-weight: 500;
-                selection-background-color: {POKEMON_COLORS['surface']};
-                selection-color: {POKEMON_COLORS['text']};
-            }}
-            QComboBox:hover {{
-                border-color: {POKEMON_COLORS['accent']};
-                background-color: {POKEMON_COLORS['surface']};
-            }}
-            QComboBox:on {{
-                border-color: {POKEMON_COLORS['accent']};
-                background-color: {POKEMON_COLORS['surface']};
-            }}
-            QComboBox::drop-down {{
-                subcontrol-origin: padding;
-                subcontrol-position: right center;
-                width: 24px;
-                background-color: transparent;
-            }}
-            QComboBox QAbstractItemView {{
-                background-color: {POKEMON_COLORS['card_bg']};
-                color: {POKEMON_COLORS['text']};
-                border: 2px solid {POKEMON_COLORS['accent']};
-                border-radius: 6px;
-                selection-background-color: {POKEMON_COLORS['secondary']};
-                selection-color: white;
-                padding: 6px;
-                outline: 0px;
-            }}
-            QComboBox QAbstractItemView::item {{
-                padding: 8px 10px;
-                min-height: 22px;
-                border-radius: 4px;
-                margin: 2px 4px;
-            }}
-            QComboBox QAbstractItemView::item:selected {{
-                background-color: {POKEMON_COLORS['secondary']};
-            }}
-            QComboBox QAbstractItemView::item:hover:!selected {{
-                background-color: {POKEMON_COLORS['hover']};
-            }}
-        """)
-        self.format_selector.addItems([
-            "Numbered List",
-            "Raw Codes (One per line)",
-            "Space-Separated",
-            "Comma-Separated"
-        ])
+        self.format_selector.setObjectName("block_combo")
+        self.format_selector.addItems(FORMATS)
         self.format_selector.currentIndexChanged.connect(self.format_selector_changed)
         self.format_selector.setFixedHeight(34)  # Fixed height for consistent sizing
         format_combo_container.addWidget(self.format_selector)
@@ -1103,18 +1467,7 @@ class MainWindow(QMainWindow):
         # Block display with improved styling
         self.block_display = QTextEdit()
         self.block_display.setReadOnly(True)
-        self.block_display.setStyleSheet(f"""
-            QTextEdit {{
-                background-color: {POKEMON_COLORS['input_bg']};
-                color: {POKEMON_COLORS['text']};
-                border: 1px solid {POKEMON_COLORS['border']};
-                border-radius: 8px;
-                padding: 12px 16px;
-                font-family: 'Menlo', 'SF Mono', 'Consolas', 'Courier New', monospace;
-                font-size: 13px;
-                line-height: 1.5;
-            }}
-        """)
+        self.block_display.setObjectName("block_display")
         blocks_layout.addWidget(self.block_display)
         
         # Copy and export buttons
@@ -1128,70 +1481,95 @@ class MainWindow(QMainWindow):
         button_group.setSpacing(6)
         
         self.copy_block_button = QPushButton("Copy Block")
-        style_button(self.copy_block_button, POKEMON_COLORS['surface'], POKEMON_COLORS['hover'], POKEMON_COLORS['active'], POKEMON_COLORS['text'])
+        style_button(self.copy_block_button, 'neutral')
         self.copy_block_button.clicked.connect(self.copy_current_block)
         button_group.addWidget(self.copy_block_button)
         
         # Add export buttons
         self.export_block_txt_button = QPushButton("Export TXT")
-        style_button(self.export_block_txt_button, POKEMON_COLORS['secondary'], "#0A84FF", "#0070EB", POKEMON_COLORS['text'])
+        style_button(self.export_block_txt_button, 'secondary')
         self.export_block_txt_button.clicked.connect(self.export_to_txt)
         button_group.addWidget(self.export_block_txt_button)
         
         self.export_block_md_button = QPushButton("Export MD")
-        style_button(self.export_block_md_button, POKEMON_COLORS['secondary'], "#0A84FF", "#0070EB", POKEMON_COLORS['text'])
+        style_button(self.export_block_md_button, 'secondary')
         self.export_block_md_button.clicked.connect(self.export_to_md)
         button_group.addWidget(self.export_block_md_button)
         
         copy_layout.addLayout(button_group)
         
         blocks_layout.addLayout(copy_layout)
+        self.blocks_built = True
         
-        # Initialize the tab with correct count (0 if no codes yet)
-        self.code_tabs.addTab(self.blocks_widget, "Code Blocks (0)")
-        
-        # Add the code_tabs to the codes_layout
-        codes_layout.addWidget(self.code_tabs)
-        
-        # Add to main layout
-        content_layout.addWidget(codes_card, 1)
-        
-        main_layout.addLayout(content_layout)
-        
-        # Set the central widget
-        self.setCentralWidget(central_widget)
+    def on_code_tab_changed(self, index):
+        """Build the code blocks tab on first view and bring it up to date."""
+        if self.code_tabs.widget(index) is not self.blocks_widget:
+            return
+        if not self.blocks_built:
+            self.build_blocks_tab()
+        if self.blocks_dirty:
+            self.update_blocks()
         
+    def setup_menu(self):
+        """Setup the Tools menu."""
+        self.menuBar().setObjectName("main_menu")
+        tools_menu = self.menuBar().addMenu("Tools")
+        
+        hud_action = QAction("Performance HUD (F3)", self)
+        hud_action.triggered.connect(self.toggle_hud)
+        tools_menu.addAction(hud_action)
+        
+        self.profile_action = QAction("Start Profiling", self)
+        self.profile_action.triggered.connect(self.toggle_profiling)
+        tools_menu.addAction(self.profile_action)
+        self.update_profile_action()
+        
+    def update_profile_action(self):
+        """Enable the profiling action only in debug mode."""
+        self.profile_action.setText("Stop Profiling" if self.profiler.running else "Start Profiling")
+        self.profile_action.setEnabled(self.config.debug_mode or self.profiler.running)
+        if not self.config.debug_mode:
+            self.profile_action.setToolTip("Enable debug mode in Settings > Advanced to profile")
+        
+    def toggle_profiling(self):
+        """Start or stop the built-in profiler."""
+        if self.profiler.running:
+            self.stop_profiling()
+        else:
+            self.start_profiling()
+            
+    def start_profiling(self):
+        """Profile the session for the configured window."""
+        self.profiler.start()
+        self.profile_timer.start(self.config.profile_duration * 1000)
+        self.update_profile_action()
+        self.statusBar().showMessage(f"Profiling for up to {self.config.profile_duration} seconds...")
+        
+    def stop_profiling(self):
+        """Stop the profiler and report where the results were written."""
+        self.profile_timer.stop()
+        try:
+            paths = self.profiler.stop()
+        except Exception as e:
+            QMessageBox.critical(self, "Profiling Error", f"Failed to write profile: {str(e)}")
+            paths = None
+        self.update_profile_action()
+        if paths:
+            self.statusBar().showMessage(f"Profile written to {paths[0]} and {os.path.basename(paths[1])}")
+    
     def toggle_camera(self):
         """Start or stop the camera."""
         if self.capture_timer.isActive():
             self.capture_timer.stop()
             self.scan_timer.stop()  # Also stop the auto-scan timer
+            self.stop_camera_tuning()
+            self.card_tracker.clear()
             self.scanner.stop_camera()
+            self.release_preview()
             
             # Update UI with camera stopped state
             self.start_button.setText("Start Camera")
-            self.start_button.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: {POKEMON_COLORS['secondary']};
-                    color: white;
-                    border-radius: 4px;
-                    padding: 8px 12px;
-                    font-weight: 600;
-                    min-width: 100px;
-                    min-height: 14px;
-                    font-size: 12px;
-                }}
-                QPushButton:hover {{
-                    background-color: #0A84FF;
-                }}
-                QPushButton:pressed {{
-                    background-color: #0070EB;
-                }}
-                QPushButton:disabled {{
-                    background-color: {POKEMON_COLORS['surface']};
-                    color: {POKEMON_COLORS['text_disabled']};
-                }}
-            """)
+            set_state(self.start_button, 'running', False)
             
             self.scan_button.setEnabled(False)
             self.camera_status.set_status(False, "Camera Off")
@@ -1204,94 +1582,205 @@ class MainWindow(QMainWindow):
             
             # No need to set placeholder image if we're using the indicator overlay
             self.statusBar().showMessage("Camera stopped")
+        elif self.camera_worker is None:
+            # Hide the camera off indicator
+            if hasattr(self, 'camera_off_indicator'):
+                self.camera_off_indicator.hide()
+            
+            # Opening a device can take seconds, so do it off the GUI thread
+            self.start_button.setEnabled(False)
+            self.camera_status.set_pending("Starting Camera...")
+            self.statusBar().showMessage("Opening camera...")
+            
+            self.camera_worker = CameraOpenWorker(self.scanner, self.config.camera_index, self.probe_cache, self,
+                                                  self.replay_path, self.replay_speed, self.config.camera_tuning)
+            self.camera_worker.opened.connect(self.on_camera_opened)
+            self.camera_worker.finished.connect(self.on_camera_worker_finished)
+            self.camera_worker.start()
+    
+    def on_camera_opened(self, success):
+        """Finish starting the camera once the device has been opened."""
+        self.start_button.setEnabled(True)
+        
+        if not success:
+            self.camera_status.set_status(False, "Camera Unavailable")
+            if hasattr(self, 'camera_off_indicator'):
+                self.center_camera_off_indicator()
+                self.camera_off_indicator.show()
+            self.statusBar().showMessage("Camera could not be opened")
+            if self.replay_path:
+                QMessageBox.critical(self, "Replay Error", f"Failed to open recording {self.replay_path}.")
+            else:
+                QMessageBox.critical(self, "Camera Error",
+                                     f"Failed to start camera at index {self.config.camera_index}. "
+                                     "Use Settings > Camera > Detect Cameras to find available devices.")
+            return
+        
+        if self.scanner.is_replay():
+            self.replay_report = ReplayReport(self.scanner.cap)
+        elif self.record_path and not self.scanner.start_recording(self.record_path):
+            QMessageBox.warning(self, "Recording Error",
+                                f"Could not record to {self.record_path}; scanning without recording.")
+        self.start_camera_tuning()
+        
+        if self.replay_report is not None and self.replay_speed == 'max':
+            self.capture_timer.start(0)  # Read recorded frames as fast as the pipeline allows
         else:
-            try:
-                # Hide the camera off indicator
-                if hasattr(self, 'camera_off_indicator'):
-                    self.camera_off_indicator.hide()
-                
-                if self.scanner.start_camera(self.config.camera_index):
-                    self.capture_timer.start(30)  # 30ms refresh rate (approximately 33 FPS)
-                    
-                    # Only start auto-scan if enabled in settings
-                    if self.config.auto_detect:
-                        self.scan_timer.start(self.config.scan_interval)
-                    
-                    # Update UI with camera active state    
-                    self.start_button.setText("Stop Camera")
-                    self.start_button.setStyleSheet(f"""
-                        QPushButton {{
-                            background-color: {POKEMON_COLORS['error']};
-                            color: white;
-                            border-radius: 4px;
-                            padding: 8px 12px;
-                            font-weight: 600;
-                            min-width: 100px;
-                            min-height: 14px;
-                            font-size: 12px;
-                        }}
-                        QPushButton:hover {{
-                            background-color: #FF5F54;
-                        }}
-                        QPushButton:pressed {{
-                            background-color: #E63C34;
-                        }}
-                    """)
-                    
-                    self.scan_button.setEnabled(True)
-                    self.camera_status.set_status(True, "Camera Active")
-                    self.statusBar().showMessage("Camera active - scanning for QR codes")
-            except Exception as e:
-                QMessageBox.critical(self, "Camera Error", f"Failed to start camera: {str(e)}")
+            self.capture_timer.start(30)  # 30ms refresh rate (approximately 33 FPS)
+        
+        # Only start auto-scan if enabled in settings; a replay scans in update_frame
+        if self.config.auto_detect and self.replay_report is None:
+            self.scan_timer.start(self.config.scan_interval)
+        
+        # Update UI with camera active state    
+        self.start_button.setText("Stop Camera")
+        set_state(self.start_button, 'running', True)
+        
+        self.scan_button.setEnabled(True)
+        if self.replay_report is not None:
+            self.camera_status.set_status(True, "Replaying")
+            self.statusBar().showMessage(f"Replaying {self.replay_path} ({self.replay_speed} speed)")
+        else:
+            self.camera_status.set_status(True, "Camera Active")
+            self.statusBar().showMessage("Camera active - scanning for QR codes")
+        
+    def start_camera_tuning(self):
+        """Put exposure and focus of a live camera under closed-loop control if enabled."""
+        if self.camera_tuner is not None or not self.config.camera_tuning or self.scanner.is_replay():
+            return
+        controls = self.probe_cache.get_controls(self.config.camera_index)
+        try:
+            self.camera_tuner = CameraTuner(self.scanner.cap, controls, self.on_camera_tuned)
+        except Exception as e:
+            print(f"Error starting camera tuning: {e}")
+            
+    def stop_camera_tuning(self):
+        """Hand exposure and focus back to the camera driver."""
+        if self.camera_tuner is not None:
+            self.camera_tuner.stop()
+            self.camera_tuner = None
+            
+    def on_camera_tuned(self, controls):
+        """Save the values the camera tuner settled on for the next session."""
+        self.probe_cache.set_controls(self.config.camera_index, controls)
+        self.statusBar().showMessage(
+            "Camera tuned: " + ", ".join(f"{name} {value:g}" for name, value in controls.items())
+        )
+        
+    def on_camera_worker_finished(self):
+        """Release the camera worker once its thread has stopped."""
+        self.camera_worker.deleteLater()
+        self.camera_worker = None
     
     def update_frame(self):
         """Update the camera frame."""
         frame = self.scanner.get_frame()
         if frame is not None:
-            # Convert to RGB for Qt
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            with self.metrics.time('preview'):
+                self.show_frame(frame)
+            # A replay decodes every frame it reads, so its report measures the pipeline, not the scan timer
+            if self.replay_report is not None and self.config.auto_detect:
+                with self.metrics.time('auto_scan'):
+                    self.scan_frame(frame)
+        elif self.scanner.replay_finished():
+            self.finish_replay()
             
-            # Convert to QImage and then QPixmap
-            h, w, ch = rgb_frame.shape
-            bytes_per_line = ch * w
-            q_img = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            pixmap = QPixmap.fromImage(q_img)
-            
-            # Scale to fit while maintaining aspect ratio
-            pixmap = pixmap.scaled(self.camera_label.width(), self.camera_label.height(), 
-                                  Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    def finish_replay(self):
+        """Stop a finished replay and write its report next to the recording."""
+        if self.capture_timer.isActive():
+            self.toggle_camera()
+        if self.replay_report is None:
+            return
+        
+        summary = self.replay_report.summary()
+        report_path = self.replay_report.write()
+        self.replay_report = None
+        
+        message = (f"Replay finished: {summary['codes']} codes in {summary['wall_seconds']:.1f}s "
+                   f"({summary['codes_per_minute']:.1f}/min), report written to {report_path}")
+        print(message)
+        self.statusBar().showMessage(message)
+                
+    def show_frame(self, frame):
+        """
+        Display a captured frame in the camera view.
+        
+        The frame is scaled and converted in OpenCV into buffers that are
+        reused for every frame, and a single QPixmap is refilled from them,
+        so the preview allocates nothing new at the capture rate.
+        """
+        if frame is None:
+            return
             
-            # Display the image
-            self.camera_label.setPixmap(pixmap)
+        # Scale to fit while maintaining aspect ratio
+        h, w = frame.shape[:2]
+        scale = min(self.camera_label.width() / w, self.camera_label.height() / h)
+        size = (max(int(w * scale), 1), max(int(h * scale), 1))
+        if self.preview_bgr is None or self.preview_bgr.shape[1::-1] != size:
+            self.release_preview()
+            self.preview_bgr = np.empty((size[1], size[0], 3), np.uint8)
+            self.preview_rgb = np.empty((size[1], size[0], 3), np.uint8)
+        cv2.resize(frame, size, dst=self.preview_bgr, interpolation=cv2.INTER_AREA)
+        
+        # Convert to RGB for Qt
+        with self.metrics.time('cvtColor'):
+            cv2.cvtColor(self.preview_bgr, cv2.COLOR_BGR2RGB, dst=self.preview_rgb)
+        
+        # Refill the preview pixmap; the one the label showed is released when it takes the new one
+        q_img = QImage(self.preview_rgb.data, size[0], size[1], 3 * size[0], QImage.Format_RGB888)
+        self.preview_pixmap.convertFromImage(q_img)
+        self.camera_label.setPixmap(self.preview_pixmap)
+        
+    def release_preview(self):
+        """Free the preview buffers and the pixmap shown in the camera view."""
+        self.preview_bgr = None
+        self.preview_rgb = None
+        self.preview_pixmap = QPixmap()
+        self.camera_label.clear()
+        
+    def preview_nbytes(self):
+        """Memory held by the preview buffers and pixmap."""
+        size = 0
+        if self.preview_bgr is not None:
+            size += self.preview_bgr.nbytes + self.preview_rgb.nbytes
+        if not self.preview_pixmap.isNull():
+            size += self.preview_pixmap.width() * self.preview_pixmap.height() * self.preview_pixmap.depth() // 8
+        return size
     
     def auto_scan_qr_code(self):
         """Automatically scan for QR codes in the current frame."""
-        # Check cooldown to prevent rapid duplicate scans
-        current_time = time.time()
-        if current_time - self.last_scan_time < self.scan_cooldown:
-            return
-            
+        with self.metrics.time('auto_scan'):
+            self._auto_scan_qr_code()
+    
+    def _auto_scan_qr_code(self):
         frame = self.scanner.get_frame()
         if frame is not None:
-            qr_codes = self.scanner.scan_qr_code(frame)
+            self.scan_frame(frame)
             
-            if qr_codes:
-                code = qr_codes[0]['data']
-                
-                # Check if we've recently seen this code
-                if code in self.recently_scanned_codes:
-                    return
-                
-                # Update last scan time and recently scanned codes list
-                self.last_scan_time = current_time
-                self.recently_scanned_codes.append(code)
-                
-                # Keep the list to a maximum size
-                if len(self.recently_scanned_codes) > self.max_recent_codes:
-                    self.recently_scanned_codes.pop(0)
-                
-                self.statusBar().showMessage(f"QR code detected: {code}")
-                self.add_code(code)
+    def scan_frame(self, frame):
+        """Decode a frame and add the code of a card read for the first time."""
+        # A card that was already read is located but not decoded again
+        qr_codes = self.scanner.scan_qr_code(frame, self.card_tracker.covers)
+        quad = self.scanner.last_quad
+        tracked = self.scanner.last_outcome == 'tracked'
+        code = qr_codes[0]['data'] if qr_codes else None
+        if self.camera_tuner is not None:
+            # A tracked card was decoded when it came into view and keeps its region measured
+            self.camera_tuner.observe(frame, quad, tracked or code is not None)
+        if tracked:
+            return
+        
+        # Only a card read for the first time since it came into view is new
+        new_card = self.card_tracker.observe(frame, quad, code)
+        if code is None or (quad is not None and not new_card):
+            return
+            
+        # The same code read again shortly after, e.g. a card that moved too fast to track
+        if self.code_cooldown.check(code):
+            return
+            
+        self.statusBar().showMessage(f"QR code detected: {code}")
+        self.add_code(code)
     
     def scan_qr_code(self):
         """Manually scan for QR codes in the current frame."""
@@ -1315,53 +1804,99 @@ class MainWindow(QMainWindow):
     
     def add_code(self, code):
         """Add a code to the list."""
-        if code and code not in self.codes_found:
-            self.codes_found.append(code)
-            self.codes_list.addItem(code)
+        if self.code_model.add_code(code):
+            self.metrics.count('code')
+            if self.replay_report is not None:
+                self.replay_report.code_accepted(code)
+            
+            # Codes queued or checked in an earlier session show their state right away
+            entry = self.redemption_queue.get(code)
+            cached = self.status_cache.get(code) if entry is None else None
+            if entry is not None:
+                self.code_model.set_status(code, display_status(entry), entry['message'])
+            elif cached is not None:
+                self.code_model.set_status(code, cached['status'], cached['message'])
+            if self.event_server is not None:
+                self.event_server.publish_code(code, self.codes_found.position(code))
+            if self.collector_uplink is not None:
+                self.collector_uplink.push([code], self.codes_found.session_id)
             self.statusBar().showMessage(f"Found {len(self.codes_found)} codes")
             
             # Enable buttons if we have codes
             self.update_ui()
-            
-            # Update the blocks tab
-            self.update_blocks()
     
     def clear_codes(self):
         """Clear the list of found codes."""
-        self.codes_found = []
-        self.codes_list.clear()
+        self.code_model.clear()
+        if self.event_server is not None:
+            self.event_server.publish_session()
         self.statusBar().showMessage("All codes cleared")
-        self.update_blocks()
         self.update_ui()
         
     def update_blocks(self):
-        """Update the code blocks."""
-        # Clear the current block selector
-        self.block_selector.clear()
-        
-        if not self.codes_found:
-            self.block_display.setText("No codes found")
-            self.copy_block_button.setEnabled(False)
-            self.code_tabs.setTabText(1, "Code Blocks (0)")
+        """Update the code blocks tab, or mark it out of date while it is not shown."""
+        self.code_tabs.setTabText(1, f"Code Blocks ({len(self.codes_found)})")
+        if not self.blocks_built or self.code_tabs.currentWidget() is not self.blocks_widget:
+            # Rendering blocks nobody is looking at would slow down every scan
+            self.blocks_dirty = True
+            return
+        self.blocks_dirty = False
+        
+        has_codes = bool(self.codes_found)
+        set_state(self.block_display, 'empty', not has_codes)
+        self.copy_block_button.setEnabled(has_codes)
+        self.export_block_txt_button.setEnabled(has_codes)
+        self.export_block_md_button.setEnabled(has_codes)
+        if not has_codes:
+            self.block_selector.clear()
+            self.block_display.setText("No codes to display. Scan QR codes to see them formatted here.")
+            self.block_display.setAlignment(Qt.AlignCenter)
             return
-            
-        # Add "All Codes" option first
-        self.block_selector.addItem(self.all_codes_option)
-            
-        # Split codes into blocks of 10
-        num_blocks = (len(self.codes_found) + 9) // 10
         
-        for i in range(num_blocks):
-            start_idx = i * 10 + 1
-            end_idx = min((i + 1) * 10, len(self.codes_found))
-            self.block_selector.addItem(f"Block {i+1} (Codes {start_idx}-{end_idx})")
+        # Only touch the entries that changed so the current selection survives
+        self.block_selector.blockSignals(True)
+        if self.block_selector.count() == 0:
+            # Add "All Codes" option first
+            self.block_selector.addItem(self.all_codes_option)
+        
+        num_blocks = self.codes_found.block_count()
+        while self.block_selector.count() - 1 > num_blocks:
+            self.block_selector.removeItem(self.block_selector.count() - 1)
+        
+        # The last existing block may have grown, so refresh its label too
+        first_changed = max(self.block_selector.count() - 2, 0)
+        for i in range(first_changed, num_blocks):
+            start_idx, end_idx = self.codes_found.block_range(i)
+            label = f"Block {i+1} (Codes {start_idx}-{end_idx})"
+            if i + 1 < self.block_selector.count():
+                self.block_selector.setItemText(i + 1, label)
+            else:
+                self.block_selector.addItem(label)
+        self.block_selector.blockSignals(False)
         
-        # Display the first block
-        self.update_block_display(0)
-        self.copy_block_button.setEnabled(True)
+        self.update_block_display(self.block_selector.currentIndex())
+    
+    def render_selected_block(self, index):
+        """
+        Render the block chosen in the block selector.
         
-        # Update the tab title with count
-        self.code_tabs.setTabText(1, f"Code Blocks ({len(self.codes_found)})")
+        Args:
+            index: Index in the block selector
+            
+        Returns:
+            Tuple of (block name, number of codes, formatted text)
+        """
+        formatter = self.codes_found.formatter
+        format_type = self.format_selector.currentText()
+        
+        # Check if the "All Codes" option is selected
+        if index == 0:
+            return "All Codes", len(self.codes_found), formatter.render_all(format_type)
+        
+        # Entries after "All Codes" map one-to-one onto blocks
+        block_index = index - 1
+        block_codes = len(self.codes_found.block(block_index))
+        return f"Block {block_index+1}", block_codes, formatter.render_block(block_index, format_type)
     
     def update_block_display(self, index=0):
         """Update the displayed block of codes."""
@@ -1369,41 +1904,13 @@ class MainWindow(QMainWindow):
             self.block_display.setText("No codes in this block")
             return
             
-        # Initialize start_idx to 0 as default
-        start_idx = 0
-            
-        # Check if the "All Codes" option is selected
-        if index == 0 and self.block_selector.currentText() == self.all_codes_option:
-            block_codes = self.codes_found
-            # start_idx is already 0 for All Codes
-        else:
-            # Calculate the actual block index (offset by 1 if All Codes option exists)
-            actual_index = index - 1 if self.block_selector.itemText(0) == self.all_codes_option else index
-            start_idx = actual_index * 10
-            end_idx = min(start_idx + 10, len(self.codes_found))
-            block_codes = self.codes_found[start_idx:end_idx]
-        
+        _, block_codes, text = self.render_selected_block(index)
         if not block_codes:
             self.block_display.setText("No codes in this block")
             return
             
-        # Get the selected format
-        format_type = self.format_selector.currentText()
-        
-        # Format the codes based on selected format
-        if format_type == "Numbered List":
-            text = "--- Pokémon TCG Codes (copy this block) ---\n\n"
-            for i, code in enumerate(block_codes):
-                text += f"{start_idx + i + 1}. {code}\n"
-                
-        elif format_type == "Raw Codes (One per line)":
-            text = "\n".join(block_codes)
-            
-        elif format_type == "Space-Separated":
-            text = " ".join(block_codes)
-            
-        elif format_type == "Comma-Separated":
-            text = ",".join(block_codes)
+        if self.format_selector.currentText() == FORMAT_NUMBERED:
+            text = "--- Pokémon TCG Codes (copy this block) ---\n\n" + text
             
         self.block_display.setText(text)
     
@@ -1414,7 +1921,7 @@ class MainWindow(QMainWindow):
             return
             
         # Format all codes for clipboard
-        text = "\n".join(self.codes_found)
+        text = self.codes_found.formatter.render_all(FORMAT_RAW)
         
         # Copy to clipboard
         clipboard = QApplication.clipboard()
@@ -1429,224 +1936,334 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "No Codes", "No codes available to copy.")
             return
             
-        # Check if the "All Codes" option is selected
-        if current_index == 0 and self.block_selector.currentText() == self.all_codes_option:
-            block_codes = self.codes_found
-            current_block_name = "All Codes"
-        else:
-            # Calculate the actual block index (offset by 1 if All Codes option exists)
-            actual_index = current_index - 1 if self.block_selector.itemText(0) == self.all_codes_option else current_index
-            start_idx = actual_index * 10
-            end_idx = min(start_idx + 10, len(self.codes_found))
-            block_codes = self.codes_found[start_idx:end_idx]
-            current_block_name = f"Block {actual_index+1}"
-        
+        current_block_name, block_codes, text = self.render_selected_block(current_index)
         if not block_codes:
             QMessageBox.information(self, "No Codes", "No codes in this block.")
             return
             
-        # Format the codes based on selected format
         format_type = self.format_selector.currentText()
         
-        if format_type == "Numbered List":
-            text = ""
-            for i, code in enumerate(block_codes):
-                if current_block_name == "All Codes":
-                    text += f"{i + 1}. {code}\n"
-                else:
-                    start_idx = actual_index * 10
-                    text += f"{start_idx + i + 1}. {code}\n"
-        elif format_type == "Raw Codes (One per line)":
-            text = "\n".join(block_codes)
-        elif format_type == "Space-Separated":
-            text = " ".join(block_codes)
-        else:  # Comma-Separated
-            text = ",".join(block_codes)
-        
         # Copy to clipboard
         clipboard = QApplication.clipboard()
         clipboard.setText(text)
         
-        self.statusBar().showMessage(f"Copied {len(block_codes)} codes to clipboard")
+        self.statusBar().showMessage(f"Copied {block_codes} codes to clipboard")
         
         QMessageBox.information(self, "Block Copied", 
-                              f"{current_block_name} ({len(block_codes)} codes) copied to clipboard in {format_type} format")
+                              f"{current_block_name} ({block_codes} codes) copied to clipboard in {format_type} format")
     
     def show_settings_dialog(self):
         """Show the settings dialog."""
-        dialog = SettingsDialog(self, self.config)
+        dialog = SettingsDialog(self, self.config, self.probe_cache)
         
         if dialog.exec_():
-            settings = dialog.get_settings()
-            
-            # Update settings
-            for key, value in settings.items():
-                self.config.update_setting(key, value)
+            # Update settings, saved to disk in a single write
+            changed = self.config.update_settings(dialog.get_settings())
+            self.apply_settings(changed)
+                
+            self.statusBar().showMessage("Settings updated")
+            self.update_ui()
+    
+    def apply_settings(self, changed):
+        """
+        Apply changed settings to the running pipeline.
+        
+        Only device-level settings reopen the camera; everything else is
+        applied in place.
+        
+        Args:
+            changed: Set of setting keys whose value changed
+        """
+        camera_running = self.capture_timer.isActive()
+        
+        # Update local instance variables based on new settings
+        self.code_cooldown.configure(self.config.scan_cooldown, self.config.cooldown_capacity)
+        self.scanner.apply_settings(self.config)
+        
+        self.apply_metrics_settings()
+        self.update_profile_action()
+        if changed & THREAD_SETTINGS:
+            self.apply_thread_budget()
+        if changed & EVENT_SETTINGS:
+            self.apply_event_server()
+        if changed & COLLECTOR_SETTINGS:
+            self.apply_collector()
+        
+        if camera_running and changed & DEVICE_SETTINGS:
+            # The reopened camera starts its timers from the new settings
+            self.toggle_camera()  # Stop
+            self.toggle_camera()  # Start
+        elif camera_running:
+            if 'camera_tuning' in changed:
+                if self.config.camera_tuning:
+                    self.start_camera_tuning()
+                else:
+                    self.stop_camera_tuning()
+            if not self.config.auto_detect:
+                self.scan_timer.stop()
+            elif not self.scan_timer.isActive() and self.replay_report is None:
+                self.scan_timer.start(self.config.scan_interval)
+            elif 'scan_interval' in changed:
+                self.scan_timer.setInterval(self.config.scan_interval)
+    
+    def apply_thread_budget(self):
+        """Share the cores out again after the thread settings changed."""
+        self.affinity_timer.stop()
+        self.affinity_timer.timeout.disconnect()
+        if self.thread_budget.pin:
+            self.thread_budget.unpin()
+        self.thread_budget = ThreadBudget.from_config(self.config)
+        self.thread_plan = self.thread_budget.apply(self.scanner)
+        self.affinity_timer.timeout.connect(self.thread_budget.enforce)
+        if self.thread_budget.pin:
+            self.affinity_timer.start(2000)
             
-            # Update local instance variables based on new settings
-            self.scan_cooldown = self.config.scan_cooldown
+    def apply_event_server(self):
+        """Start, stop or move the scan event service to match the config."""
+        if self.event_server is not None:
+            self.event_server.stop()
+            self.event_server = None
+        if not self.config.event_server:
+            return
+        # Opt-in services are imported when enabled, so they add nothing to startup
+        from src.events import ScanEventServer
+        try:
+            self.event_server = ScanEventServer(self.codes_found, port=self.config.event_port).start()
+        except OSError as e:
+            print(f"Error starting scan event service: {e}")
+            self.statusBar().showMessage(f"Scan event service unavailable on port {self.config.event_port}")
             
-            # Update timers if active
-            if self.scan_timer.isActive():
-                self.scan_timer.stop()
-                if self.config.auto_detect:
-                    self.scan_timer.start(self.config.scan_interval)
+    def apply_collector(self):
+        """Connect to the collector in the config, or disconnect when there is none."""
+        if self.collector_worker is not None:
+            # A request still out finishes on its own; its answers are no longer shown
+            self.collector_worker.code_result.disconnect()
+            self.collector_worker.stop()
+            self.collector_worker = None
+            self.collector_uplink = None
+        if not self.config.collector_url:
+            return
+        
+        from src.collector import CollectorClient, StationUplink, UplinkQueue, UPLINK_QUEUE_FILE
+        client = CollectorClient(self.config.collector_url, self.config.station_name or socket.gethostname(),
+                                 self.config.collector_token or None)
+        self.collector_uplink = StationUplink(client, UplinkQueue(self.config.data_path(UPLINK_QUEUE_FILE)))
+        # Codes scanned before the collector was set up are merged as well
+        if self.codes_found:
+            self.collector_uplink.push(list(self.codes_found), self.codes_found.session_id)
+        self.collector_worker = CollectorUplinkWorker(self.collector_uplink)
+        self.collector_worker.code_result.connect(self.on_collector_result)
+        self.collector_worker.start()
+        
+    def on_collector_result(self, result):
+        """Flag a code the collector had already received from another station or session."""
+        code = result.get('code')
+        if result.get('status') != SEEN_DUPLICATE or code not in self.codes_found:
+            return
+        # A redemption result says more than the duplicate warning
+        if self.code_model.status(code) is None:
+            self.code_model.set_status(code, SEEN_DUPLICATE, describe_sighting(result))
+        self.statusBar().showMessage(f"Already seen: {code} ({describe_sighting(result)})")
+        
+    def apply_metrics_settings(self):
+        """Show or hide the HUD and start or stop metric logging from the config."""
+        self.hud_label.setVisible(self.config.show_hud)
+        if self.config.show_hud:
+            self.update_hud()
+            self.hud_timer.start(500)
+        else:
+            self.hud_timer.stop()
             
-            # Restart camera if necessary
-            if self.capture_timer.isActive():
-                self.toggle_camera()  # Stop
-                self.toggle_camera()  # Start
+        if self.config.metrics_log:
+            if not self.metrics_log_timer.isActive():
+                self.metrics_log_timer.start(5000)
+        else:
+            self.metrics_log_timer.stop()
+    
+    def toggle_hud(self):
+        """Toggle the performance HUD."""
+        self.config.update_setting('show_hud', not self.config.show_hud)
+        self.apply_metrics_settings()
+        
+    def update_hud(self):
+        """Refresh the performance HUD text."""
+        metrics = self.metrics
+        # Frames are decoded on the capture timer as they are read, so there is no decode queue to show
+        lines = [
+            f"capture {metrics.rate('capture'):5.1f} fps   decode {metrics.rate('decode'):5.1f} fps",
+            f"codes   {metrics.rate('code', 60.0) * 60:5.1f} /min",
+            "",
+            f"{'stage':<16}{'p50':>7}{'p95':>7}{'p99':>7} ms",
+        ]
+        for stage in ('get_frame', 'cvtColor', 'finder', 'detect', 'decode', 'detectAndDecode', 'preprocess',
+                      'auto_scan', 'preview', 'update_ui'):
+            stats = metrics.stage_stats(stage)
+            if stats['count']:
+                lines.append(f"{stage:<16}{stats['p50']:7.1f}{stats['p95']:7.1f}{stats['p99']:7.1f}")
                 
-            self.statusBar().showMessage("Settings updated")
-            self.update_ui()
+        decode_rate = metrics.rate('decode')
+        if self.scanner.two_stage and decode_rate:
+            # Share of recent frames each two-stage step settled
+            lines.append("")
+            lines.append(f"frames  {metrics.rate('stage_no_candidate') / decode_rate:4.0%} no finder"
+                         f"   {metrics.rate('stage_no_quad') / decode_rate:4.0%} no quad"
+                         f"   {metrics.rate('stage_tracked') / decode_rate:4.0%} tracked"
+                         f"   {metrics.rate('stage_decoded') / decode_rate:4.0%} decoded")
+        
+        usage = self.record_memory()
+        lines.append("")
+        lines.append(f"{'memory':<16}{format_bytes(usage.pop('rss')):>12} rss")
+        for name, size in usage.items():
+            lines.append(f"  {name:<14}{format_bytes(size):>12}")
+            
+        cooldown = self.record_cooldown()
+        lines.append("")
+        lines.append(f"cooldown {len(self.code_cooldown)}/{self.code_cooldown.capacity} codes"
+                     f"   {cooldown['hits']} hits   {cooldown['misses']} misses")
+        
+        if self.camera_tuner is not None:
+            lines.append("")
+            lines.append(f"camera  {self.camera_tuner.describe()}")
+            
+        if self.collector_uplink is not None:
+            uplink = self.collector_uplink.stats
+            lines.append("")
+            lines.append(f"collector  {uplink['sent']} sent   {uplink['duplicates']} seen elsewhere"
+                         f"   {self.collector_uplink.pending()} queued   {uplink['failures']} failures")
+            
+        if self.event_server is not None:
+            lines.append("")
+            lines.append(f"events  {self.event_server.url}   {self.event_server.client_count()} clients"
+                         f"   {self.event_server.stats['published']} published")
+            
+        if 'first_paint' in self.startup_times:
+            lines.append("")
+            lines.append(f"startup  imports {self.startup_times.get('imports', 0):.0f} ms"
+                         f"   construct {self.startup_times['construct']:.0f} ms"
+                         f"   window {self.startup_times['window']:.0f} ms"
+                         f"   first paint {self.startup_times['first_paint']:.0f} ms")
+            
+        plan = self.thread_plan
+        lines.append("")
+        lines.append(f"budget  {len(plan['cores'])} cores   opencv {plan['opencv']}   decode {plan['decode_workers']}"
+                     f"{'   pinned' if self.thread_budget.pin else ''}"
+                     f"{'   OVERSUBSCRIBED' if plan['oversubscribed'] else ''}")
+        contention = self.record_contention()
+        if contention is not None:
+            lines.append(f"{'threads':<9}{contention['threads']:>3}   cpu {contention['cpu']:4.2f} cores"
+                         f"   runq wait {contention['wait']:4.0%}")
+            for role, stats in contention['roles'].items():
+                if stats['cpu'] or stats['wait']:
+                    lines.append(f"  {role:<10}{stats['cpu']:5.2f} cores{stats['wait']:8.0%} wait")
+        self.hud_label.setText("\n".join(lines))
+        self.hud_label.adjustSize()
+        self.hud_label.raise_()
+        
+    def record_memory(self):
+        """
+        Measure memory use and publish it as 'memory_<subsystem>' gauges.
+        
+        Returns:
+            Dict of subsystem name -> bytes, including 'rss' for the process
+        """
+        usage = self.memory.snapshot()
+        for name, size in usage.items():
+            self.metrics.set_gauge(f"memory_{name}", size)
+        return usage
+        
+    def record_cooldown(self):
+        """
+        Publish the per-code cooldown statistics as gauges.
+        
+        Returns:
+            The cooldown's statistics dict
+        """
+        stats = self.code_cooldown.stats
+        for name, value in stats.items():
+            self.metrics.set_gauge(f"cooldown_{name}", value)
+        self.metrics.set_gauge('cooldown_size', len(self.code_cooldown))
+        self.metrics.set_gauge('cooldown_hit_rate', self.code_cooldown.hit_rate())
+        return stats
+        
+    def record_contention(self):
+        """
+        Measure scheduler contention and publish it as gauges.
+        
+        Returns:
+            The ContentionMonitor sample, or None if there is none yet
+        """
+        contention = self.contention.sample()
+        if contention is not None:
+            self.metrics.set_gauge('cpu_cores', contention['cpu'])
+            self.metrics.set_gauge('runqueue_wait', contention['wait'])
+            for role, stats in contention['roles'].items():
+                self.metrics.set_gauge(f"runqueue_wait_{role}", stats['wait'])
+        return contention
+        
+    def write_metrics_log(self):
+        """Append a metrics snapshot to the JSON lines log."""
+        self.record_memory()
+        self.record_contention()
+        self.record_cooldown()
+        self.metrics.write_jsonl(self.config.data_path(METRICS_LOG_FILE))
     
     def closeEvent(self, event):
         """Handle window close event."""
         # Stop the camera and clean up
+        if self.camera_worker is not None:
+            self.camera_worker.wait()
+        self.stop_camera_tuning()
         self.scanner.stop_camera()
+        
+        # Write any settings change that is still waiting to be saved
+        self.config.flush()
+        
+        # Keep the data of a profile that is still running
+        if self.profiler.running:
+            self.stop_profiling()
+        
+        # Let a running export finish writing before the window goes away
+        if self.export_worker is not None:
+            self.export_worker.wait()
+        if self.check_worker is not None:
+            self.check_worker.stop()
+            self.check_worker.wait()
+        if self.redemption_worker is not None:
+            self.redemption_worker.stop()
+            self.redemption_worker.wait()
+        self.redemption_queue.close()
+        self.status_cache.close()
+        if self.event_server is not None:
+            self.event_server.stop()
+        if self.collector_worker is not None:
+            self.collector_worker.code_result.disconnect()
+            self.collector_worker.stop()
         event.accept()
 
     def update_ui(self):
         """Update the UI with current state information."""
+        with self.metrics.time('update_ui'):
+            self._update_ui()
+    
+    def _update_ui(self):
         # Update the found codes count in UI
         self.statusBar().showMessage(f"Found {len(self.codes_found)} codes")
         
-        # Clear existing items
-        self.codes_list.clear()
-        self.block_selector.clear()
-        
-        if not self.codes_found:
-            # Show helpful empty state message in code list
-            empty_item = QListWidgetItem("No codes scanned yet. Start camera and scan QR codes to see them here.")
-            empty_item.setTextAlignment(Qt.AlignCenter)
-            empty_item.setFlags(Qt.NoItemFlags)  # Make it non-selectable
-            self.codes_list.addItem(empty_item)
-            
-            # Style the empty state
-            self.codes_list.setStyleSheet(f"""
-                QListWidget {{
-                    background-color: {POKEMON_COLORS['input_bg']};
-                    color: {POKEMON_COLORS['text']};
-                    border: 1px solid {POKEMON_COLORS['border']};
-                    border-radius: 8px;
-                    padding: 4px;
-                    font-family: 'Menlo', 'SF Mono', 'Consolas', 'Courier New', monospace;
-                    font-size: 13px;
-                }}
-                QListWidget::item {{
-                    padding: 16px 12px;
-                    border-bottom: 1px solid {POKEMON_COLORS['border']};
-                    margin: 0;
-                    border-radius: 0;
-                    color: {POKEMON_COLORS['text_secondary']};
-                    font-family: 'SF Pro Display', 'Segoe UI', 'Arial', sans-serif;
-                    font-style: italic;
-                }}
-            """)
-            
-            # Set empty state text for block display
-            self.block_display.setText("No codes to display. Scan QR codes to see them formatted here.")
-            self.block_display.setAlignment(Qt.AlignCenter)
-            self.block_display.setStyleSheet(f"""
-                QTextEdit {{
-                    background-color: {POKEMON_COLORS['input_bg']};
-                    color: {POKEMON_COLORS['text_secondary']};
-                    border: 1px solid {POKEMON_COLORS['border']};
-                    border-radius: 8px;
-                    padding: 12px 16px;
-                    font-family: 'SF Pro Display', 'Segoe UI', 'Arial', sans-serif;
-                    font-size: 13px;
-                    font-style: italic;
-                }}
-            """)
-            
-            # Update the tab title with count
-            self.code_tabs.setTabText(1, "Code Blocks (0)")
-            
-            # Disable copy buttons when no codes
-            self.copy_block_button.setEnabled(False)
-            self.copy_all_button.setEnabled(False)
-            self.clear_button.setEnabled(False)
-            
-            # Disable export buttons
-            self.export_txt_button.setEnabled(False)
-            self.export_md_button.setEnabled(False)
-            self.export_block_txt_button.setEnabled(False)
-            self.export_block_md_button.setEnabled(False)
-            return
-        
-        # Reset styling for non-empty state
-        self.codes_list.setStyleSheet(f"""
-            QListWidget {{
-                background-color: {POKEMON_COLORS['input_bg']};
-                color: {POKEMON_COLORS['text']};
-                border: 1px solid {POKEMON_COLORS['border']};
-                border-radius: 8px;
-                padding: 4px;
-                font-family: 'Menlo', 'SF Mono', 'Consolas', 'Courier New', monospace;
-                font-size: 13px;
-            }}
-            QListWidget::item {{
-                padding: 10px 12px;
-                border-bottom: 1px solid {POKEMON_COLORS['border']};
-                margin: 0;
-                border-radius: 0;
-            }}
-            QListWidget::item:selected {{
-                background-color: rgba(0, 122, 255, 0.15);
-                color: {POKEMON_COLORS['text']};
-                border-left: 2px solid {POKEMON_COLORS['secondary']};
-            }}
-        """)
-        
-        self.block_display.setStyleSheet(f"""
-            QTextEdit {{
-                background-color: {POKEMON_COLORS['input_bg']};
-                color: {POKEMON_COLORS['text']};
-                border: 1px solid {POKEMON_COLORS['border']};
-                border-radius: 8px;
-                padding: 12px 16px;
-                font-family: 'Menlo', 'SF Mono', 'Consolas', 'Courier New', monospace;
-                font-size: 13px;
-                line-height: 1.5;
-            }}
-        """)
+        # The empty state is styled by the theme; the model shows the placeholder row
+        has_codes = bool(self.codes_found)
+        set_state(self.codes_list, 'empty', not has_codes)
         
-        # Enable copy buttons when codes exist
-        self.copy_block_button.setEnabled(True)
-        self.copy_all_button.setEnabled(True)
-        self.clear_button.setEnabled(True)
+        # Copy, clear and export need codes
+        self.copy_all_button.setEnabled(has_codes)
+        self.clear_button.setEnabled(has_codes)
+        self.export_txt_button.setEnabled(has_codes)
+        self.export_md_button.setEnabled(has_codes)
+        self.export_new_button.setEnabled(has_codes)
+        self.check_button.setEnabled(has_codes and self.check_worker is None)
+        self.redeem_button.setEnabled(has_codes and self.redemption_worker is None)
         
-        # Enable export buttons
-        self.export_txt_button.setEnabled(True)
-        self.export_md_button.setEnabled(True)
-        self.export_block_txt_button.setEnabled(True)
-        self.export_block_md_button.setEnabled(True)
-                
-        # Add all codes to the list
-        for code in self.codes_found:
-            item = QListWidgetItem(code)
-            self.codes_list.addItem(item)
-            
-        # Add all blocks to the selector
-        self.block_selector.addItem(self.all_codes_option)
-        
-        # Add appropriate blocks based on code count
-        total_codes = len(self.codes_found)
-        if total_codes > 10:
-            # Add blocks of 10, 50, 100
-            if total_codes > 10:
-                self.block_selector.addItem("Last 10 Codes")
-            if total_codes > 50:
-                self.block_selector.addItem("Last 50 Codes")
-            if total_codes > 100:
-                self.block_selector.addItem("Last 100 Codes")
-        
-        # Update the tab title with count
-        self.code_tabs.setTabText(1, f"Code Blocks ({total_codes})")
-        
-        # Update the block display
-        self.update_block_display()
+        # Update the block selector, tab title and block display
+        self.update_blocks()
 
     def center_camera_off_indicator(self):
         """Center the camera off indicator in the camera view."""
@@ -1675,6 +2292,10 @@ class MainWindow(QMainWindow):
         if not self.codes_found:
             QMessageBox.information(self, "No Codes", "No codes available to export.")
             return
+        
+        if self.export_worker is not None:
+            QMessageBox.information(self, "Export Running", "Please wait for the current export to finish.")
+            return
             
         # Default filename with format
         default_name = f"pokemon_tcg_codes.{file_format}"
@@ -1684,50 +2305,107 @@ class MainWindow(QMainWindow):
             self, 
             "Export Codes", 
             default_name, 
-            f"{file_format.upper()} Files (*.{file_format})"
+            f"{file_format.upper()} Files (*.{file_format});;"
+            f"Compressed {file_format.upper()} Files (*.{file_format}.gz)"
         )
         
         if not file_path:
             return  # User canceled
-            
+        
+        total = len(self.codes_found)
+        
+        # Write on a worker thread so large exports do not freeze the window
+        self.export_progress = QProgressDialog("Exporting codes...", "Cancel", 0, total, self)
+        self.export_progress.setWindowTitle("Export Codes")
+        self.export_progress.setWindowModality(Qt.WindowModal)
+        self.export_progress.setMinimumDuration(500)
+        
+        # The format chosen on the blocks tab, or its default if the tab was never opened
+        format_type = self.format_selector.currentText() if self.blocks_built else FORMATS[0]
+        self.export_worker = ExportWorker(self.codes_found, file_path, file_format, format_type, self)
+        self.export_worker.progress.connect(self.export_progress.setValue)
+        self.export_worker.completed.connect(self.on_export_completed)
+        self.export_worker.cancelled.connect(self.on_export_cancelled)
+        self.export_worker.failed.connect(self.on_export_failed)
+        self.export_worker.finished.connect(self.on_export_finished)
+        self.export_progress.canceled.connect(self.export_worker.cancel)
+        
+        self.statusBar().showMessage(f"Exporting {total} codes to {file_path}...")
+        self.export_worker.start()
+    
+    def on_export_completed(self, file_path, count):
+        """Report a successful export."""
+        self.export_progress.reset()
+        
+        # A full export brings the destination up to date for "Export New"
+        if not file_path.endswith('.gz'):
+            self.export_marks.update(file_path, source=f"session:{self.export_worker.session_id}",
+                                     position=count, exported=count)
+            self.last_export_path = file_path
+        self.statusBar().showMessage(f"Exported {count} codes to {file_path}")
+        QMessageBox.information(self, "Export Successful", f"Successfully exported {count} codes to {file_path}")
+        
+    def on_export_cancelled(self):
+        """Report a cancelled export."""
+        self.statusBar().showMessage("Export cancelled")
+        
+    def on_export_failed(self, error):
+        """Report a failed export."""
+        self.export_progress.reset()
+        QMessageBox.critical(self, "Export Error", f"Failed to export codes: {error}")
+        
+    def on_export_finished(self):
+        """Release the export worker once its thread has stopped."""
+        self.export_worker.deleteLater()
+        self.export_worker = None
+    
+    def export_new_since_last(self):
+        """Export only the codes added since the last export to a destination."""
+        if not self.codes_found:
+            QMessageBox.information(self, "No Codes", "No codes available to export.")
+            return
+        
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Export New Codes",
+            self.last_export_path or "pokemon_tcg_codes.txt",
+            "TXT Files (*.txt);;MD Files (*.md)",
+            options=QFileDialog.DontConfirmOverwrite
+        )
+        
+        if not file_path:
+            return  # User canceled
+        
+        source = f"session:{self.codes_found.session_id}"
+        position = self.export_marks.position(file_path, source)
+        new_codes = self.codes_found.codes_since(position)
+        
+        if not new_codes:
+            QMessageBox.information(self, "No New Codes", f"No new codes since the last export to {file_path}.")
+            return
+        
+        # Existing files can be appended to or followed by a numbered delta file
+        delta = False
+        if os.path.exists(file_path):
+            box = QMessageBox(self)
+            box.setWindowTitle("Export New Codes")
+            box.setText(f"{len(new_codes)} new codes since the last export to {os.path.basename(file_path)}.")
+            append_button = box.addButton("Append", QMessageBox.AcceptRole)
+            delta_button = box.addButton("New Delta File", QMessageBox.AcceptRole)
+            box.addButton(QMessageBox.Cancel)
+            box.exec_()
+            if box.clickedButton() not in (append_button, delta_button):
+                return
+            delta = box.clickedButton() == delta_button
+        
+        file_format = 'md' if file_path.endswith('.md') else 'txt'
         try:
-            with open(file_path, 'w') as f:
-                if file_format == 'md':
-                    # Export as markdown
-                    f.write("# Pokémon TCG Codes\n\n")
-                    f.write(f"*Exported from CodeDex Pro - {len(self.codes_found)} codes*\n\n")
-                    
-                    # Get current format from the selector
-                    format_type = self.format_selector.currentText()
-                    
-                    if format_type == "Numbered List":
-                        f.write("## Numbered List\n\n")
-                        for i, code in enumerate(self.codes_found):
-                            f.write(f"{i + 1}. `{code}`\n")
-                    elif format_type == "Raw Codes (One per line)":
-                        f.write("## Raw Codes\n\n")
-                        f.write("```\n")
-                        for code in self.codes_found:
-                            f.write(f"{code}\n")
-                        f.write("```\n")
-                    elif format_type == "Space-Separated":
-                        f.write("## Space-Separated\n\n")
-                        f.write("```\n")
-                        f.write(" ".join(self.codes_found))
-                        f.write("\n```\n")
-                    else:  # Comma-Separated
-                        f.write("## Comma-Separated\n\n")
-                        f.write("```\n")
-                        f.write(",".join(self.codes_found))
-                        f.write("\n```\n")
-                else:
-                    # Export as plain text
-                    for code in self.codes_found:
-                        f.write(f"{code}\n")
-                        
-            self.statusBar().showMessage(f"Exported {len(self.codes_found)} codes to {file_path}")
-            QMessageBox.information(self, "Export Successful", f"Successfully exported {len(self.codes_found)} codes to {file_path}")
-            
+            written_path, count = export_new_codes(
+                new_codes, file_path, file_format, self.export_marks,
+                source, position + len(new_codes), delta=delta
+            )
+            self.last_export_path = file_path
+            self.statusBar().showMessage(f"Exported {count} new codes to {written_path}")
         except Exception as e:
             QMessageBox.critical(self, "Export Error", f"Failed to export codes: {str(e)}")
     
@@ -1737,4 +2415,188 @@ class MainWindow(QMainWindow):
         
     def export_to_md(self):
         """Export all codes to a Markdown file."""
-        self.export_to_file('md') 
\ No newline at end of file
+        self.export_to_file('md')
+        
+    def redeem_codes(self):
+        """Queue the session's codes and work through everything not yet redeemed."""
+        if not self.config.redemption_url:
+            QMessageBox.information(self, "Redemption Disabled",
+                                    "Set the redemption service URL under Settings > Redemption to submit codes.")
+            return
+            
+        # Do not spend redemption attempts on codes a status check found used or invalid
+        known = self.status_cache.get_many(self.codes_found)
+        skipped = [code for code, result in known.items()
+                   if result['status'] in (STATUS_ALREADY_REDEEMED, STATUS_INVALID)
+                   and self.redemption_queue.get(code) is None]
+        self.redemption_queue.add([code for code in self.codes_found if code not in skipped])
+        if skipped:
+            self.statusBar().showMessage(f"Skipping {len(skipped)} codes the status check found used or invalid")
+        if not self.redemption_queue.unfinished():
+            QMessageBox.information(self, "Nothing to Redeem", "Every code already has a redemption result.")
+            return
+            
+        credentials = self.redemption_credentials()
+        if credentials is not None:
+            self.start_redemption(credentials)
+            
+    def check_codes(self):
+        """Check the status of every code that has no status yet."""
+        if not self.config.redemption_url:
+            QMessageBox.information(self, "Redemption Disabled",
+                                    "Set the redemption service URL under Settings > Redemption to check codes.")
+            return
+            
+        # Answer what the cache knows right away; only the rest needs the service
+        unchecked = [code for code in self.codes_found if self.code_model.status(code) is None]
+        for result in self.status_cache.get_many(unchecked).values():
+            self.code_model.set_status(result['code'], result['status'], result['message'])
+        unchecked = [code for code in unchecked if self.code_model.status(code) is None]
+        if not unchecked:
+            self.statusBar().showMessage("Every code has a known status")
+            return
+            
+        credentials = self.redemption_credentials()
+        if credentials is None:
+            return
+        concurrency = self.config.redemption_concurrency
+        from src.redemption import RedemptionClient, RedemptionEngine
+        engine = RedemptionEngine(
+            RedemptionClient(self.config.redemption_url, credentials['username'], credentials['password'],
+                             pool_size=concurrency),
+            max_in_flight=concurrency
+        )
+        self.check_worker = StatusCheckWorker(engine, unchecked, self.status_cache, self)
+        self.check_worker.code_result.connect(self.on_code_checked)
+        self.check_worker.failed.connect(self.on_check_failed)
+        self.check_worker.finished.connect(self.on_check_finished)
+        self.check_button.setEnabled(False)
+        self.statusBar().showMessage(f"Checking {len(unchecked)} codes...")
+        self.check_worker.start()
+        
+    def on_code_checked(self, code, status, message):
+        """Show the checked status of one code, unless redemption has overtaken it."""
+        if self.redemption_queue.get(code) is None:
+            self.code_model.set_status(code, status, message)
+            
+    def on_check_failed(self, error):
+        """Report a status check that could not run."""
+        self.session_credentials = None
+        QMessageBox.critical(self, "Status Check Error", error)
+        
+    def on_check_finished(self):
+        """Release the status check worker and summarise the result."""
+        self.check_worker.deleteLater()
+        self.check_worker = None
+        self.check_button.setEnabled(bool(self.codes_found))
+        counts = {}
+        for code in self.codes_found:
+            status = self.code_model.status(code)
+            if status is not None:
+                counts[status] = counts.get(status, 0) + 1
+        self.statusBar().showMessage("Status check finished: " + ", ".join(
+            f"{count} {STATUS_LABELS.get(status, status).lower()}" for status, count in counts.items()
+        ))
+        
+    def resume_redemption(self):
+        """Continue an interrupted redemption run with the saved login."""
+        if self.redemption_worker is None:
+            self.start_redemption({'username': self.config.username, 'password': self.config.password})
+            
+    def start_redemption(self, credentials):
+        """Start submitting queued codes in the background, sharded across every account."""
+        from src.redemption import RedemptionClient, RedemptionEngine, RedemptionScheduler
+        concurrency = self.config.redemption_concurrency
+        accounts = [credentials] + [account for account in self.config.redemption_accounts
+                                    if account['username'] != credentials['username']]
+        scheduler = RedemptionScheduler([
+            RedemptionEngine(
+                RedemptionClient(self.config.redemption_url, account['username'], account['password'],
+                                 pool_size=concurrency),
+                max_in_flight=concurrency,
+                rate=self.config.redemption_rate
+            )
+            for account in accounts
+        ])
+        
+        self.redemption_worker = RedemptionWorker(scheduler, self.redemption_queue, self)
+        self.redemption_worker.code_result.connect(self.on_code_redeemed)
+        self.redemption_worker.stats_changed.connect(self.on_redemption_stats)
+        self.redemption_worker.failed.connect(self.on_redemption_failed)
+        self.redemption_worker.finished.connect(self.on_redemption_finished)
+        self.redeem_button.setEnabled(False)
+        self.statusBar().showMessage(f"Redeeming {self.redemption_queue.unfinished()} queued codes...")
+        self.redemption_worker.start()
+        self.update_queue_counts()
+        
+    def redemption_credentials(self):
+        """
+        Return the Trainer Club credentials, asking for them when none are known.
+        
+        Returns:
+            Dict with 'username' and 'password', or None if the login was cancelled
+        """
+        if self.session_credentials is not None:
+            return self.session_credentials
+        if self.config.username and self.config.password:
+            return {'username': self.config.username, 'password': self.config.password}
+            
+        dialog = LoginDialog(self, self.config)
+        if not dialog.exec_():
+            return None
+        credentials = dialog.get_credentials()
+        if credentials['save']:
+            self.config.update_settings({'username': credentials['username'], 'password': credentials['password']})
+        self.session_credentials = credentials
+        return credentials
+        
+    def on_code_redeemed(self, code, status, message):
+        """Show the latest redemption state of one code."""
+        self.code_model.set_status(code, status, message)
+        self.update_queue_counts()
+        
+    def update_queue_counts(self):
+        """Show how many queued codes are in each state."""
+        counts = self.redemption_queue.counts()
+        if not any(counts.values()):
+            self.queue_label.hide()
+            return
+        text = "Queue: " + ", ".join(
+            f"{counts[state]} {state.replace('_', ' ')}" for state in STATES if counts[state]
+        )
+        if self.redemption_worker is not None and self.redemption_stats:
+            rate = sum(account['throughput'] for account in self.redemption_stats)
+            text += f" | {len(self.redemption_stats)} accounts, {rate:.1f} codes/s"
+        self.queue_label.setText(text)
+        self.queue_label.show()
+        
+    def on_redemption_stats(self, stats):
+        """Show per-account throughput and backlog."""
+        self.redemption_stats = stats
+        self.queue_label.setToolTip("\n".join(
+            f"{account['account']}: {account['state']}, {account['throughput']:.1f} codes/s, "
+            f"{account['backlog']} in flight, {account['answered']} answered, {account['errors']} errors"
+            for account in stats
+        ))
+        self.update_queue_counts()
+        
+    def on_redemption_failed(self, error):
+        """Report a redemption run that had to stop."""
+        # Ask for the credentials again next time in case they were wrong
+        self.session_credentials = None
+        QMessageBox.critical(self, "Redemption Error", error)
+        
+    def on_redemption_finished(self):
+        """Release the redemption worker and summarise the queue."""
+        self.redemption_worker.deleteLater()
+        self.redemption_worker = None
+        
+        # Accounts rejected during the run, while others carried on
+        rejected = [account['account'] for account in self.redemption_stats if account['state'] == 'disabled']
+        if rejected and len(rejected) < len(self.redemption_stats):
+            QMessageBox.warning(self, "Redemption Accounts",
+                                f"These accounts were rejected and skipped: {', '.join(rejected)}")
+        self.redeem_button.setEnabled(bool(self.codes_found))
+        self.update_queue_counts()
+        state = "stopped" if self.redemption_queue.unfinished() else "finished"
+        self.statusBar().showMessage(f"Redemption {state}. {self.queue_label.text()}")
@@ -0,0 +1,152 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+import numpy as np
+
+from src.corpus import CODE_ALPHABET, CODE_GROUPS
+from src.metrics import percentile
+from src.mockservice import MockRedemptionService
+from src.redemption import RedemptionClient, RedemptionEngine, RedemptionScheduler, RedemptionError
+from src.redemption_queue import RedemptionQueue
+
+
+def synthetic_codes(count, seed=1234):
+    """Generate `count` distinct codes in the TCG redemption format."""
+    rng = np.random.default_rng(seed)
+    alphabet = np.array(list(CODE_ALPHABET))
+    codes = []
+    seen = set()
+    while len(codes) < count:
+        for row in alphabet[rng.integers(0, len(alphabet), size=(count - len(codes), sum(CODE_GROUPS)))]:
+            groups = []
+            start = 0
+            for length in CODE_GROUPS:
+                groups.append("".join(row[start:start + length]))
+                start += length
+            code = "-".join(groups)
+            if code not in seen:
+                seen.add(code)
+                codes.append(code)
+    return codes
+
+
+class TimedClient(RedemptionClient):
+    """RedemptionClient that records the latency and outcome of every request."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+        self.outcomes = {'ok': 0, 'error': 0, 'rate_limited': 0}
+        self.codes_sent = 0
+        self._stats_lock = threading.Lock()
+
+    def redeem_batch(self, codes, idempotency_keys=None):
+        started = time.perf_counter()
+        outcome = 'ok'
+        try:
+            return super().redeem_batch(codes, idempotency_keys)
+        except RedemptionError as e:
+            outcome = 'rate_limited' if e.retry_after is not None else 'error'
+            raise
+        finally:
+            with self._stats_lock:
+                self.latencies.append(time.perf_counter() - started)
+                self.outcomes[outcome] += 1
+                self.codes_sent += len(codes)
+
+
+def run_load_test(codes=20000, accounts=1, concurrency=4, rate=None, url=None, seed=1234, service_options=None):
+    """
+    Push synthetic codes through the redemption queue and scheduler.
+
+    Args:
+        codes: Number of synthetic codes
+        accounts: Number of accounts to shard the codes across
+        concurrency: Batches in flight per account
+        rate: Requests per second per account, 0 for no limit. None matches the
+            local mock's rate_limit, so the run does not throttle itself.
+        url: Redemption service to test; a local MockRedemptionService is started when None
+        seed: Seed for the synthetic codes and the mock service
+        service_options: Keyword arguments for MockRedemptionService
+
+    Returns:
+        Dict of results
+    """
+    service = None
+    if url is None:
+        service = MockRedemptionService(seed=seed, **(service_options or {})).start()
+        url = service.url
+    if rate is None:
+        rate = service.rate_limit if service is not None else 0.0
+
+    workdir = tempfile.mkdtemp(prefix='codedex-loadtest-')
+    queue = RedemptionQueue(os.path.join(workdir, 'queue.db'))
+    clients = [TimedClient(url, f"loadtest-{i + 1}", "loadtest", pool_size=concurrency) for i in range(accounts)]
+    scheduler = RedemptionScheduler([
+        RedemptionEngine(client, max_in_flight=concurrency, rate=rate) for client in clients
+    ])
+    try:
+        queue.add(synthetic_codes(codes, seed))
+        started = time.perf_counter()
+        scheduler.login()
+        scheduler.run(queue)
+        elapsed = time.perf_counter() - started
+        counts = queue.counts()
+        account_stats = scheduler.stats()
+    finally:
+        scheduler.close()
+        queue.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+        if service is not None:
+            service.stop()
+
+    latencies = sorted(latency for client in clients for latency in client.latencies)
+    outcomes = {name: sum(client.outcomes[name] for client in clients) for name in clients[0].outcomes}
+    codes_sent = sum(client.codes_sent for client in clients)
+    return {
+        'codes': codes,
+        'accounts': accounts,
+        'concurrency': concurrency,
+        'rate': rate,
+        'elapsed': elapsed,
+        'throughput': codes / elapsed if elapsed else 0.0,
+        'requests': len(latencies),
+        'outcomes': outcomes,
+        'latency_ms': {
+            'p50': percentile(latencies, 50) * 1000,
+            'p95': percentile(latencies, 95) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'max': (latencies[-1] if latencies else 0.0) * 1000,
+        },
+        'codes_sent': codes_sent,
+        'amplification': codes_sent / codes if codes else 0.0,
+        'queue': counts,
+        'per_account': account_stats,
+        'service': dict(service.stats) if service is not None else None,
+    }
+
+
+def format_load_test(results):
+    """Render load test results as text."""
+    latency = results['latency_ms']
+    outcomes = results['outcomes']
+    lines = [
+        f"{results['codes']} codes, {results['accounts']} accounts x {results['concurrency']} in flight, "
+        f"rate limit {results['rate'] or 'none'}",
+        f"Finished in {results['elapsed']:.1f} s: {results['throughput']:.1f} codes/s",
+        f"Requests: {results['requests']} ({outcomes['ok']} ok, {outcomes['error']} failed, "
+        f"{outcomes['rate_limited']} rate limited)",
+        f"Latency: p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms, "
+        f"p99 {latency['p99']:.1f} ms, max {latency['max']:.1f} ms",
+        f"Retry amplification: {results['amplification']:.3f} ({results['codes_sent']} codes sent)",
+        "Queue: " + ", ".join(f"{count} {state}" for state, count in results['queue'].items() if count),
+    ]
+    for account in results['per_account']:
+        lines.append(f"  {account['account']}: {account['answered']} answered, {account['errors']} errors")
+    service = results['service']
+    if service is not None:
+        lines.append(f"Mock service: {service['redeemed']} redeemed, {service['replayed']} replayed, "
+                     f"{service['key_conflicts']} key conflicts, {service['lost']} lost responses")
+    return "\n".join(lines)
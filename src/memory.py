@@ -0,0 +1,114 @@
+import os
+import sys
+
+
+def process_rss():
+    """
+    Resident set size of the current process in bytes.
+
+    Uses /proc on Linux, psutil when it is installed and the peak RSS from
+    getrusage as a last resort.
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return 0
+
+
+class FramePool:
+    """
+    Fixed set of buffers that camera frames are read into.
+
+    cv2.VideoCapture.read() writes into a buffer it is given when the size
+    matches, so cycling through `capacity` buffers keeps the capture loop
+    from allocating a new multi-megabyte array for every frame. A frame
+    stays valid until `capacity` further frames have been read; anything
+    that keeps frames for longer must copy them.
+    """
+
+    def __init__(self, capacity=3):
+        self.capacity = capacity
+        self.reallocations = 0
+        self._buffers = []
+        self._next = 0
+
+    def acquire(self):
+        """Return the buffer to read the next frame into, or None while the pool is filling."""
+        if len(self._buffers) < self.capacity:
+            return None
+        return self._buffers[self._next]
+
+    def keep(self, frame):
+        """
+        Take ownership of the array the last frame was read into.
+
+        A frame that is not the acquired buffer (the capture size changed)
+        replaces it, so the pool never holds more than `capacity` arrays.
+        """
+        if len(self._buffers) < self.capacity:
+            self._buffers.append(frame)
+            return
+        if frame is not self._buffers[self._next]:
+            self._buffers[self._next] = frame
+            self.reallocations += 1
+        self._next = (self._next + 1) % self.capacity
+
+    def clear(self):
+        """Release every buffer."""
+        self._buffers = []
+        self._next = 0
+
+    def nbytes(self):
+        """Memory held by the pooled buffers."""
+        return sum(buffer.nbytes for buffer in self._buffers)
+
+
+class MemoryAccountant:
+    """Collects memory estimates from each subsystem alongside the process RSS."""
+
+    def __init__(self):
+        self._sources = {}
+
+    def register(self, name, estimate):
+        """
+        Register a subsystem.
+
+        Args:
+            name: Subsystem name shown in the stats
+            estimate: Callable returning the subsystem's memory use in bytes
+        """
+        self._sources[name] = estimate
+
+    def snapshot(self):
+        """Return a dict of subsystem name -> bytes, plus 'rss' for the whole process."""
+        usage = {}
+        for name, estimate in self._sources.items():
+            try:
+                usage[name] = int(estimate())
+            except Exception as e:
+                print(f"Error measuring memory for {name}: {e}")
+                usage[name] = 0
+        usage['rss'] = process_rss()
+        return usage
+
+
+def format_bytes(size):
+    """Format a byte count as KB or MB."""
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{size / 1024:.1f} KB"
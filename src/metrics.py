@@ -0,0 +1,143 @@
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# File next to config.json that metric snapshots are appended to
+METRICS_LOG_FILE = 'metrics.jsonl'
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = int(round(pct / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[rank]
+
+
+class PipelineMetrics:
+    """
+    Lightweight per-stage timers and throughput counters.
+
+    Latencies are kept in fixed-size rolling windows so percentiles reflect
+    recent behaviour, and events are timestamped so rates can be computed
+    over any period up to `rate_window` seconds.
+    """
+
+    def __init__(self, window=500, rate_window=60.0):
+        self.window = window
+        self.rate_window = rate_window
+        self.enabled = True
+        self._latencies = {}
+        self._totals = {}
+        self._events = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def time(self, stage):
+        """Context manager timing a block of code as `stage`."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage, seconds):
+        """Record one latency sample for a stage."""
+        with self._lock:
+            samples = self._latencies.get(stage)
+            if samples is None:
+                samples = self._latencies[stage] = deque(maxlen=self.window)
+            samples.append(seconds * 1000.0)
+            self._totals[stage] = self._totals.get(stage, 0) + 1
+
+    def count(self, event, n=1):
+        """Count an event, e.g. a captured frame or an accepted code."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            stamps = self._events.get(event)
+            if stamps is None:
+                stamps = self._events[event] = deque()
+            for _ in range(n):
+                stamps.append(now)
+            # Forget events older than the longest rate period
+            while stamps and now - stamps[0] > self.rate_window:
+                stamps.popleft()
+
+    def rate(self, event, period=5.0):
+        """Events per second over the last `period` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            stamps = self._events.get(event, ())
+            recent = sum(1 for stamp in reversed(stamps) if now - stamp <= period) if stamps else 0
+        return recent / period
+
+    def set_gauge(self, name, value):
+        """Record the current value of a gauge such as a queue depth."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def gauge(self, name, default=None):
+        """Return the current value of a gauge."""
+        with self._lock:
+            return self._gauges.get(name, default)
+
+    def stage_stats(self, stage):
+        """Return count, mean, p50, p95 and p99 latency (ms) for a stage."""
+        with self._lock:
+            samples = sorted(self._latencies.get(stage, ()))
+            total = self._totals.get(stage, 0)
+        if not samples:
+            return {'count': total, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+        return {
+            'count': total,
+            'mean': sum(samples) / len(samples),
+            'p50': percentile(samples, 50),
+            'p95': percentile(samples, 95),
+            'p99': percentile(samples, 99),
+        }
+
+    def snapshot(self):
+        """Return every metric as a JSON-serialisable dict."""
+        with self._lock:
+            stages = list(self._latencies)
+            events = list(self._events)
+            gauges = dict(self._gauges)
+        return {
+            'timestamp': time.time(),
+            'stages': {stage: self.stage_stats(stage) for stage in stages},
+            'rates': {event: self.rate(event) for event in events},
+            'per_minute': {event: self.rate(event, self.rate_window) * 60.0 for event in events},
+            'gauges': gauges,
+        }
+
+    def write_jsonl(self, path):
+        """Append the current snapshot to a JSON lines file."""
+        try:
+            with open(path, 'a') as f:
+                f.write(json.dumps(self.snapshot()) + "\n")
+        except Exception as e:
+            print(f"Error writing metrics: {e}")
+
+    def nbytes(self):
+        """Approximate memory held by the latency windows and event timestamps."""
+        with self._lock:
+            samples = (sum(len(values) for values in self._latencies.values())
+                       + sum(len(stamps) for stamps in self._events.values()))
+        # A float object plus its deque slot
+        return samples * 32
+
+    def reset(self):
+        """Forget every sample and counter."""
+        with self._lock:
+            self._latencies.clear()
+            self._totals.clear()
+            self._events.clear()
+            self._gauges.clear()
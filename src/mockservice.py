@@ -0,0 +1,229 @@
+import json
+import time
+import uuid
+import zlib
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from src.redemption import (TokenBucket, REDEMPTION_BATCH_SIZE, STATUS_REDEEMED, STATUS_ALREADY_REDEEMED,
+                            STATUS_INVALID, STATUS_UNUSED)
+
+
+class MockRedemptionService:
+    """
+    Local stand-in for the redemption service.
+
+    Implements the /login, /redeem and /status endpoints described in
+    RedemptionClient, so redemption can be exercised without a live
+    account. Every request waits `latency` seconds plus up to `jitter`,
+    then fails with HTTP 500 with probability `error_rate`, or is
+    processed but answered with HTTP 503, as if the response was lost,
+    with probability `lost_rate`. An account may burst up to one second's
+    worth of requests; beyond `rate_limit` requests per second it gets
+    HTTP 429 with a Retry-After header giving the seconds, fractional,
+    until its next request is allowed. A fixed share of codes, `invalid_ratio`, is
+    rejected as invalid, and another share, `used_ratio`, counts as
+    redeemed elsewhere. Which codes depends only on the code, so every
+    run agrees.
+
+    Redemptions are idempotent. A code sent again with the key it was
+    first redeemed with gets the same result back. Without a key, or with
+    a different one, it is reported as already redeemed and counted in
+    `stats['key_conflicts']`. That count should stay 0 for a client that
+    retries correctly.
+
+    Args:
+        host: Address to listen on
+        port: Port to listen on, 0 for any free port
+        latency: Base service time per request in seconds
+        jitter: Random extra service time up to this many seconds
+        error_rate: Share of requests failing with HTTP 500
+        lost_rate: Share of requests processed but answered with HTTP 503
+        rate_limit: Requests per second per account, 0 for no limit
+        invalid_ratio: Share of codes reported invalid
+        used_ratio: Share of codes that were already redeemed elsewhere
+        accounts: Optional dict of username -> password; any login is accepted when None
+        seed: Random seed for latency jitter and errors
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.05, jitter=0.0, error_rate=0.0, lost_rate=0.0,
+                 rate_limit=0.0, invalid_ratio=0.0, used_ratio=0.0, accounts=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.lost_rate = lost_rate
+        self.rate_limit = rate_limit
+        self.invalid_ratio = invalid_ratio
+        self.used_ratio = used_ratio
+        self.accounts = accounts
+        self.random = random.Random(seed)
+        self.tokens = {}
+        self.buckets = {}
+        self.redeemed = {}
+        self.stats = {
+            'logins': 0,
+            'requests': 0,
+            'codes': 0,
+            'checked': 0,
+            'errors': 0,
+            'lost': 0,
+            'rate_limited': 0,
+            'redeemed': 0,
+            'replayed': 0,
+            'key_conflicts': 0,
+        }
+        self._lock = threading.Lock()
+        self._thread = None
+
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out as separate writes; without this each
+            # keep-alive response waits ~40 ms on Nagle and delayed ACKs
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                except ValueError:
+                    body = None
+                if not isinstance(body, dict):
+                    status, payload, headers = 400, {'error': "Invalid JSON"}, {}
+                elif self.path == '/login':
+                    status, payload, headers = service.login(body)
+                elif self.path == '/redeem':
+                    status, payload, headers = service.redeem(body, self.headers.get('Authorization', ""))
+                elif self.path == '/status':
+                    status, payload, headers = service.status(body, self.headers.get('Authorization', ""))
+                else:
+                    status, payload, headers = 404, {'error': "Not found"}, {}
+
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests from a background thread."""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mock-redemption", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve requests on the calling thread until interrupted."""
+        self.server.serve_forever()
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+
+    def is_invalid(self, code):
+        """Whether the service treats a code as invalid."""
+        return zlib.crc32(code.encode()) % 10000 < self.invalid_ratio * 10000
+
+    def is_used(self, code):
+        """Whether a code counts as redeemed before this service started."""
+        bucket = zlib.crc32(code.encode()) % 10000
+        return self.invalid_ratio * 10000 <= bucket < (self.invalid_ratio + self.used_ratio) * 10000
+
+    def login(self, body):
+        username = body.get('username', "")
+        password = body.get('password', "")
+        if not username or (self.accounts is not None and self.accounts.get(username) != password):
+            return 401, {'error': "Invalid username or password"}, {}
+        token = uuid.uuid4().hex
+        with self._lock:
+            self.tokens[token] = username
+            self.stats['logins'] += 1
+        return 200, {'token': token}, {}
+
+    def redeem(self, body, authorization):
+        return self._handle(body, authorization, self._redeem_code)
+
+    def status(self, body, authorization):
+        return self._handle(body, authorization, lambda code, key: self._code_status(code))
+
+    def _handle(self, body, authorization, answer):
+        token = authorization[len("Bearer "):] if authorization.startswith("Bearer ") else None
+        with self._lock:
+            username = self.tokens.get(token)
+            self.stats['requests'] += 1
+            if username is None:
+                return 401, {'error': "Not logged in"}, {}
+
+            if self.rate_limit:
+                if username not in self.buckets:
+                    self.buckets[username] = TokenBucket(self.rate_limit, burst=int(self.rate_limit))
+                bucket = self.buckets[username]
+                if not bucket.take():
+                    self.stats['rate_limited'] += 1
+                    return 429, {'error': "Too many requests"}, {'Retry-After': f"{bucket.delay():.3f}"}
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            failure = self.random.random()
+
+        time.sleep(delay)
+        if failure < self.error_rate:
+            with self._lock:
+                self.stats['errors'] += 1
+            return 500, {'error': "Internal error"}, {}
+
+        codes = body.get('codes') or []
+        keys = body.get('idempotency_keys') or [None] * len(codes)
+        if len(codes) > REDEMPTION_BATCH_SIZE or len(keys) != len(codes):
+            return 400, {'error': f"Send 1 to {REDEMPTION_BATCH_SIZE} codes with one key each"}, {}
+
+        results = []
+        with self._lock:
+            for code, key in zip(codes, keys):
+                results.append(answer(code, key))
+            if failure < self.error_rate + self.lost_rate:
+                self.stats['lost'] += 1
+                return 503, {'error': "Service unavailable"}, {}
+        return 200, {'results': results}, {}
+
+    def _code_status(self, code):
+        self.stats['checked'] += 1
+        if self.is_invalid(code):
+            return {'code': code, 'status': STATUS_INVALID, 'message': "Code not recognised"}
+        if code in self.redeemed or self.is_used(code):
+            return {'code': code, 'status': STATUS_ALREADY_REDEEMED, 'message': "Redeemed earlier"}
+        return {'code': code, 'status': STATUS_UNUSED, 'message': ""}
+
+    def _redeem_code(self, code, key):
+        self.stats['codes'] += 1
+        if self.is_invalid(code):
+            return {'code': code, 'status': STATUS_INVALID, 'message': "Code not recognised"}
+        if self.is_used(code):
+            return {'code': code, 'status': STATUS_ALREADY_REDEEMED, 'message': "Redeemed earlier"}
+
+        if code not in self.redeemed:
+            self.redeemed[code] = key
+            self.stats['redeemed'] += 1
+            return {'code': code, 'status': STATUS_REDEEMED, 'message': ""}
+        if key is not None and key == self.redeemed[code]:
+            # A retry of the original request gets the original answer
+            self.stats['replayed'] += 1
+            return {'code': code, 'status': STATUS_REDEEMED, 'message': ""}
+        self.stats['key_conflicts'] += 1
+        return {'code': code, 'status': STATUS_ALREADY_REDEEMED, 'message': "Redeemed earlier"}
@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import cProfile
+import threading
+from collections import Counter
+
+
+class SessionProfiler:
+    """
+    Built-in profiler for a running session.
+
+    cProfile records exact call statistics for the thread that starts the
+    profiler, which is the GUI thread where capture, decoding and UI updates
+    run. A sampling thread additionally records the stacks of every thread
+    at a fixed interval, so background workers show up in the collapsed
+    stack output.
+    """
+
+    def __init__(self, output_dir, sample_interval=0.005):
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.profile = None
+        self.samples = Counter()
+        self.started = None
+        self._sampler = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self.profile is not None
+
+    def start(self):
+        """Start profiling the calling thread and sampling all threads."""
+        if self.running:
+            return
+        self.samples = Counter()
+        self.started = time.strftime('%Y%m%d-%H%M%S')
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample, name="profiler-sampler", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        """
+        Stop profiling and write the results.
+
+        Returns:
+            Tuple of (.prof path, collapsed stack path), or None if not running
+        """
+        if not self.running:
+            return None
+        self.profile.disable()
+        self._stop.set()
+        self._sampler.join()
+
+        base = os.path.join(self.output_dir, f"profile-{self.started}")
+        prof_path = base + '.prof'
+        collapsed_path = base + '.collapsed'
+
+        self.profile.dump_stats(prof_path)
+        with open(collapsed_path, 'w') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+
+        self.profile = None
+        self._sampler = None
+        return prof_path, collapsed_path
+
+    def _sample(self):
+        """Record the stack of every other thread until stopped."""
+        me = threading.get_ident()
+        while not self._stop.wait(self.sample_interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.samples[";".join(reversed(stack))] += 1
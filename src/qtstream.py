@@ -0,0 +1,62 @@
+import asyncio
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class ScanStreamThread(QThread):
+    """
+    Runs QRScanner.stream() on an asyncio loop and emits each code as a Qt signal.
+
+    Signals emitted from this thread are queued to the receivers' thread, so
+    widgets get codes through the normal Qt event loop without polling.
+
+    Args:
+        scanner: QRScanner whose camera or replay is read
+        timeout: Seconds after which the stream ends, or None to run until stopped
+        unique: Emit each code only the first time it is seen
+    """
+
+    code_scanned = pyqtSignal(str)
+    stream_error = pyqtSignal(str)
+
+    def __init__(self, scanner, timeout=None, unique=True, parent=None):
+        super().__init__(parent)
+        self.scanner = scanner
+        self.timeout = timeout
+        self.unique = unique
+        self._loop = None
+        self._task = None
+        self._stopped = False
+
+    def run(self):
+        if self._stopped:
+            return
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._task = self._loop.create_task(self._consume())
+            # stop() may have run before the task existed and found nothing to cancel
+            if self._stopped:
+                self._task.cancel()
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.stream_error.emit(str(e))
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def _consume(self):
+        async for code in self.scanner.stream(timeout=self.timeout, unique=self.unique):
+            self.code_scanned.emit(code)
+
+    def stop(self):
+        """Cancel the stream from any thread; the thread finishes once capture has stopped."""
+        self._stopped = True
+        loop = self._loop
+        if loop is not None and self._task is not None:
+            try:
+                loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                # The loop closed in the meantime
+                pass
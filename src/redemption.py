@@ -0,0 +1,603 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.codes import BLOCK_SIZE
+
+# The service accepts at most this many codes per request, which is why
+# codes are grouped in blocks of the same size
+REDEMPTION_BATCH_SIZE = BLOCK_SIZE
+
+# Per-code results reported by the service, plus 'error' when a batch failed.
+# A status check answers 'unused' for codes that can still be redeemed.
+STATUS_REDEEMED = 'redeemed'
+STATUS_ALREADY_REDEEMED = 'already_redeemed'
+STATUS_INVALID = 'invalid'
+STATUS_UNUSED = 'unused'
+STATUS_ERROR = 'error'
+
+STATUS_LABELS = {
+    STATUS_UNUSED: "Unused",
+    STATUS_REDEEMED: "Redeemed",
+    STATUS_ALREADY_REDEEMED: "Already redeemed",
+    STATUS_INVALID: "Invalid",
+    STATUS_ERROR: "Error",
+}
+
+# An account whose requests keep failing is rested for an exponentially growing time
+ACCOUNT_BACKOFF_BASE = 2.0
+ACCOUNT_BACKOFF_CAP = 120.0
+
+# A throttled account multiplies its request rate by RATE_DECREASE, then
+# adds RATE_INCREASE requests/s for every second it is not throttled (AIMD)
+RATE_DECREASE = 0.5
+RATE_INCREASE = 1.0
+MIN_RATE = 0.2
+
+# Window over which per-account throughput is measured, in seconds
+THROUGHPUT_WINDOW = 30.0
+
+
+class RedemptionError(Exception):
+    """
+    Raised when the redemption service cannot be reached or rejects a request.
+
+    Args:
+        message: Description of the problem
+        retryable: Whether trying again later can succeed
+        retry_after: Seconds the service asked us to wait, if it said
+    """
+
+    def __init__(self, message, retryable=True, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+
+    Tokens refill at `rate` per second up to `burst`; each request takes
+    one. A rate of 0 or None disables the limit.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.stamp = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def delay(self, now=None):
+        """Seconds until a token is available, 0 if one is available now."""
+        if not self.rate:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now=None):
+        """Take a token if one is available. Returns True if it was taken."""
+        if self.delay(now) > 0:
+            return False
+        if self.rate:
+            self.tokens -= 1
+        return True
+
+
+class RedemptionClient:
+    """
+    HTTP client for a redemption service.
+
+    The service is expected to offer three JSON endpoints relative to
+    `base_url`:
+
+        POST /login   {"username", "password"}  ->  {"token"}
+        POST /redeem  {"codes": [...], "idempotency_keys": [...]}
+                      ->  {"results": [{"code", "status", "message"}]}
+        POST /status  {"codes": [...]}
+                      ->  {"results": [{"code", "status", "message"}]}
+
+    /redeem and /status take the token as a Bearer authorization header.
+    /status reports whether codes are unused, already redeemed or invalid
+    without redeeming them. Each code sent to /redeem can
+    carry an idempotency key; a code resubmitted with the same key gets its
+    original result back instead of being redeemed again. Requests share
+    one keep-alive session whose connection pool is sized for the number of
+    concurrent batches, so no request pays for a new TCP/TLS handshake.
+    """
+
+    def __init__(self, base_url, username, password, pool_size=4, timeout=15.0):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.token = None
+        self._login_lock = threading.Lock()
+
+        # requests is imported here, so the app only loads it once redemption is used
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def login(self):
+        """Log in and store the session token."""
+        import requests
+        try:
+            response = self.session.post(
+                f"{self.base_url}/login",
+                json={'username': self.username, 'password': self.password},
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise RedemptionError(f"Could not reach the redemption service: {e}")
+
+        if response.status_code in (401, 403):
+            raise RedemptionError("Login failed: check your username and password", retryable=False)
+        if not response.ok:
+            raise RedemptionError(f"Login failed with HTTP {response.status_code}")
+        try:
+            self.token = response.json()['token']
+        except (ValueError, KeyError):
+            raise RedemptionError("Login response did not contain a token")
+
+    def _ensure_login(self, expired_token=None):
+        # Only one thread logs in; the others reuse the token it got
+        with self._login_lock:
+            if self.token is None or self.token == expired_token:
+                self.login()
+            return self.token
+
+    def redeem_batch(self, codes, idempotency_keys=None):
+        """
+        Submit one batch of codes.
+
+        Args:
+            codes: Up to REDEMPTION_BATCH_SIZE codes
+            idempotency_keys: Optional key per code, the same on every attempt
+
+        Returns:
+            List of result dicts with 'code', 'status' and 'message', one per code
+        """
+        payload = {'codes': list(codes)}
+        if idempotency_keys is not None:
+            payload['idempotency_keys'] = list(idempotency_keys)
+        return self._submit('/redeem', codes, payload)
+
+    def check_batch(self, codes):
+        """
+        Look up the status of one batch of codes without redeeming them.
+
+        Args:
+            codes: Up to REDEMPTION_BATCH_SIZE codes
+
+        Returns:
+            List of result dicts with 'code', 'status' and 'message', one per code
+        """
+        return self._submit('/status', codes, {'codes': list(codes)})
+
+    def _submit(self, path, codes, payload):
+        token = self._ensure_login()
+        response = self._post(path, payload, token)
+        if response.status_code == 401:
+            # The token expired; log in again once and retry
+            token = self._ensure_login(expired_token=token)
+            response = self._post(path, payload, token)
+
+        if response.status_code == 429:
+            try:
+                # Seconds, possibly fractional; an HTTP date is not understood
+                retry_after = float(response.headers.get('Retry-After', ""))
+            except ValueError:
+                retry_after = None
+            raise RedemptionError("Rate limited by the redemption service", retry_after=retry_after)
+        if not response.ok:
+            raise RedemptionError(f"Request to {path} failed with HTTP {response.status_code}")
+        try:
+            reported = {result['code']: result for result in response.json()['results']}
+        except (ValueError, KeyError, TypeError):
+            raise RedemptionError("Malformed response from the redemption service")
+
+        results = []
+        for code in codes:
+            result = reported.get(code)
+            if result is None:
+                results.append({'code': code, 'status': STATUS_ERROR, 'message': "No result returned"})
+            else:
+                results.append({
+                    'code': code,
+                    'status': result.get('status', STATUS_ERROR),
+                    'message': result.get('message', ""),
+                })
+        return results
+
+    def _post(self, path, payload, token):
+        import requests
+        try:
+            return self.session.post(
+                f"{self.base_url}{path}",
+                json=payload,
+                headers={'Authorization': f"Bearer {token}"},
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise RedemptionError(f"Could not reach the redemption service: {e}")
+
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+
+
+class RedemptionEngine:
+    """
+    Submits codes for one account in batches of the redemption limit with bounded concurrency.
+
+    Batches run on a thread pool no larger than the client's connection
+    pool, so at most `max_in_flight` requests are outstanding and each one
+    reuses a kept-alive connection. When a RedemptionScheduler drives the
+    engine, requests are also limited to `rate` per second and the engine
+    keeps the account's health and throughput. A 429 cuts the request rate
+    in half, starting from the rate actually sent when `rate` is unlimited,
+    and every accepted request raises it again, up to `rate`.
+    """
+
+    def __init__(self, client, batch_size=REDEMPTION_BATCH_SIZE, max_in_flight=4, rate=None):
+        self.client = client
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="redeem")
+        self.rate = rate
+        self.bucket = TokenBucket(rate)
+
+        # Account state, updated by the scheduler
+        self.in_flight = 0
+        self.backlog = 0
+        self.failures = 0
+        self.resting_until = 0.0
+        self.disabled = None
+        self.answered = 0
+        self.errors = 0
+        self.latency = None
+        self.recent = deque()
+        self.sent = deque()
+        self.slowed_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self.client.username
+
+    def wait_time(self, now):
+        """
+        Seconds until this account may send another batch.
+
+        Returns:
+            0 if it may send now, None while every slot is busy or the account is disabled
+        """
+        if self.disabled is not None or self.in_flight >= self.max_in_flight:
+            return None
+        return max(self.resting_until - now, self.bucket.delay(now), 0.0)
+
+    def load(self):
+        """Sort key preferring idle, fast accounts."""
+        return (self.in_flight / self.max_in_flight, self.latency or 0.0)
+
+    def throughput(self, now=None):
+        """Codes answered per second over the last THROUGHPUT_WINDOW seconds."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            while self.recent and self.recent[0][0] < now - THROUGHPUT_WINDOW:
+                self.recent.popleft()
+            answered = sum(count for _, count in self.recent)
+        return answered / THROUGHPUT_WINDOW
+
+    def record(self, count, elapsed, error=None):
+        """Account for one finished request of `count` codes that took `elapsed` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            self.latency = elapsed if self.latency is None else 0.8 * self.latency + 0.2 * elapsed
+            self.sent.append(now)
+            while self.sent[0] < now - 1.0:
+                self.sent.popleft()
+            if error is None:
+                self.failures = 0
+                self.answered += count
+                self.recent.append((now, count))
+                if self.bucket.rate:
+                    # Additive increase: RATE_INCREASE requests/s more per second
+                    rate = self.bucket.rate + RATE_INCREASE / self.bucket.rate
+                    self.bucket.rate = min(rate, self.rate) if self.rate else rate
+                return
+            self.errors += 1
+            self.failures += 1
+            if error.retry_after is not None and now - elapsed >= self.slowed_at:
+                # Multiplicative decrease, once for the requests sent at the old rate
+                current = self.bucket.rate or len(self.sent)
+                self.bucket.rate = max(MIN_RATE, current * RATE_DECREASE)
+                self.slowed_at = now
+            if error.retry_after:
+                rest = error.retry_after
+            elif self.failures > 1:
+                # A single failure says little about the account; a run of them does
+                rest = min(ACCOUNT_BACKOFF_CAP, ACCOUNT_BACKOFF_BASE * 2 ** (self.failures - 2))
+            else:
+                rest = 0.0
+            self.resting_until = max(self.resting_until, now + rest)
+
+    def stats(self, now=None):
+        """
+        Report the account's progress.
+
+        Returns:
+            Dict with 'account', 'state', 'backlog', 'in_flight', 'answered',
+            'errors', 'throughput' (codes/s), 'latency' (seconds per request)
+            and 'rate' (requests/s allowed, 0 or None for unlimited)
+        """
+        now = time.monotonic() if now is None else now
+        if self.disabled is not None:
+            state = 'disabled'
+        elif self.resting_until > now:
+            state = 'resting'
+        else:
+            state = 'active'
+        return {
+            'account': self.name,
+            'state': state,
+            'backlog': self.backlog,
+            'in_flight': self.in_flight,
+            'answered': self.answered,
+            'errors': self.errors,
+            'throughput': self.throughput(now),
+            'latency': self.latency,
+            'rate': self.bucket.rate,
+        }
+
+    def batches(self, codes):
+        """Split codes into batches of at most `batch_size`."""
+        codes = list(codes)
+        return [codes[i:i + self.batch_size] for i in range(0, len(codes), self.batch_size)]
+
+    def submit(self, codes, on_result=None):
+        """
+        Queue codes for redemption.
+
+        Args:
+            codes: Codes to redeem
+            on_result: Called from a worker thread with each per-code result dict
+
+        Returns:
+            List of futures, one per batch, each resolving to that batch's results
+        """
+        return [self.executor.submit(self._run_batch, batch, on_result) for batch in self.batches(codes)]
+
+    def redeem(self, codes, on_result=None):
+        """Redeem codes and wait for every batch. Returns all results in submission order."""
+        results = []
+        for future in self.submit(codes, on_result):
+            results.extend(future.result())
+        return results
+
+    def check(self, codes, cache=None, on_result=None, stop=None):
+        """
+        Look up the status of codes without redeeming them.
+
+        Codes with a fresh entry in `cache` are answered from it; the rest
+        are checked in batches on the pool and their answers cached.
+
+        Args:
+            codes: Codes to check
+            cache: Optional StatusCache
+            on_result: Called with each per-code result dict, possibly from a worker thread
+            stop: Optional threading.Event; batches not started when it is set are skipped
+
+        Returns:
+            Dict of code -> result dict, without the codes of skipped batches
+        """
+        results = cache.get_many(codes) if cache is not None else {}
+        if on_result is not None:
+            for result in results.values():
+                on_result(result)
+
+        unchecked = [code for code in codes if code not in results]
+        futures = [self.executor.submit(self._check_batch, batch, cache, on_result, stop)
+                   for batch in self.batches(unchecked)]
+        for future in futures:
+            for result in future.result():
+                results[result['code']] = result
+        return results
+
+    def _check_batch(self, batch, cache, on_result, stop=None):
+        if stop is not None and stop.is_set():
+            return []
+        try:
+            results = self.client.check_batch(batch)
+        except RedemptionError as e:
+            results = [{'code': code, 'status': STATUS_ERROR, 'message': str(e)} for code in batch]
+        else:
+            if cache is not None:
+                cache.put_many(results)
+        if on_result is not None:
+            for result in results:
+                on_result(result)
+        return results
+
+    def _run_batch(self, batch, on_result):
+        try:
+            results = self.client.redeem_batch(batch)
+        except RedemptionError as e:
+            results = [{'code': code, 'status': STATUS_ERROR, 'message': str(e)} for code in batch]
+        if on_result is not None:
+            for result in results:
+                on_result(result)
+        return results
+
+    def close(self):
+        """Wait for queued batches and release the connection pool."""
+        self.executor.shutdown(wait=True)
+        self.client.close()
+
+
+class RedemptionScheduler:
+    """
+    Redeems a RedemptionQueue across several accounts.
+
+    The service throttles each account, so every account gets its own
+    engine: its own client and connection pool, its own token bucket and
+    its own slots. Whenever an account has a free slot and a token, it
+    claims the next batch from the shared queue. Work is therefore sharded
+    on demand: a fast account takes more batches, while an account that
+    slows down or fails takes fewer. An account that errors is rested with
+    exponential backoff, or for as long as the service asked on a 429, and
+    a throttled account also lowers its own request rate (see
+    RedemptionEngine), so it does not fire a full burst again. The
+    codes of a throttled account go straight back to the queue for the
+    other accounts; the codes of a failed request count the attempt and
+    back off, so a batch the service keeps failing does not bounce between
+    accounts. An account whose login is rejected is disabled for the rest
+    of the run.
+    """
+
+    def __init__(self, engines):
+        self.engines = list(engines)
+        self._wake = threading.Event()
+
+    def login(self):
+        """
+        Log every account in, disabling those whose credentials are rejected.
+
+        Raises:
+            RedemptionError: If no account could log in
+        """
+        errors = []
+        for engine in self.engines:
+            try:
+                engine.client.login()
+            except RedemptionError as e:
+                if not e.retryable:
+                    engine.disabled = str(e)
+                errors.append(e)
+        if len(errors) == len(self.engines):
+            raise errors[0]
+
+    def stats(self):
+        """Return the stats dict of every account."""
+        now = time.monotonic()
+        return [engine.stats(now) for engine in self.engines]
+
+    def run(self, queue, on_result=None, stop=None, on_stats=None):
+        """
+        Redeem the queued codes until the queue is drained or `stop` is set.
+
+        Every answer is committed to the queue before `on_result` is
+        called, and codes waiting for a retry are picked up as soon as
+        their backoff ends.
+
+        Args:
+            queue: RedemptionQueue to work through
+            on_result: Called from a worker thread with (code, queue entry) after each update
+            stop: Optional threading.Event that ends the run early
+            on_stats: Called from a worker thread with the account stats after each request
+
+        Raises:
+            RedemptionError: When every account has been disabled
+        """
+        stop = stop or threading.Event()
+        outstanding = set()
+
+        while not stop.is_set():
+            self._wake.clear()
+            active = [engine for engine in self.engines if engine.disabled is None]
+            if not active:
+                break
+
+            now = time.monotonic()
+            ready = sorted((engine for engine in active if engine.wait_time(now) == 0), key=RedemptionEngine.load)
+            dispatched = False
+            for engine in ready:
+                batch = queue.claim(engine.batch_size)
+                if not batch:
+                    break
+                engine.bucket.take(now)
+                outstanding.add(self._dispatch(engine, batch, queue, on_result, on_stats))
+                dispatched = True
+            if dispatched:
+                continue
+
+            finished = {future for future in outstanding if future.done()}
+            for future in finished:
+                if future.exception() is not None:
+                    print(f"Error redeeming codes: {future.exception()}")
+            outstanding -= finished
+            due = queue.next_due()
+            if due is None and not outstanding:
+                break
+
+            # Sleep until a retry is due, an account may send again or a batch finishes
+            waits = [0.2]
+            if due is not None:
+                waits.append(due - time.time())
+            waits.extend(wait for wait in (engine.wait_time(now) for engine in active) if wait is not None)
+            self._wake.wait(max(min(waits), 0.01))
+
+        for future in outstanding:
+            future.result()
+        if not any(engine.disabled is None for engine in self.engines):
+            raise RedemptionError(self.engines[0].disabled if len(self.engines) == 1 else
+                                  "Every account was rejected: " + "; ".join(
+                                      f"{engine.name}: {engine.disabled}" for engine in self.engines
+                                  ), retryable=False)
+
+    def _dispatch(self, engine, batch, queue, on_result, on_stats):
+        codes = [code for code, _ in batch]
+        with engine._lock:
+            engine.in_flight += 1
+            engine.backlog += len(codes)
+
+        def run_batch():
+            started = time.monotonic()
+            error = None
+            try:
+                queue.complete(engine.client.redeem_batch(codes, [key for _, key in batch]))
+            except RedemptionError as e:
+                error = e
+                if not e.retryable:
+                    engine.disabled = str(e)
+                    queue.release(codes)
+                elif e.retry_after is not None:
+                    # The account is throttled, not the codes: hand them to another account
+                    queue.release(codes)
+                else:
+                    # Count the attempt so codes that keep failing back off on every account
+                    queue.fail(codes, str(e))
+            except Exception as e:
+                # Anything else would leave the batch in flight until the next start
+                print(f"Error redeeming codes: {e}")
+                error = RedemptionError(str(e))
+                queue.fail(codes, str(e))
+            finally:
+                engine.record(len(codes), time.monotonic() - started, error)
+                with engine._lock:
+                    engine.in_flight -= 1
+                    engine.backlog -= len(codes)
+                self._wake.set()
+
+            if on_result is not None:
+                for code in codes:
+                    on_result(code, queue.get(code))
+            if on_stats is not None:
+                on_stats(self.stats())
+
+        return engine.executor.submit(run_batch)
+
+    def close(self):
+        """Close every account's engine."""
+        for engine in self.engines:
+            engine.close()
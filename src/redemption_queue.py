@@ -0,0 +1,224 @@
+import time
+import uuid
+import random
+import sqlite3
+import threading
+
+from src.redemption import STATUS_REDEEMED, STATUS_ALREADY_REDEEMED, STATUS_INVALID
+
+# Database next to config.json holding every code submitted for redemption
+REDEMPTION_QUEUE_FILE = 'redemption_queue.db'
+
+# Life cycle of a queued code: pending -> in_flight -> redeemed / invalid / retry,
+# where retry goes back to in_flight once its backoff has passed
+STATE_PENDING = 'pending'
+STATE_IN_FLIGHT = 'in_flight'
+STATE_REDEEMED = 'redeemed'
+STATE_INVALID = 'invalid'
+STATE_RETRY = 'retry'
+STATES = [STATE_PENDING, STATE_IN_FLIGHT, STATE_RETRY, STATE_REDEEMED, STATE_INVALID]
+
+STATE_LABELS = {
+    STATE_PENDING: "Queued",
+    STATE_IN_FLIGHT: "Submitting",
+    STATE_RETRY: "Retrying",
+}
+
+# Exponential backoff between attempts, in seconds
+BACKOFF_BASE = 2.0
+BACKOFF_CAP = 300.0
+
+
+def backoff_delay(attempts, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """
+    Delay before the next attempt after `attempts` failed ones.
+
+    Uses full jitter: a random delay up to the exponential bound, so
+    stations that failed together do not retry together.
+    """
+    return random.uniform(0, min(cap, base * 2 ** max(attempts - 1, 0)))
+
+
+class RedemptionQueue:
+    """
+    Persistent redemption work queue backed by SQLite.
+
+    Every state change is committed before the next step, so after a crash
+    the queue knows which codes were submitted and what came back. Codes
+    that were in flight when the process stopped are retried on the next
+    start. Each code keeps the idempotency key it was given when it was
+    queued, and every attempt sends the same key, so the service can
+    recognise a resubmission and never redeems a code twice.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Commits survive an application crash; the idempotency keys cover a power loss
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS codes (
+                code TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                idempotency_key TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL DEFAULT 0,
+                result TEXT,
+                message TEXT,
+                added REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS codes_due ON codes (state, next_attempt)")
+        self._db.commit()
+        self.recovered = self.recover()
+
+    def recover(self):
+        """
+        Requeue codes left in flight by a previous run.
+
+        Returns:
+            Number of codes requeued
+        """
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "UPDATE codes SET state = ?, next_attempt = 0, updated = ? WHERE state = ?",
+                (STATE_RETRY, time.time(), STATE_IN_FLIGHT)
+            )
+        return cursor.rowcount
+
+    def add(self, codes):
+        """
+        Queue codes that are not in the queue yet.
+
+        Returns:
+            Number of codes added
+        """
+        now = time.time()
+        rows = [(code, STATE_PENDING, uuid.uuid4().hex, now, now) for code in codes]
+        with self._lock, self._db:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO codes (code, state, idempotency_key, added, updated) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            return self._db.total_changes - before
+
+    def claim(self, limit, now=None):
+        """
+        Move up to `limit` due codes to in_flight.
+
+        Returns:
+            List of (code, idempotency key) tuples
+        """
+        now = time.time() if now is None else now
+        with self._lock, self._db:
+            rows = self._db.execute(
+                "SELECT code, idempotency_key FROM codes WHERE state IN (?, ?) AND next_attempt <= ? "
+                "ORDER BY next_attempt, rowid LIMIT ?",
+                (STATE_PENDING, STATE_RETRY, now, limit)
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE codes SET state = ?, attempts = attempts + 1, updated = ? WHERE code = ?",
+                [(STATE_IN_FLIGHT, now, code) for code, _ in rows]
+            )
+        return rows
+
+    def complete(self, results):
+        """
+        Record the service's answer for codes in flight.
+
+        Redeemed and invalid codes are final; anything else is retried
+        after a backoff.
+
+        Args:
+            results: Result dicts with 'code', 'status' and 'message'
+        """
+        now = time.time()
+        with self._lock, self._db:
+            for result in results:
+                status = result['status']
+                if status in (STATUS_REDEEMED, STATUS_ALREADY_REDEEMED):
+                    state, next_attempt = STATE_REDEEMED, 0
+                elif status == STATUS_INVALID:
+                    state, next_attempt = STATE_INVALID, 0
+                else:
+                    state, next_attempt = STATE_RETRY, now + self._backoff(result['code'])
+                self._db.execute(
+                    "UPDATE codes SET state = ?, result = ?, message = ?, next_attempt = ?, updated = ? "
+                    "WHERE code = ?",
+                    (state, status, result.get('message', ""), next_attempt, now, result['code'])
+                )
+
+    def fail(self, codes, message, retry_after=None):
+        """Schedule codes whose submission failed for another attempt."""
+        now = time.time()
+        with self._lock, self._db:
+            for code in codes:
+                delay = max(self._backoff(code), retry_after or 0)
+                self._db.execute(
+                    "UPDATE codes SET state = ?, message = ?, next_attempt = ?, updated = ? WHERE code = ?",
+                    (STATE_RETRY, message, now + delay, now, code)
+                )
+
+    def release(self, codes):
+        """Return claimed codes to the queue without counting the attempt."""
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE codes SET state = ?, attempts = MAX(attempts - 1, 0), next_attempt = 0, updated = ? "
+                "WHERE code = ?",
+                [(STATE_RETRY, time.time(), code) for code in codes]
+            )
+
+    def _backoff(self, code):
+        row = self._db.execute("SELECT attempts FROM codes WHERE code = ?", (code,)).fetchone()
+        return backoff_delay(row[0] if row else 1)
+
+    def next_due(self):
+        """Time at which the next pending or retrying code is due, or None if there are none."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MIN(next_attempt) FROM codes WHERE state IN (?, ?)", (STATE_PENDING, STATE_RETRY)
+            ).fetchone()
+        return row[0]
+
+    def get(self, code):
+        """
+        Return a code's queue entry.
+
+        Returns:
+            Dict with 'state', 'result', 'message' and 'attempts', or None if not queued
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT state, result, message, attempts FROM codes WHERE code = ?", (code,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'state': row[0], 'result': row[1], 'message': row[2] or "", 'attempts': row[3]}
+
+    def counts(self):
+        """Return the number of codes in each state."""
+        counts = dict.fromkeys(STATES, 0)
+        with self._lock:
+            for state, count in self._db.execute("SELECT state, COUNT(*) FROM codes GROUP BY state"):
+                counts[state] = count
+        return counts
+
+    def unfinished(self):
+        """Number of codes that still need to be submitted."""
+        counts = self.counts()
+        return counts[STATE_PENDING] + counts[STATE_IN_FLIGHT] + counts[STATE_RETRY]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def display_status(entry):
+    """Status shown for a queue entry: the service result once final, otherwise the state."""
+    if entry['state'] == STATE_REDEEMED and entry['result']:
+        return entry['result']
+    return entry['state']
@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import cv2
+
+from src.metrics import percentile
+
+# Lossless codecs tried in order when recording
+RECORDING_CODECS = ['FFV1', 'HFYU']
+
+REPLAY_SPEEDS = ['recorded', 'max']
+
+
+class RecordingError(Exception):
+    """Raised when a recording cannot be written."""
+
+
+def sidecar_path(path):
+    """Path of the JSON file holding a recording's frame timestamps."""
+    return os.path.splitext(path)[0] + '.json'
+
+
+class FrameRecorder:
+    """
+    Records raw camera frames to a lossless video with per-frame timestamps.
+
+    Frames are stored with a lossless codec (FFV1 by default) so a replay
+    feeds the decoder exactly the pixels the camera produced. Timestamps go
+    to a JSON sidecar next to the video.
+    """
+
+    def __init__(self, path, nominal_fps=30.0):
+        self.path = path
+        self.nominal_fps = nominal_fps
+        self.writer = None
+        self.codec = None
+        self.size = None
+        self.timestamps = []
+        self.skipped = 0
+        self._start = None
+
+    def write(self, frame):
+        """Append a frame, timestamped relative to the first one."""
+        now = time.monotonic()
+        height, width = frame.shape[:2]
+
+        if self.writer is not None and not self.timestamps and (width, height) != self.size:
+            # The camera delivers another size than it reported; reopen before the first frame
+            self.writer.release()
+            self.writer = None
+        if self.writer is None:
+            self.open((width, height))
+        elif (width, height) != self.size:
+            # The video has a fixed size; drop frames after a resolution change
+            self.skipped += 1
+            return
+
+        if self._start is None:
+            self._start = now
+        self.writer.write(frame)
+        self.timestamps.append(now - self._start)
+
+    def open(self, size):
+        """
+        Open the video for frames of `size`, trying each lossless codec.
+
+        Args:
+            size: (width, height) of the frames
+
+        Raises:
+            RecordingError: If no lossless codec can write the file
+        """
+        for codec in RECORDING_CODECS:
+            writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*codec), self.nominal_fps, size)
+            if writer.isOpened():
+                self.writer, self.codec, self.size = writer, codec, size
+                return
+        raise RecordingError(f"No lossless video codec available to record {self.path}")
+
+    def close(self):
+        """Finish the video and write the timestamp sidecar."""
+        if self.writer is None:
+            return
+        self.writer.release()
+        self.writer = None
+        with open(sidecar_path(self.path), 'w') as f:
+            json.dump({
+                'video': os.path.basename(self.path),
+                'codec': self.codec,
+                'size': list(self.size),
+                'frames': len(self.timestamps),
+                'skipped': self.skipped,
+                'recorded': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'timestamps': [round(t, 6) for t in self.timestamps],
+            }, f)
+
+
+class ReplaySource:
+    """
+    Plays a recording back through the same interface as cv2.VideoCapture.
+
+    At 'recorded' speed each read returns the frame that was current at the
+    same point of the original session, skipping frames exactly like a live
+    camera would and waiting for the next frame when read ahead of the
+    recording. At 'max' speed every read returns the next frame at once.
+    """
+
+    def __init__(self, path, speed='recorded'):
+        self.path = path
+        self.speed = speed
+        with open(sidecar_path(path), 'r') as f:
+            self.info = json.load(f)
+        self.timestamps = self.info['timestamps']
+        self.cap = cv2.VideoCapture(path)
+        self.position = -1
+        self.finished = False
+        self.released = False
+        self._start = None
+
+    def isOpened(self):
+        return self.cap.isOpened() and not self.finished
+
+    def read(self, image=None):
+        """Return (ok, frame) like cv2.VideoCapture.read(), reusing `image` when given."""
+        if self.finished:
+            return False, None
+
+        target = self.position + 1
+        if self.speed == 'recorded':
+            if self._start is None:
+                self._start = time.monotonic()
+            elapsed = time.monotonic() - self._start
+            # Skip forward to the newest frame recorded at or before now
+            while target + 1 < len(self.timestamps) and self.timestamps[target + 1] <= elapsed:
+                target += 1
+            # A reader ahead of the recording waits for the next frame, like cap.read() on a camera
+            if target < len(self.timestamps) and self.timestamps[target] > elapsed:
+                time.sleep(self.timestamps[target] - elapsed)
+
+        # Frames between the current and target positions are skipped without decoding
+        while self.position + 1 < target:
+            if not self.cap.grab():
+                break
+            self.position += 1
+
+        ok, frame = self.cap.read(image)
+        if not ok or self.position + 1 >= len(self.timestamps):
+            self.finished = True
+            return False, None
+        self.position += 1
+        return True, frame
+
+    def current_time(self):
+        """Recording timestamp of the frame returned by the last read."""
+        if self.position < 0:
+            return 0.0
+        return self.timestamps[min(self.position, len(self.timestamps) - 1)]
+
+    def duration(self):
+        """Length of the recording in seconds."""
+        return self.timestamps[-1] if self.timestamps else 0.0
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.info['size'][0]
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.info['size'][1]
+        if prop == cv2.CAP_PROP_FPS:
+            return len(self.timestamps) / self.duration() if self.duration() else 0.0
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        # Device properties have no effect on a recording
+        return False
+
+    def release(self):
+        """Close the recording; calling it again does nothing."""
+        if not self.released:
+            self.cap.release()
+            self.released = True
+        self.finished = True
+
+
+class ReplayReport:
+    """Collects per-card timings while a recording is replayed."""
+
+    def __init__(self, source):
+        self.source = source
+        self.wall_start = time.monotonic()
+        self.accepted = []
+
+    def code_accepted(self, code):
+        """Record the replay and wall-clock time at which a code was accepted."""
+        self.accepted.append({
+            'code': code,
+            'replay_time': self.source.current_time(),
+            'wall_time': time.monotonic() - self.wall_start,
+        })
+
+    def summary(self):
+        """
+        Summarise the replay.
+
+        Time-to-first-decode for a card is measured from the previous
+        accepted code (or the start of the recording), which matches how
+        cards are presented one after another at a station.
+        """
+        wall = time.monotonic() - self.wall_start
+        previous = 0.0
+        ttfd = []
+        for entry in self.accepted:
+            ttfd.append(entry['replay_time'] - previous)
+            previous = entry['replay_time']
+        ordered = sorted(ttfd)
+
+        return {
+            'recording': self.source.path,
+            'speed': self.source.speed,
+            'frames_read': self.source.position + 1,
+            'recording_seconds': self.source.duration(),
+            'wall_seconds': wall,
+            'codes': len(self.accepted),
+            'codes_per_minute': len(self.accepted) / wall * 60.0 if wall else 0.0,
+            'time_to_first_decode': {
+                'per_card': [round(t, 3) for t in ttfd],
+                'p50': percentile(ordered, 50),
+                'p95': percentile(ordered, 95),
+                'max': ordered[-1] if ordered else 0.0,
+            },
+            'accepted': self.accepted,
+        }
+
+    def write(self):
+        """Write the summary next to the recording and return its path."""
+        path = os.path.splitext(self.source.path)[0] + time.strftime('.replay-%Y%m%d-%H%M%S.json')
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
@@ -1,61 +1,240 @@
 import cv2
 import time
+import threading
 import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.exposure import apply_controls
+from src.memory import FramePool
+from src.metrics import PipelineMetrics
+from src.replay import FrameRecorder, ReplaySource, RecordingError
+
+# Pause before reading again when the camera has no frame ready
+FRAME_RETRY_DELAY = 0.01
+
+# Finder pattern check run before the QR detector in two-stage mode: the
+# adaptive threshold block size and offset, and the number of nested square
+# contours (finder patterns) a frame needs before it is searched for a code
+FINDER_BLOCK_SIZE = 15
+FINDER_OFFSET = 10
+FINDER_MIN_PATTERNS = 3
+
+# Per-frame outcomes counted by scan_qr_code() in two-stage mode
+DECODE_STATS = ['frames', 'no_candidate', 'no_quad', 'tracked', 'decode_failed', 'decoded', 'fallback']
 
 class QRScanner:
     def __init__(self):
         self.cap = None
-        # Use OpenCV's QR code detector
-        self.qr_detector = cv2.QRCodeDetector()
+        # OpenCV's QR code detector, one per decoding thread
+        self._local = threading.local()
+        
+        # Decoder options, updated live through apply_settings()
+        self.preprocess_fallback = True
+        self.two_stage = True
+        
+        # Corner points of the code located in the last scanned frame, or None,
+        # and how two-stage scanning settled that frame (see DECODE_STATS)
+        self.last_quad = None
+        self.last_outcome = None
+        
+        # Frames each two-stage step settled, see DECODE_STATS
+        self.decode_stats = dict.fromkeys(DECODE_STATS, 0)
+        self._stats_lock = threading.Lock()
+        
+        # Decode threads used by stream(), assigned by the thread budget
+        self.decode_workers = 1
+        
+        # Per-stage timers and throughput counters
+        self.metrics = PipelineMetrics()
+        
+        # Optional recorder capturing every frame read from the camera
+        self.recorder = None
+        
+        # Frames are read into a fixed set of reused buffers
+        self.frame_pool = FramePool()
+        
+    @property
+    def qr_detector(self):
+        # cv2.QRCodeDetector keeps state between calls, so threads must not share one
+        detector = getattr(self._local, 'qr_detector', None)
+        if detector is None:
+            detector = self._local.qr_detector = cv2.QRCodeDetector()
+        return detector
         
-    def start_camera(self, camera_index=0):
-        """Start the webcam capture."""
+    def apply_settings(self, config):
+        """Apply decoder options from the configuration without touching the camera."""
+        self.preprocess_fallback = config.preprocess_fallback
+        self.two_stage = config.two_stage_decode
+        
+    def set_decode_workers(self, workers):
+        """
+        Set the number of frames stream() decodes in parallel.
+        
+        Every frame being decoded and the one being captured hold a pooled
+        buffer, so the frame pool grows with the workers.
+        """
+        self.decode_workers = max(workers, 1)
+        capacity = max(3, self.decode_workers + 2)
+        if capacity != self.frame_pool.capacity:
+            self.frame_pool.capacity = capacity
+            self.frame_pool.clear()
+        
+    def start_camera(self, camera_index=0, resolution=(1280, 720), controls=None):
+        """
+        Start the webcam capture.
+        
+        Args:
+            camera_index: Index of the camera to open
+            resolution: (width, height) to request from the device
+            controls: Tuned exposure, gain and focus values to apply instead of the driver's automatic ones
+        """
         try:
             self.cap = cv2.VideoCapture(camera_index)
             if not self.cap.isOpened():
                 raise Exception(f"Could not open camera at index {camera_index}")
                 
             # Set camera properties for better detection
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-            self.cap.set(cv2.CAP_PROP_AUTOFOCUS, 1)  # Enable autofocus if available
+            self.set_resolution(resolution)
+            if controls:
+                apply_controls(self.cap, controls)
+            else:
+                self.cap.set(cv2.CAP_PROP_AUTOFOCUS, 1)  # Enable autofocus if available
             
             return self.cap.isOpened()
         except Exception as e:
             print(f"Error starting camera: {str(e)}")
             return False
     
+    def set_resolution(self, resolution):
+        """Request a (width, height) frame size from the open camera."""
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+        
+    def start_replay(self, path, speed='recorded'):
+        """
+        Use a recorded session instead of a live camera.
+        
+        Args:
+            path: Recording written by FrameRecorder
+            speed: 'recorded' to keep the original timing or 'max' for every frame
+        """
+        try:
+            self.cap = ReplaySource(path, speed)
+            if not self.cap.isOpened():
+                raise Exception(f"Could not open recording {path}")
+            return True
+        except Exception as e:
+            print(f"Error starting replay: {str(e)}")
+            return False
+    
+    def is_replay(self):
+        """Whether frames come from a recording."""
+        return isinstance(self.cap, ReplaySource)
+    
+    def replay_finished(self):
+        """Whether a replayed recording has run out of frames."""
+        return self.is_replay() and self.cap.finished
+    
+    def start_recording(self, path):
+        """
+        Record every frame read from now on to a lossless video.
+        
+        The video is opened at the camera's frame size right away, so a
+        missing codec is reported here rather than on the first frame.
+        
+        Returns:
+            True if recording started
+        """
+        self.stop_recording()
+        recorder = FrameRecorder(path)
+        if self.cap is not None:
+            size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            try:
+                if size[0] and size[1]:
+                    recorder.open(size)
+            except RecordingError as e:
+                print(f"Error starting recording: {e}")
+                return False
+        self.recorder = recorder
+        return True
+    
+    def stop_recording(self):
+        """Finish the current recording, if any."""
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+    
     def stop_camera(self):
         """Release the webcam."""
-        if self.cap and self.cap.isOpened():
+        self.stop_recording()
+        # A finished replay reports itself closed but still holds the video open
+        if self.cap is not None:
             self.cap.release()
+        self.frame_pool.clear()
             
     def get_frame(self):
-        """Capture a frame from the webcam."""
+        """
+        Capture a frame from the webcam.
+        
+        The frame lives in a pooled buffer that is overwritten a few reads
+        later; copy it to keep it longer.
+        """
         if self.cap and self.cap.isOpened():
-            ret, frame = self.cap.read()
+            with self.metrics.time('get_frame'):
+                ret, frame = self.cap.read(self.frame_pool.acquire())
             if ret:
+                self.frame_pool.keep(frame)
+                self.metrics.count('capture')
+                if self.recorder is not None:
+                    try:
+                        self.recorder.write(frame)
+                    except RecordingError as e:
+                        print(f"Error recording frames: {e}")
+                        self.stop_recording()
                 return frame
         return None
     
-    def scan_qr_code(self, frame):
-        """Scan for QR codes in the given frame."""
+    def scan_qr_code(self, frame, skip_region=None):
+        """
+        Scan for QR codes in the given frame.
+        
+        Args:
+            frame: BGR frame
+            skip_region: Optional function called with the grayscale frame and
+                the corner points of a located code; returning True skips
+                decoding it, e.g. for a card that was already read. Only
+                two-stage scanning locates codes before decoding them.
+        """
         if frame is None:
             return []
             
+        self.metrics.count('decode')
+        if self.two_stage:
+            return self._scan_two_stage(frame, skip_region)
+            
         results = []
-        
+        self.last_outcome = None
         try:
             # First, try with standard QR code detector
-            data, bbox, _ = self.qr_detector.detectAndDecode(frame)
+            with self.metrics.time('detectAndDecode'):
+                data, bbox, _ = self.qr_detector.detectAndDecode(frame)
+            self.last_quad = bbox
             
             if data:
                 results.append({'data': data, 'type': 'QR'})
                 return results
                 
+            if not self.preprocess_fallback:
+                return results
+                
             # If no QR code found, try with image processing to enhance detection
-            processed_frame = self._preprocess_frame(frame)
-            data, bbox, _ = self.qr_detector.detectAndDecode(processed_frame)
+            with self.metrics.time('preprocess'):
+                processed_frame = self._preprocess_frame(frame)
+            with self.metrics.time('detectAndDecode'):
+                data, bbox, _ = self.qr_detector.detectAndDecode(processed_frame)
+            if self.last_quad is None:
+                self.last_quad = bbox
             
             if data:
                 results.append({'data': data, 'type': 'QR'})
@@ -65,12 +244,114 @@ class QRScanner:
             
         return results
     
+    def _scan_two_stage(self, frame, skip_region=None):
+        """
+        Scan a frame by finding a code before paying for decoding it.
+        
+        Stage one is a cheap finder pattern check that ends the scan of
+        frames without a code. Stage two locates the code with
+        QRCodeDetector.detect and decodes only the quad it found. The
+        preprocessed frame gets the same treatment when the fallback is on.
+        """
+        outcome = 'no_candidate'
+        fallback = False
+        results = []
+        self.last_quad = None
+        try:
+            with self.metrics.time('cvtColor'):
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            with self.metrics.time('finder'):
+                candidate = self._has_finder_patterns(gray)
+                
+            if candidate:
+                outcome, data, self.last_quad = self._detect_then_decode(gray, gray, skip_region)
+                if not data and outcome != 'tracked' and self.preprocess_fallback:
+                    fallback = True
+                    with self.metrics.time('preprocess'):
+                        processed = self._enhance_gray(gray)
+                    retry, data, quad = self._detect_then_decode(processed, gray, skip_region)
+                    # The frame only counts as quad-less if neither pass found one
+                    if data or outcome == 'no_quad':
+                        outcome = retry
+                        self.last_quad = quad
+                if data:
+                    results.append({'data': data, 'type': 'QR'})
+        except Exception as e:
+            print(f"Error detecting QR code: {e}")
+            
+        self.last_outcome = outcome
+        self.metrics.count(f"stage_{outcome}")
+        with self._stats_lock:
+            self.decode_stats['frames'] += 1
+            self.decode_stats[outcome] += 1
+            self.decode_stats['fallback'] += fallback
+        return results
+        
+    def _has_finder_patterns(self, gray):
+        """Whether a grayscale frame holds enough finder-pattern-like squares to hold a QR code."""
+        blurred = cv2.GaussianBlur(gray, (3, 3), 0)
+        binary = cv2.adaptiveThreshold(
+            blurred, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
+            cv2.THRESH_BINARY_INV, FINDER_BLOCK_SIZE, FINDER_OFFSET
+        )
+        contours, hierarchy = cv2.findContours(binary, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        if hierarchy is None:
+            return False
+            
+        # A finder pattern is a square with a square inside a square: a contour with a grandchild
+        child = hierarchy[0][:, 2]
+        grandchild = np.where(child >= 0, child[child], -1)
+        patterns = 0
+        for index in np.flatnonzero(grandchild >= 0):
+            x, y, w, h = cv2.boundingRect(contours[index])
+            if w * h >= 16 and 0.5 < w / h < 2 and cv2.contourArea(contours[index]) > 0.4 * w * h:
+                patterns += 1
+                if patterns >= FINDER_MIN_PATTERNS:
+                    return True
+        return False
+        
+    def _detect_then_decode(self, image, gray, skip_region=None):
+        """
+        Locate a code and decode only the quad found.
+        
+        Args:
+            image: Image to search, the grayscale frame or its enhanced version
+            gray: The grayscale frame, handed to skip_region
+            skip_region: See scan_qr_code()
+        
+        Returns:
+            Tuple of (outcome, data, points) where outcome is 'no_quad', 'tracked',
+            'decode_failed' or 'decoded'
+        """
+        with self.metrics.time('detect'):
+            found, points = self.qr_detector.detect(image)
+        if not found or points is None:
+            return 'no_quad', "", None
+        if skip_region is not None and skip_region(gray, points):
+            return 'tracked', "", points
+        with self.metrics.time('decode'):
+            data, _ = self.qr_detector.decode(image, points)
+        return ('decoded' if data else 'decode_failed'), data, points
+        
+    def reset_decode_stats(self):
+        """Zero the two-stage counters."""
+        with self._stats_lock:
+            self.decode_stats = dict.fromkeys(DECODE_STATS, 0)
+            
     def _preprocess_frame(self, frame):
         """Preprocess the frame to enhance QR code detection."""
         try:
             # Convert to grayscale
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            with self.metrics.time('cvtColor'):
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            return self._enhance_gray(gray)
+        except Exception as e:
+            print(f"Error preprocessing frame: {e}")
+            return frame
             
+    def _enhance_gray(self, gray):
+        """Enhance a grayscale frame for QR code detection."""
+        try:
             # Apply slight Gaussian blur to reduce noise
             blurred = cv2.GaussianBlur(gray, (5, 5), 0)
             
@@ -88,7 +369,7 @@ class QRScanner:
             return morph
         except Exception as e:
             print(f"Error preprocessing frame: {e}")
-            return frame
+            return gray
     
     def scan_continuously(self, callback, stop_after_detection=True, timeout=30):
         """
@@ -109,8 +390,12 @@ class QRScanner:
         qr_data = None
         
         while time.time() - start_time < timeout:
+            # Reading blocks until the camera delivers, which paces the loop
             frame = self.get_frame()
             if frame is None:
+                if self.replay_finished() or not self.cap or not self.cap.isOpened():
+                    break
+                time.sleep(FRAME_RETRY_DELAY)
                 continue
                 
             qr_codes = self.scan_qr_code(frame)
@@ -121,7 +406,106 @@ class QRScanner:
                 if stop_after_detection:
                     break
                     
-            # Small delay to not hog CPU
-            time.sleep(0.1)
+        return qr_data
+    
+    async def stream(self, timeout=None, unique=True, max_pending=8):
+        """
+        Yield scanned codes as they are decoded.
+        
+        Usage: ``async for code in scanner.stream(): ...``
+        
+        Capture runs on its own worker thread and decoding on
+        `decode_workers` threads, so the event loop never blocks; frames
+        keep being captured while earlier ones decode. Decoded codes wait in a queue of `max_pending`
+        entries; when the consumer falls behind, the queue fills and
+        capture pauses instead of piling up frames. Leaving the loop or
+        cancelling the consuming task stops capture. The stream also ends
+        when `timeout` expires or a replay runs out of frames. Capture has
+        stopped once the stream is closed, for example after leaving an
+        ``async with contextlib.aclosing(scanner.stream())`` block.
+        
+        Args:
+            timeout: Seconds after which the stream ends, or None to run until stopped
+            unique: Yield each code only the first time it is seen
+            max_pending: Codes buffered for a slow consumer before capture pauses
+        """
+        # Only callers of the stream need asyncio, so the GUI does not import it
+        import asyncio
+        loop = asyncio.get_running_loop()
+        # The camera is read from one thread; each decode thread has its own detector
+        workers = self.decode_workers
+        capture = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-capture")
+        decode = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stream-decode")
+        codes = asyncio.Queue(maxsize=max_pending)
+        finished = object()
+        
+        async def scan():
+            if not self.cap or not self.cap.isOpened():
+                if not await loop.run_in_executor(capture, self.start_camera):
+                    return
+            seen = set()
+            pending = deque()
             
-        return qr_data 
\ No newline at end of file
+            async def publish(decoding):
+                for result in await decoding:
+                    if unique and result['data'] in seen:
+                        continue
+                    seen.add(result['data'])
+                    await codes.put(result['data'])
+                self.metrics.set_gauge('queue_depth', len(pending) + codes.qsize())
+                    
+            next_frame = loop.run_in_executor(capture, self.get_frame)
+            while True:
+                frame = await next_frame
+                if frame is None:
+                    if self.replay_finished() or not self.cap or not self.cap.isOpened():
+                        while pending:
+                            await publish(pending.popleft())
+                        return
+                    await asyncio.sleep(FRAME_RETRY_DELAY)
+                    next_frame = loop.run_in_executor(capture, self.get_frame)
+                    continue
+                    
+                # Pooled frame buffers outlive a few reads, so capture can overlap the decodes
+                next_frame = loop.run_in_executor(capture, self.get_frame)
+                pending.append(loop.run_in_executor(decode, self.scan_qr_code, frame))
+                # Frames waiting to be decoded plus codes waiting for the consumer
+                self.metrics.set_gauge('queue_depth', len(pending) + codes.qsize())
+                
+                # Publish in capture order, waiting only when every decode worker is busy
+                while pending and (len(pending) >= workers or pending[0].done()):
+                    await publish(pending.popleft())
+                    
+        async def produce():
+            # Cancellation skips both puts; the consumer is already gone then
+            try:
+                await scan()
+            except Exception as e:
+                await codes.put(e)
+            await codes.put(finished)
+            
+        producer = loop.create_task(produce())
+        deadline = None if timeout is None else loop.time() + timeout
+        try:
+            while True:
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    return
+                try:
+                    item = await asyncio.wait_for(codes.get(), remaining)
+                except asyncio.TimeoutError:
+                    return
+                if item is finished:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
+            # Wait for an in-flight read or decode, off the loop, so the camera can be released after
+            for executor in (capture, decode):
+                await loop.run_in_executor(None, executor.shutdown) 
\ No newline at end of file
@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import time
+from collections import deque
+
+from src.corpus import SyntheticSource
+from src.memory import format_bytes
+
+# Seconds of samples the RSS floor is taken over. The allocator returns
+# memory to the OS in cycles of about a minute, so the window must be
+# longer than one cycle to always contain a trough.
+FLOOR_WINDOW = 120.0
+
+
+def parse_duration(text):
+    """Parse a duration such as '90', '45s', '30m' or '8h' into seconds."""
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    text = str(text).strip().lower()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+class SoakRun:
+    """
+    Drives the application from a synthetic camera and watches its RSS.
+
+    Single samples swing with short-lived allocations, so growth is judged
+    on the RSS floor: the lowest sample of the last `floor_window` seconds,
+    however many samples `interval` puts in that window. The
+    floor when the warm-up period ends becomes the baseline, giving caches,
+    the session code list and Qt time to reach their steady state. The run
+    fails as soon as the floor exceeds the baseline by `max_growth` bytes.
+    """
+
+    def __init__(self, window, duration, max_growth, warmup, interval, log_path=None, floor_window=FLOOR_WINDOW):
+        self.window = window
+        self.duration = duration
+        self.max_growth = max_growth
+        self.warmup = warmup
+        self.interval = interval
+        self.log_path = log_path
+        self.started = None
+        self.baseline = None
+        self.peak = 0
+        self.last = None
+        self.failure = None
+        self.recent = deque(maxlen=max(int(floor_window // interval), 1) + 1)
+
+    def sample(self):
+        """
+        Take a memory sample.
+
+        Returns:
+            False once the run is over, either finished or failed
+        """
+        elapsed = time.monotonic() - self.started
+        usage = self.window.record_memory()
+        rss = usage['rss']
+        self.last = usage
+        self.peak = max(self.peak, rss)
+        self.recent.append(rss)
+        floor = min(self.recent)
+
+        if self.baseline is None and elapsed >= self.warmup:
+            self.baseline = floor
+        growth = floor - self.baseline if self.baseline is not None else 0
+
+        if self.log_path:
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps({
+                    'elapsed': round(elapsed, 1),
+                    'floor': floor,
+                    'growth': growth,
+                    'codes': len(self.window.codes_found),
+                    'memory': usage,
+                }) + "\n")
+
+        print(f"[{elapsed / 60:6.1f} min] rss {format_bytes(rss)}, floor {format_bytes(floor)}, "
+              f"growth {format_bytes(growth)}, "
+              f"{len(self.window.codes_found)} codes")
+
+        if growth > self.max_growth:
+            self.failure = (f"RSS floor grew {format_bytes(growth)} over the baseline of {format_bytes(self.baseline)}, "
+                            f"more than the allowed {format_bytes(self.max_growth)}")
+            return False
+        return elapsed < self.duration
+
+    def summary(self):
+        """Describe the outcome of the run."""
+        lines = [f"Peak RSS {format_bytes(self.peak)}"]
+        if self.last is not None:
+            lines.append("Final: " + ", ".join(f"{name} {format_bytes(size)}" for name, size in self.last.items()))
+        if self.baseline is None:
+            lines.append("Run ended before the warm-up period; no baseline was taken")
+        lines.append(f"FAIL: {self.failure}" if self.failure else "PASS: memory stayed within the threshold")
+        return "\n".join(lines)
+
+
+def run_soak(duration, max_growth, warmup=300, interval=30, width=1280, height=720,
+             cards=200, frames_per_card=30, log_path=None, show=False):
+    """
+    Run the full GUI pipeline on a synthetic camera and check its memory stays flat.
+
+    Args:
+        duration: Length of the run in seconds
+        max_growth: Allowed RSS growth over the post-warm-up baseline in bytes
+        warmup: Seconds to run before taking the baseline
+        interval: Seconds between memory samples
+        width: Synthetic frame width
+        height: Synthetic frame height
+        cards: Number of distinct cards before payloads repeat
+        frames_per_card: Frames each card stays in view
+        log_path: Optional JSON lines file for every sample
+        show: Show the window instead of rendering offscreen
+
+    Returns:
+        Exit code: 0 if memory stayed within the threshold, 1 otherwise
+    """
+    if not show:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+    from src.gui import MainWindow
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    window = MainWindow()
+    window.show()
+
+    # Feed the synthetic camera through the normal capture and auto-scan timers
+    window.config.auto_detect = True
+    window.scanner.cap = SyntheticSource(width, height, cards, frames_per_card)
+    window.on_camera_opened(True)
+
+    run = SoakRun(window, duration, max_growth, warmup, interval, log_path)
+    timer = QTimer()
+
+    def tick():
+        if not run.sample():
+            timer.stop()
+            app.quit()
+
+    timer.timeout.connect(tick)
+    run.started = time.monotonic()
+    timer.start(int(interval * 1000))
+    print(f"Soak test running for {duration / 60:.0f} min, baseline after {warmup / 60:.0f} min, "
+          f"allowed growth {format_bytes(max_growth)}")
+    app.exec_()
+
+    window.toggle_camera()
+    window.close()
+    print(run.summary())
+    return 1 if run.failure else 0
@@ -0,0 +1,102 @@
+import time
+import sqlite3
+import threading
+
+from src.redemption import STATUS_UNUSED, STATUS_ERROR
+
+# Database next to config.json holding the results of code status checks
+STATUS_CACHE_FILE = 'status_cache.db'
+
+# How long a status is trusted, in seconds. A used or invalid code never
+# becomes redeemable again, but an unused one can be redeemed elsewhere at
+# any time.
+UNUSED_TTL = 15 * 60
+FINAL_TTL = 30 * 24 * 3600
+
+# SQLite limits the number of parameters in one statement
+_LOOKUP_CHUNK = 500
+
+
+class StatusCache:
+    """
+    Persistent TTL cache of code statuses, keyed by code.
+
+    Status checks cost calls to the redemption service, so their answers
+    are kept across sessions until they expire. Error results are never
+    cached.
+    """
+
+    def __init__(self, path, unused_ttl=UNUSED_TTL, final_ttl=FINAL_TTL):
+        self.path = path
+        self.unused_ttl = unused_ttl
+        self.final_ttl = final_ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS statuses (
+                code TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                message TEXT,
+                expires REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+        self.purge()
+
+    def get(self, code, now=None):
+        """
+        Return the cached result for a code.
+
+        Returns:
+            Result dict with 'code', 'status' and 'message', or None if unknown or expired
+        """
+        return self.get_many([code], now).get(code)
+
+    def get_many(self, codes, now=None):
+        """
+        Return the cached results for several codes.
+
+        Returns:
+            Dict of code -> result dict for the codes with a fresh entry
+        """
+        now = time.time() if now is None else now
+        codes = list(codes)
+        results = {}
+        with self._lock:
+            for start in range(0, len(codes), _LOOKUP_CHUNK):
+                chunk = codes[start:start + _LOOKUP_CHUNK]
+                rows = self._db.execute(
+                    f"SELECT code, status, message FROM statuses "
+                    f"WHERE code IN ({', '.join('?' * len(chunk))}) AND expires > ?",
+                    chunk + [now]
+                )
+                for code, status, message in rows:
+                    results[code] = {'code': code, 'status': status, 'message': message or ""}
+        return results
+
+    def put_many(self, results, now=None):
+        """Cache result dicts with 'code', 'status' and 'message'."""
+        now = time.time() if now is None else now
+        rows = [
+            (result['code'], result['status'], result.get('message', ""),
+             now + (self.unused_ttl if result['status'] == STATUS_UNUSED else self.final_ttl))
+            for result in results if result['status'] != STATUS_ERROR
+        ]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO statuses VALUES (?, ?, ?, ?)", rows)
+
+    def purge(self, now=None):
+        """Delete expired entries. Returns the number deleted."""
+        now = time.time() if now is None else now
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM statuses WHERE expires <= ?", (now,)).rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM statuses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,453 @@
+# Pokemon Color Theme
+POKEMON_COLORS = {
+    # Primary colors
+    'primary': '#FF3B30',         # Modern Pokémon red
+    'secondary': '#007AFF',       # Vibrant blue
+    'accent': '#FFCC00',          # Pokémon yellow
+
+    # UI colors
+    'background': '#121214',      # Dark background
+    'card_bg': '#18181B',         # Slightly lighter card background
+    'surface': '#232329',         # Surface elements
+    'input_bg': '#27272C',        # Input field background
+
+    # Border colors
+    'border': '#323238',          # Border color
+    'border_light': '#3C3C44',    # Lighter border for highlights
+    'border_focus': '#4A4A55',    # Focus border color
+
+    # Text colors
+    'text': '#FFFFFF',            # Primary text
+    'text_secondary': '#B0B0B8',  # Secondary text
+    'text_disabled': '#6E6E76',   # Disabled text
+
+    # Functional colors
+    'success': '#34C759',         # Success green
+    'warning': '#FF9500',         # Warning orange
+    'error': '#FF453A',           # Error red
+
+    # Button states
+    'hover': '#2C2C35',           # Hover state color
+    'active': '#343441',          # Active state color
+
+    # Neutral colors
+    'gray': '#8E8E93',
+    'light_gray': '#F2F2F7',
+    'black': '#000000',
+}
+
+# Button variants: background, hover and pressed colors
+BUTTON_VARIANTS = {
+    'primary': (POKEMON_COLORS['primary'], "#FF4F45", "#E6352B"),
+    'secondary': (POKEMON_COLORS['secondary'], "#0A84FF", "#0070EB"),
+    'success': (POKEMON_COLORS['success'], "#4CD964", "#2DB14E"),
+    'neutral': (POKEMON_COLORS['surface'], POKEMON_COLORS['hover'], POKEMON_COLORS['active']),
+}
+
+_stylesheet = None
+
+
+def _button_variants():
+    rules = []
+    for variant, (background, hover, pressed) in BUTTON_VARIANTS.items():
+        rules.append(f"""
+            QPushButton[variant="{variant}"] {{
+                background-color: {background};
+                color: {POKEMON_COLORS['text']};
+                border-radius: 4px;
+                padding: 6px 8px;
+                font-weight: 600;
+                min-width: 60px;
+                min-height: 14px;
+                font-size: 12px;
+            }}
+            QPushButton[variant="{variant}"]:hover {{
+                background-color: {hover};
+            }}
+            QPushButton[variant="{variant}"]:pressed {{
+                background-color: {pressed};
+            }}
+        """)
+    rules.append("""
+            QPushButton[prominent="true"] {
+                padding: 8px 12px;
+                min-width: 80px;
+            }
+    """)
+    return "".join(rules)
+
+
+def _combo_box(selector):
+    return f"""
+            {selector} {{
+                background-color: {POKEMON_COLORS['input_bg']};
+                color: {POKEMON_COLORS['text']};
+                border: 1px solid {POKEMON_COLORS['border']};
+                border-radius: 6px;
+                padding: 8px 12px;
+                font-size: 13px;
+                font-weight: 500;
+                selection-background-color: {POKEMON_COLORS['surface']};
+                selection-color: {POKEMON_COLORS['text']};
+            }}
+            {selector}:hover, {selector}:on {{
+                border-color: {POKEMON_COLORS['accent']};
+                background-color: {POKEMON_COLORS['surface']};
+            }}
+            {selector}::drop-down {{
+                subcontrol-origin: padding;
+                subcontrol-position: right center;
+                width: 24px;
+                background-color: transparent;
+            }}
+            {selector} QAbstractItemView {{
+                background-color: {POKEMON_COLORS['card_bg']};
+                color: {POKEMON_COLORS['text']};
+                border: 2px solid {POKEMON_COLORS['accent']};
+                border-radius: 6px;
+                selection-background-color: {POKEMON_COLORS['secondary']};
+                selection-color: white;
+                padding: 6px;
+                outline: 0px;
+            }}
+            {selector} QAbstractItemView::item {{
+                padding: 8px 10px;
+                min-height: 22px;
+                border-radius: 4px;
+                margin: 2px 4px;
+            }}
+            {selector} QAbstractItemView::item:selected {{
+                background-color: {POKEMON_COLORS['secondary']};
+            }}
+            {selector} QAbstractItemView::item:hover:!selected {{
+                background-color: {POKEMON_COLORS['hover']};
+            }}
+    """
+
+
+def build_stylesheet():
+    """
+    Build the application style sheet for the main window.
+
+    Widgets are selected by object name, and their states by dynamic
+    properties (see set_state), so the whole theme is parsed once when it
+    is installed instead of every time a widget changes state.
+
+    Returns:
+        Style sheet text
+    """
+    return f"""
+            QStatusBar#main_status {{
+                background-color: {POKEMON_COLORS['card_bg']};
+                color: {POKEMON_COLORS['text_secondary']};
+                padding: 8px 20px;
+                font-size: 13px;
+                border-top: 1px solid {POKEMON_COLORS['border']};
+            }}
+            QLabel#queue_label {{
+                color: {POKEMON_COLORS['text_secondary']};
+                padding: 0 8px;
+            }}
+            QMenuBar#main_menu {{
+                background-color: {POKEMON_COLORS['card_bg']};
+                color: {POKEMON_COLORS['text_secondary']};
+            }}
+            QMenuBar#main_menu::item:selected, QMenuBar#main_menu QMenu::item:selected {{
+                background-color: {POKEMON_COLORS['surface']};
+                color: {POKEMON_COLORS['text']};
+            }}
+            QMenuBar#main_menu QMenu {{
+                background-color: {POKEMON_COLORS['card_bg']};
+                color: {POKEMON_COLORS['text']};
+                border: 1px solid {POKEMON_COLORS['border']};
+            }}
+            QMenuBar#main_menu QMenu::item:disabled {{
+                color: {POKEMON_COLORS['text_disabled']};
+            }}
+
+            QLabel#app_title {{
+                font-size: 20px;
+                font-weight: 700;
+                color: {POKEMON_COLORS['primary']};
+                letter-spacing: 0.5px;
+            }}
+            QLabel#app_description {{
+                font-size: 14px;
+                color: {POKEMON_COLORS['text_secondary']};
+                font-weight: 500;
+            }}
+            QPushButton#settings_button {{
+                background-color: {POKEMON_COLORS['primary']};
+                color: white;
+                border-radius: 4px;
+                padding: 6px 12px;
+                font-weight: 600;
+                font-size: 12px;
+                min-height: 14px;
+            }}
+            QPushButton#settings_button:hover {{
+                background-color: #FF4F45;
+            }}
+            QPushButton#settings_button:pressed {{
+                background-color: #E6352B;
+            }}
+            QFrame#scanner_card, QFrame#codes_card {{
+                background-color: {POKEMON_COLORS['card_bg']};
+                border-radius: 12px;
+                border: 1px solid {POKEMON_COLORS['border']};
+            }}
+            QLabel#section_title {{
+                font-size: 16px;
+                font-weight: 700;
+                color: {POKEMON_COLORS['accent']};
+                letter-spacing: 0.5px;
+            }}
+
+            QFrame#status_light_frame {{
+                background-color: transparent;
+                border-radius: 6px;
+                margin: 0;
+                padding: 0;
+            }}
+            QFrame#status_light[state="on"] {{
+                background-color: {POKEMON_COLORS['success']};
+                border-radius: 3px;
+                margin: 0;
+            }}
+            QFrame#status_light[state="off"] {{
+                background-color: {POKEMON_COLORS['error']};
+                border-radius: 3px;
+                margin: 0;
+            }}
+            QFrame#status_light[state="pending"] {{
+                background-color: {POKEMON_COLORS['warning']};
+                border-radius: 3px;
+                margin: 0;
+            }}
+            QLabel#status_text {{
+                font-weight: 500;
+                color: {POKEMON_COLORS['text_secondary']};
+                font-size: 12px;
+                padding: 0;
+                margin: 0;
+            }}
+            QLabel#status_text[state="on"] {{
+                color: {POKEMON_COLORS['success']};
+            }}
+            QLabel#status_text[state="pending"] {{
+                color: {POKEMON_COLORS['warning']};
+            }}
+
+            QFrame#camera_container {{
+                background-color: {POKEMON_COLORS['background']};
+                border-radius: 10px;
+                border: 1px solid {POKEMON_COLORS['border']};
+                padding: 0;
+            }}
+            QLabel#camera_view {{
+                background-color: {POKEMON_COLORS['background']};
+                border: 1px solid {POKEMON_COLORS['border']};
+                border-radius: 9px;
+                padding: 0;
+                margin: 0;
+            }}
+            QLabel#camera_off {{
+                color: {POKEMON_COLORS['text_secondary']};
+                font-size: 14px;
+                font-weight: 600;
+                background-color: rgba(18, 18, 20, 0.8);
+                border-radius: 6px;
+                padding: 8px 16px;
+                border: 1px solid {POKEMON_COLORS['border']};
+            }}
+            QLabel#hud {{
+                color: {POKEMON_COLORS['success']};
+                background-color: rgba(0, 0, 0, 0.7);
+                border: 1px solid {POKEMON_COLORS['border']};
+                border-radius: 6px;
+                padding: 8px 10px;
+                font-family: 'Menlo', 'SF Mono', 'Consolas', 'Courier New', monospace;
+                font-size: 11px;
+            }}
+
+            QPushButton#start_button {{
+                background-color: {POKEMON_COLORS['secondary']};
+                color: white;
+                border-radius: 4px;
+                padding: 8px 12px;
+                font-weight: 600;
+                min-width: 100px;
+                min-height: 14px;
+                font-size: 12px;
+            }}
+            QPushButton#start_button:hover {{
+                background-color: #0A84FF;
+            }}
+            QPushButton#start_button:pressed {{
+                background-color: #0070EB;
+            }}
+            QPushButton#start_button:disabled {{
+                background-color: {POKEMON_COLORS['surface']};
+                color: {POKEMON_COLORS['text_disabled']};
+            }}
+            QPushButton#start_button[running="true"] {{
+                background-color: {POKEMON_COLORS['error']};
+                color: white;
+            }}
+            QPushButton#start_button[running="true"]:hover {{
+                background-color: #FF5F54;
+            }}
+            QPushButton#start_button[running="true"]:pressed {{
+                background-color: #E63C34;
+            }}
+            QPushButton#scan_button {{
+                background-color: {POKEMON_COLORS['card_bg']};
+                color: {POKEMON_COLORS['text']};
+                border: 1px solid {POKEMON_COLORS['border']};
+                border-radius: 4px;
+                padding: 8px 12px;
+                font-weight: 600;
+                min-width: 100px;
+                min-height: 14px;
+                font-size: 12px;
+            }}
+            QPushButton#scan_button:hover {{
+                background-color: {POKEMON_COLORS['surface']};
+                border-color: {POKEMON_COLORS['border_light']};
+            }}
+            QPushButton#scan_button:pressed {{
+                background-color: {POKEMON_COLORS['surface']};
+                border-color: {POKEMON_COLORS['border_focus']};
+            }}
+            QPushButton#scan_button:disabled {{
+                background-color: {POKEMON_COLORS['card_bg']};
+                color: {POKEMON_COLORS['text_disabled']};
+                border-color: {POKEMON_COLORS['border']};
+            }}
+            {_button_variants()}
+
+            QTabWidget#code_tabs::pane {{
+                border: none;
+                background-color: transparent;
+                top: 0px;
+            }}
+            QTabWidget#code_tabs QTabBar {{
+                background-color: transparent;
+                alignment: center;
+            }}
+            QTabWidget#code_tabs QTabBar::tab {{
+                background-color: transparent;
+                color: {POKEMON_COLORS['text_secondary']};
+                padding: 10px 16px;
+                margin-right: 4px;
+                font-weight: 600;
+                font-size: 14px;
+                min-height: 20px;
+                min-width: 110px;
+                border-bottom: 2px solid transparent;
+            }}
+            QTabWidget#code_tabs QTabBar::tab:selected {{
+                color: {POKEMON_COLORS['accent']};
+                border-bottom: 2px solid {POKEMON_COLORS['accent']};
+            }}
+            QTabWidget#code_tabs QTabBar::tab:!selected:hover {{
+                color: {POKEMON_COLORS['text']};
+                border-bottom: 2px solid {POKEMON_COLORS['border_light']};
+            }}
+
+            QListView#codes_list {{
+                background-color: {POKEMON_COLORS['input_bg']};
+                color: {POKEMON_COLORS['text']};
+                border: 1px solid {POKEMON_COLORS['border']};
+                border-radius: 8px;
+                padding: 4px;
+                font-family: 'Menlo', 'SF Mono', 'Consolas', 'Courier New', monospace;
+                font-size: 13px;
+            }}
+            QListView#codes_list::item {{
+                padding: 10px 12px;
+                border-bottom: 1px solid {POKEMON_COLORS['border']};
+                margin: 0;
+                border-radius: 0;
+            }}
+            QListView#codes_list::item:selected {{
+                background-color: rgba(0, 122, 255, 0.15);
+                color: {POKEMON_COLORS['text']};
+                border-left: 2px solid {POKEMON_COLORS['secondary']};
+            }}
+            QListView#codes_list[empty="true"]::item {{
+                padding: 16px 12px;
+                color: {POKEMON_COLORS['text_secondary']};
+                font-family: 'SF Pro Display', 'Segoe UI', 'Arial', sans-serif;
+                font-style: italic;
+            }}
+
+            QLabel#field_label {{
+                font-size: 13px;
+                font-weight: 600;
+                color: {POKEMON_COLORS['text_secondary']};
+            }}
+            {_combo_box('QComboBox#block_combo')}
+            QTextEdit#block_display {{
+                background-color: {POKEMON_COLORS['input_bg']};
+                color: {POKEMON_COLORS['text']};
+                border: 1px solid {POKEMON_COLORS['border']};
+                border-radius: 8px;
+                padding: 12px 16px;
+                font-family: 'Menlo', 'SF Mono', 'Consolas', 'Courier New', monospace;
+                font-size: 13px;
+                line-height: 1.5;
+            }}
+            QTextEdit#block_display[empty="true"] {{
+                color: {POKEMON_COLORS['text_secondary']};
+                font-family: 'SF Pro Display', 'Segoe UI', 'Arial', sans-serif;
+                font-style: italic;
+            }}
+    """
+
+
+def stylesheet():
+    """The application style sheet, built on first use."""
+    global _stylesheet
+    if _stylesheet is None:
+        _stylesheet = build_stylesheet()
+    return _stylesheet
+
+
+def apply_theme(app):
+    """Install the theme on a QApplication unless it already has it."""
+    if app.styleSheet() != stylesheet():
+        app.setStyleSheet(stylesheet())
+
+
+def set_state(widget, name, value):
+    """
+    Change a dynamic property the style sheet selects on.
+
+    Only the widget is repolished, from the rules Qt already parsed, and
+    nothing happens if the value is unchanged. Polishing is enough for the
+    style sheet style to match the widget again; no unpolish is needed.
+
+    Args:
+        widget: Widget to update
+        name: Property name, e.g. 'running'
+        value: New value; booleans match "true"/"false" in the style sheet
+    """
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    widget.style().polish(widget)
+
+
+def style_button(button, variant, large=False):
+    """
+    Give a push button one of the theme's BUTTON_VARIANTS.
+
+    Args:
+        button: QPushButton to style
+        variant: Key of BUTTON_VARIANTS
+        large: Use the larger padding of primary actions
+    """
+    button.setProperty('variant', variant)
+    if large:
+        button.setProperty('prominent', True)
@@ -0,0 +1,219 @@
+import os
+import time
+import threading
+import cv2
+
+# Thread roles. 'ui' is the Qt main thread, which also captures and decodes
+# in the window; 'capture' and 'decode' are the QRScanner.stream() workers;
+# 'workers' covers everything else, including OpenCV's internal pool.
+ROLES = ['ui', 'capture', 'decode', 'workers']
+
+# Thread name prefixes used to recognise the stream workers
+ROLE_PREFIXES = {
+    'stream-capture': 'capture',
+    'stream-decode': 'decode',
+}
+
+_TASK_DIR = '/proc/self/task'
+_initial_cores = None
+
+
+def available_cores():
+    """CPU cores the process was allowed to run on when it started."""
+    global _initial_cores
+    if _initial_cores is None:
+        if hasattr(os, 'sched_getaffinity'):
+            _initial_cores = sorted(os.sched_getaffinity(0))
+        else:
+            _initial_cores = list(range(os.cpu_count() or 1))
+    return _initial_cores
+
+
+def thread_roles():
+    """Map the native id of every Python thread to its role."""
+    roles = {}
+    main_id = threading.main_thread().native_id
+    for thread in threading.enumerate():
+        if thread.native_id is None:
+            continue
+        role = 'ui' if thread.native_id == main_id else 'workers'
+        for prefix, prefix_role in ROLE_PREFIXES.items():
+            if thread.name.startswith(prefix):
+                role = prefix_role
+        roles[thread.native_id] = role
+    return roles
+
+
+def _task_ids():
+    try:
+        return [int(tid) for tid in os.listdir(_TASK_DIR)]
+    except OSError:
+        return []
+
+
+class ThreadBudget:
+    """
+    Splits the station's cores between the UI, capture, decoding and OpenCV.
+
+    Decoding, preprocessing and the UI all end up in OpenCV, whose internal
+    pool defaults to one thread per core. Together with the decode workers
+    and Qt, that oversubscribes small kiosks. The budget keeps the first
+    core for the UI and capture. The remaining cores go to the decode
+    workers and to OpenCV's pool, which also runs the preprocessing filters.
+
+    Args:
+        total: Cores to use, 0 for every available core
+        opencv_threads: OpenCV internal threads, -1 to size them from the budget
+        decode_workers: Decode threads used by QRScanner.stream()
+        pin: Pin threads to their role's cores (Linux only)
+    """
+
+    def __init__(self, total=0, opencv_threads=-1, decode_workers=1, pin=False):
+        self.total = total
+        self.opencv_threads = opencv_threads
+        self.decode_workers = max(decode_workers, 1)
+        self.pin = pin and hasattr(os, 'sched_setaffinity')
+        self._pinned = {}
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.thread_budget, config.opencv_threads, config.decode_workers, config.pin_threads)
+
+    def plan(self):
+        """
+        Work out the thread counts and cores of every role.
+
+        Returns:
+            Dict with 'cores' (budget cores), 'opencv' (thread count),
+            'decode_workers', 'oversubscribed' and a core list per role
+        """
+        cores = available_cores()
+        if 0 < self.total < len(cores):
+            cores = cores[:self.total]
+        front, back = cores[:1], cores[1:] or cores[:1]
+        opencv = self.opencv_threads if self.opencv_threads >= 0 else len(back)
+        return {
+            'cores': cores,
+            'opencv': opencv,
+            'decode_workers': self.decode_workers,
+            # One UI thread plus the busy workers against the cores they share
+            'oversubscribed': 1 + self.decode_workers + max(opencv - 1, 0) > len(cores),
+            'ui': front,
+            'capture': front,
+            'decode': back,
+            'workers': back,
+        }
+
+    def apply(self, scanner=None):
+        """
+        Apply the budget to OpenCV, a scanner and, when pinning, every thread.
+
+        Returns:
+            The plan that was applied
+        """
+        plan = self.plan()
+        cv2.setNumThreads(plan['opencv'])
+        if scanner is not None:
+            scanner.set_decode_workers(plan['decode_workers'])
+        if self.pin:
+            self.enforce(plan)
+        elif self._pinned:
+            self.unpin()
+        return plan
+
+    def enforce(self, plan=None):
+        """
+        Pin threads that are new or not on their role's cores.
+
+        Threads started later, such as OpenCV's pool after a resize, are
+        only covered by the next call, so call this periodically.
+        """
+        if not self.pin:
+            return
+        plan = plan or self.plan()
+        roles = thread_roles()
+        for tid in _task_ids():
+            cores = set(plan[roles.get(tid, 'workers')])
+            if self._pinned.get(tid) == cores:
+                continue
+            try:
+                os.sched_setaffinity(tid, cores)
+                self._pinned[tid] = cores
+            except OSError:
+                # The thread exited
+                self._pinned.pop(tid, None)
+
+    def unpin(self):
+        """Let every thread run on all available cores again."""
+        cores = set(available_cores())
+        for tid in _task_ids():
+            try:
+                os.sched_setaffinity(tid, cores)
+            except OSError:
+                pass
+        self._pinned.clear()
+
+
+class ContentionMonitor:
+    """
+    Measures CPU use and scheduler contention from /proc/self/task/*/schedstat.
+
+    Each thread's schedstat holds the time it has run and the time it spent
+    runnable but waiting for a core. Between two samples, the waiting
+    share of (run + wait) is the contention: near 0 when every thread gets
+    a core at once, rising as threads queue for cores. The figures are
+    broken down by thread role. Only available on Linux.
+    """
+
+    def __init__(self):
+        self.available = os.path.isdir(_TASK_DIR)
+        self._last = None
+        self._last_time = None
+
+    def _read(self):
+        stats = {}
+        for tid in _task_ids():
+            try:
+                with open(os.path.join(_TASK_DIR, str(tid), 'schedstat')) as f:
+                    run, wait, _ = f.read().split()
+            except (OSError, ValueError):
+                continue
+            stats[tid] = (int(run), int(wait))
+        return stats
+
+    def sample(self):
+        """
+        Measure contention since the previous sample.
+
+        Returns:
+            Dict with 'threads', 'cpu' (cores busy), 'wait' (waiting share)
+            and 'roles' (role -> {'cpu', 'wait'}), or None on the first
+            call and where schedstat is unavailable
+        """
+        if not self.available:
+            return None
+        now = time.monotonic()
+        current = self._read()
+        last, last_time = self._last, self._last_time
+        self._last, self._last_time = current, now
+        if last is None or now <= last_time:
+            return None
+
+        elapsed_ns = (now - last_time) * 1e9
+        roles = thread_roles()
+        totals = {role: [0, 0] for role in ROLES}
+        for tid, (run, wait) in current.items():
+            run_before, wait_before = last.get(tid, (0, 0))
+            role = totals[roles.get(tid, 'workers')]
+            role[0] += run - run_before
+            role[1] += wait - wait_before
+
+        def summarise(run, wait):
+            return {'cpu': run / elapsed_ns, 'wait': wait / (run + wait) if run + wait else 0.0}
+
+        run_total = sum(run for run, _ in totals.values())
+        wait_total = sum(wait for _, wait in totals.values())
+        result = summarise(run_total, wait_total)
+        result['threads'] = len(current)
+        result['roles'] = {role: summarise(run, wait) for role, (run, wait) in totals.items()}
+        return result
@@ -0,0 +1,148 @@
+import time
+import cv2
+import numpy as np
+
+# Overlap (intersection over union) of bounding boxes above which a
+# located code belongs to an existing track
+IOU_THRESHOLD = 0.3
+
+# Seconds a track survives without being located; after that the card
+# counts as gone from the frame
+TRACK_TIMEOUT = 1.0
+
+# Side of the thumbnail a located code is warped to, and the mean
+# difference of normalised thumbnails above which it is a different code.
+# This catches a new card put down exactly where the previous one was.
+SIGNATURE_SIZE = 24
+SIGNATURE_THRESHOLD = 0.45
+
+
+def quad_box(quad):
+    """Axis-aligned bounding box (x0, y0, x1, y1) of corner points."""
+    points = np.asarray(quad, np.float32).reshape(-1, 2)
+    x0, y0 = points.min(axis=0)
+    x1, y1 = points.max(axis=0)
+    return float(x0), float(y0), float(x1), float(y1)
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x0, y0, x1, y1) boxes."""
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    intersection = width * height
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def code_signature(image, quad):
+    """
+    Small normalised thumbnail of a located code, for telling codes apart without decoding.
+
+    Args:
+        image: BGR or grayscale frame
+        quad: Corner points of the code, in the detector's order
+
+    Returns:
+        SIGNATURE_SIZE x SIGNATURE_SIZE float array with zero mean and unit variance
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    size = SIGNATURE_SIZE
+    target = np.float32([[0, 0], [size, 0], [size, size], [0, size]])
+    matrix = cv2.getPerspectiveTransform(np.asarray(quad, np.float32).reshape(4, 2), target)
+    thumbnail = cv2.warpPerspective(image, matrix, (size, size), flags=cv2.INTER_AREA).astype(np.float32)
+    return (thumbnail - thumbnail.mean()) / (thumbnail.std() + 1e-6)
+
+
+class CardTracker:
+    """
+    Follows located codes across frames so each physical card is decoded once.
+
+    A located code joins the track whose bounding box it overlaps most,
+    provided the overlap is at least `iou_threshold`. Once a track has a
+    decoded code it is committed: later frames that locate the same card
+    can skip decoding, until the card has not been seen for `timeout`
+    seconds. A committed track also keeps a thumbnail of the code, so a
+    different card put down in the same place is not mistaken for it.
+    """
+
+    def __init__(self, iou_threshold=IOU_THRESHOLD, timeout=TRACK_TIMEOUT):
+        self.iou_threshold = iou_threshold
+        self.timeout = timeout
+        self.tracks = []
+        self.stats = {'tracked': 0, 'committed': 0}
+
+    def _expire(self, now):
+        self.tracks = [track for track in self.tracks if now - track['seen'] <= self.timeout]
+
+    def _match(self, box):
+        best, best_iou = None, self.iou_threshold
+        for track in self.tracks:
+            iou = box_iou(box, track['box'])
+            if iou >= best_iou:
+                best, best_iou = track, iou
+        return best
+
+    def covers(self, image, quad, now=None):
+        """
+        Whether a located code belongs to a committed card, so decoding it can be skipped.
+
+        A match refreshes the track, keeping the card tracked while it stays in view.
+
+        Args:
+            image: Frame the code was located in (BGR or grayscale)
+            quad: Corner points of the located code
+        """
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        box = quad_box(quad)
+        track = self._match(box)
+        if track is None or track['code'] is None:
+            return False
+        if np.abs(code_signature(image, quad) - track['signature']).mean() > SIGNATURE_THRESHOLD:
+            # Same place, different card
+            self.tracks.remove(track)
+            return False
+        track['box'] = box
+        track['seen'] = now
+        self.stats['tracked'] += 1
+        return True
+
+    def observe(self, image, quad, code=None, now=None):
+        """
+        Record the outcome of a scan.
+
+        Args:
+            image: The scanned frame
+            quad: Corner points of the code located in it, or None
+            code: Code decoded from it, or None
+
+        Returns:
+            True if `code` was just committed to a card, i.e. a new card was read
+        """
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        if quad is None:
+            return False
+
+        box = quad_box(quad)
+        track = self._match(box)
+        if track is None:
+            track = {'box': box, 'seen': now, 'code': None, 'signature': None}
+            self.tracks.append(track)
+        track['box'] = box
+        track['seen'] = now
+        if code is None or track['code'] == code:
+            return False
+
+        # A new code where a different one was tracked means a new card
+        track['code'] = code
+        track['signature'] = code_signature(image, quad)
+        self.stats['committed'] += 1
+        return True
+
+    def clear(self):
+        """Forget every track, e.g. when the camera stops."""
+        self.tracks = []